@@ -1,17 +1,33 @@
 # app/__init__.py
 
-from flask import Flask
+import tempfile
+
+from flask import Flask, Request
 from config import Config
-from app.routes import main_bp
 import os
 
+
+class SpooledRequest(Request):
+    """Файлы multipart-формы держатся в памяти до UPLOAD_SPOOL_BYTES, дальше пишутся во временный файл"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=Config.UPLOAD_SPOOL_BYTES, mode="rb+")
+
+
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.request_class = SpooledRequest
+
+    if app.config['TRACE_FILE']:
+        from service import tracing
+        tracing.configure(app.config['TRACE_FILE'])
 
     # Ensure the upload folder exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+    # Импорт внутри фабрики разрывает цикл service -> app.constants -> app.routes -> service
+    from app.routes import main_bp
     app.register_blueprint(main_bp)
 
     return app
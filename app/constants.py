@@ -6,7 +6,7 @@ STRUCTURE_MAPPING = {
     "Four-Act Structure": "four_act",
     "Paradigm (Sid Field)": "field_paradigm",
     "Three-Act Structure": "three_act",
-    "The Monomyth (Joseph Campbell)": "monomyth",
+    "The Monomyth (Joseph Campbell)": "campbell_monomyth",
     "The Structure of Story (Chris Soth)": "soth_story_structure",
     "Story Circle (Dan Harmon)": "harmon_story_circle",
     "Consistent Approach (Paul Gulino)": "gulino_sequence",
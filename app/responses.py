@@ -0,0 +1,140 @@
+# app/responses.py
+
+import gzip
+import hashlib
+import json
+
+from flask import Response, request
+
+from config import Config
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него ответы сжимаются только gzip
+    brotli = None
+
+# Поля результата анализа, которые клиент может запросить через fields
+RESULT_FIELDS = (
+    "structure",
+    "detected_structure",
+    "structure_name",
+    "analysis",
+    "formatted_structure",
+    "structure_analysis",
+    "visualization",
+)
+
+# Меняется вместе с форматом ответа, чтобы старые ETag перестали совпадать
+RESULT_VERSION = "1"
+
+
+def parse_fields(value):
+    """Список запрошенных полей из строки "analysis,structure" или None, если нужны все.
+
+    Неизвестное поле — ValueError.
+    """
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in RESULT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(RESULT_FIELDS)}")
+    # structure нужен всегда: по нему клиент понимает, как читать остальное
+    return sorted(set(fields) | {"structure"})
+
+
+def select_fields(result, fields):
+    if fields is None:
+        return result
+    return {field: result[field] for field in fields if field in result}
+
+
+def analysis_etag(source, structure, fields):
+    """Сильный ETag ответа /analyze по хэшу входа, структуре, полям и модели.
+
+    source — хэш текста или загруженного файла; вычисляется до анализа,
+    поэтому повторный запрос отвечается 304 без обращения к модели.
+    """
+    digest = hashlib.sha256()
+    for part in (RESULT_VERSION, Config.LLM_MODEL, structure or "Auto-detect", ','.join(fields or RESULT_FIELDS), source):
+        digest.update(part.encode('utf-8'))
+        digest.update(b"\0")
+    return digest.hexdigest()[:32]
+
+
+def request_source_hash(text=None, file=None):
+    """Хэш текста из формы или содержимого файла; файл после чтения перематывается в начало"""
+    digest = hashlib.sha256()
+    if text:
+        digest.update(b"text\0")
+        digest.update(text.encode('utf-8'))
+    elif file is not None:
+        digest.update(b"file\0")
+        digest.update(file.filename.rsplit('.', 1)[-1].lower().encode('utf-8'))
+        digest.update(b"\0")
+        stream = file.stream
+        for block in iter(lambda: stream.read(64 * 1024), b""):
+            digest.update(block)
+        stream.seek(0)
+    return digest.hexdigest()
+
+
+def etag_matches(etag):
+    """Совпадает ли If-None-Match с ETag в любом из вариантов сжатия.
+
+    «*» не считается совпадением: результат анализа вычисляется по запросу, и 304
+    без тела допустим только для конкретного ETag, который клиент уже получил.
+    """
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            continue
+        candidate = candidate.removeprefix('W/').strip('"')
+        if candidate.split('-', 1)[0] == etag:
+            return True
+    return False
+
+
+def not_modified(etag):
+    response = Response(status=304)
+    response.headers['ETag'] = f'"{etag}"'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def _encoding():
+    """Лучшее сжатие из Accept-Encoding, доступное серверу"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted.quality('br') > 0:
+        return 'br'
+    if accepted.quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+
+def compress(body):
+    """Тело ответа, сжатое по Accept-Encoding, и название кодировки (или None)"""
+    if len(body) < Config.RESPONSE_COMPRESS_MIN_BYTES:
+        return body, None
+    encoding = _encoding()
+    if encoding == 'br':
+        return brotli.compress(body, quality=Config.RESPONSE_BROTLI_QUALITY), encoding
+    if encoding == 'gzip':
+        # mtime=0 — одинаковый вход даёт одинаковые байты
+        return gzip.compress(body, compresslevel=Config.RESPONSE_GZIP_LEVEL, mtime=0), encoding
+    return body, None
+
+
+def json_response(data, status=200, etag=None):
+    """JSON-ответ со сжатием и ETag; у сжатых вариантов свой ETag с суффиксом кодировки"""
+    body, encoding = compress(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    response = Response(body, status=status, mimetype='application/json')
+    response.headers['Vary'] = 'Accept-Encoding'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if etag:
+        response.headers['ETag'] = f'"{etag}-{encoding}"' if encoding else f'"{etag}"'
+    return response
@@ -1,143 +1,334 @@
 # app/routes.py
 
-from flask import Blueprint, request, jsonify, render_template
-from narr_mod import get_narrative_structure
-from service import initialize_llm, NarrativeEvaluator
-from werkzeug.utils import secure_filename
-import os
-import subprocess
+from flask import Blueprint, Response, g, request, jsonify, redirect, render_template, stream_with_context, url_for
+from narr_mod import stylesheet
+from service import get_evaluator
+from service.llm import get_llm_cache
+from service.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, EXTRACTION_SECONDS, render as render_metrics, track
+import contextvars
+import json
 import logging
-import platform
-from io import StringIO
-from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
-from pdfminer.converter import TextConverter
-from pdfminer.layout import LAParams
-from pdfminer.pdfpage import PDFPage
+from werkzeug.exceptions import RequestEntityTooLarge
+from concurrent.futures import ThreadPoolExecutor
 from .constants import STRUCTURE_MAPPING
-
-from service.converter import convert_to_format
+from .responses import (
+    analysis_etag,
+    etag_matches,
+    json_response,
+    not_modified,
+    parse_fields,
+    request_source_hash,
+    select_fields,
+)
+from config import Config
+from service.jobs import JobManager, JobQueueFull
+from service.extraction import (
+    ExtractionError,
+    extract_uploaded_text,
+    iter_pdf_pages,
+    spool_upload,
+)
+from service.tracing import current_span, end_trace, new_request_id, start_trace, trace
 
 # Настройка логирования
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 main_bp = Blueprint('main', __name__)
-llm = initialize_llm()
-evaluator = NarrativeEvaluator(llm)
 
 # Список доступных нарративных структур (используется для отображения в интерфейсе)
 NARRATIVE_STRUCTURES = list(STRUCTURE_MAPPING.keys())
 
-def extract_doc_text(file_path):
-    """Извлечение текста из .doc файла"""
-    if platform.system() == 'Darwin':  # MacOS
-        txt_path = file_path + '.txt'
-        subprocess.run(['textutil', '-convert', 'txt', '-output', txt_path, file_path])
-        with open(txt_path, 'r', encoding='utf-8') as f:
-            text = f.read()
-        os.remove(txt_path)
-        return text
-    else:  # Linux/Unix
-        result = subprocess.run(['antiword', file_path], capture_output=True, text=True)
-        return result.stdout if result.returncode == 0 else None
-
-
-def extract_text_from_pdf_miner(file):
-    resource_manager = PDFResourceManager()
-    fake_file_handle = StringIO()
-    converter = TextConverter(resource_manager, fake_file_handle, laparams=LAParams())
-    page_interpreter = PDFPageInterpreter(resource_manager, converter)
-    
-    for page in PDFPage.get_pages(file, caching=True, check_extractable=True):
-        page_interpreter.process_page(page)
-    
-    text = fake_file_handle.getvalue()
-    
-    converter.close()
-    fake_file_handle.close()
-    
-    return text
+# Служебные запросы не трассируются, чтобы опрос метрик не засорял приёмник трасс
+UNTRACED_ENDPOINTS = {'main.metrics', 'static'}
+
+@main_bp.before_app_request
+def start_request_trace():
+    g.request_id = new_request_id(request.headers.get(Config.REQUEST_ID_HEADER))
+    if request.endpoint not in UNTRACED_ENDPOINTS:
+        g.trace = start_trace(
+            f"{request.method} {request.path}",
+            g.request_id,
+            method=request.method,
+            path=request.path,
+            content_length=request.content_length or 0,
+        )
 
-def extract_text_from_txt(file):
-    """Извлечение текста из TXT файла"""
-    return file.read().decode('utf-8')
+@main_bp.after_app_request
+def add_request_id(response):
+    response.headers[Config.REQUEST_ID_HEADER] = g.get('request_id') or new_request_id()
+    root, _ = g.get('trace', (None, None))
+    if root is not None:
+        root.set(status=response.status_code)
+    return response
+
+@main_bp.teardown_app_request
+def finish_request_trace(error):
+    # Для потоковых ответов вызывается после отправки последнего фрагмента
+    root, token = g.pop('trace', (None, None))
+    end_trace(root, token, error)
 
 @main_bp.route('/', methods=['GET'])
 def index():
-    return render_template('index.html', structures=NARRATIVE_STRUCTURES)
+    _, fingerprint = stylesheet()
+    return render_template(
+        'index.html',
+        structures=NARRATIVE_STRUCTURES,
+        stylesheet_url=url_for('main.narr_mod_stylesheet', fingerprint=fingerprint),
+    )
 
-@main_bp.route('/analyze', methods=['POST'])
-def analyze_text():
-    text = None
-    selected_structure = request.form.get('structure')
-    
+@main_bp.route('/assets/narr_mod.<fingerprint>.css', methods=['GET'])
+def narr_mod_stylesheet(fingerprint):
+    """Стили визуализаций narr_mod. Имя содержит отпечаток содержимого, поэтому файл кэшируется навсегда."""
+    css, current = stylesheet()
+    if fingerprint != current:
+        return redirect(url_for('main.narr_mod_stylesheet', fingerprint=current))
+    response = Response(css, mimetype='text/css')
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+@main_bp.app_errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    return jsonify({"error": "Request body is too large"}), 413
+
+@main_bp.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(get_llm_cache().stats())
+
+@main_bp.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+def get_request_file():
+    """Загруженный файл из запроса или None"""
+    file = request.files.get('file')
+    if file and file.filename != '':
+        return file
+    return None
+
+def get_request_text():
+    """Извлечение текста из формы или загруженного файла.
+
+    Возвращает пару (text, error_response); при ошибке text равен None.
+    """
     # Проверяем, есть ли текст в форме
     form_text = request.form.get('text')
     if form_text:
-        text = form_text
         logger.debug("Text received from form")
+        return form_text, None
     
     # Если текста в форме нет, проверяем наличие файла
-    if not text and 'file' in request.files:
-        file = request.files['file']
-        if file and file.filename != '':
-            filename = secure_filename(file.filename)
-            file_extension = os.path.splitext(filename)[1].lower()
-            
-            if file_extension == '.doc':
-                file_path = os.path.join('uploads', filename)
-                if not os.path.exists('uploads'):
-                    os.makedirs('uploads')
-                file.save(file_path)
-                try:
-                    text = extract_doc_text(file_path)
-                    logger.debug("Text extracted from uploaded .doc file")
-                except Exception as e:
-                    logger.error(f"Error extracting text from .doc file: {str(e)}")
-                finally:
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-            elif file_extension == '.pdf':
-                try:
-                    text = extract_text_from_pdf_miner(file)
-                    logger.debug(f"Текст успешно извлечен из PDF файла. Длина текста: {len(text)}")
-                    if not text:
-                        logger.warning("Извлеченный текст пустой")
-                        return jsonify({"error": "Не удалось извлечь текст из PDF файла"}), 400
-                except Exception as e:
-                    logger.error(f"Ошибка при извлечении текста из PDF файла: {str(e)}")
-                    return jsonify({"error": f"Ошибка при обработке PDF файла: {str(e)}"}), 400
-            elif file_extension == '.txt':
-                try:
-                    text = extract_text_from_txt(file)
-                    logger.debug("Text extracted from uploaded TXT file")
-                except Exception as e:
-                    logger.error(f"Error extracting text from TXT file: {str(e)}")
-            else:
-                logger.error(f"Unsupported file type: {file_extension}")
-                return jsonify({"error": "Unsupported file type"}), 400
-    
-    if not text:
+    file = get_request_file()
+    if file:
+        try:
+            return extract_uploaded_text(file.filename, file), None
+        except ExtractionError as e:
+            return None, (jsonify({"error": str(e)}), 400)
+
+    return None, (jsonify({"error": "No text could be extracted from form or file"}), 400)
+
+@main_bp.route('/analyze', methods=['POST'])
+def analyze_text():
+    """Анализ текста или файла.
+
+    fields (форма или строка запроса) — список нужных полей через запятую.
+    Ответ сжимается по Accept-Encoding; ETag зависит только от входа, структуры
+    и полей, поэтому повторный запрос с If-None-Match получает 304 без анализа.
+    """
+    selected_structure = request.form.get('structure')
+    try:
+        fields = parse_fields(request.values.get('fields'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    form_text = request.form.get('text')
+    file = get_request_file()
+    if not form_text and not file:
         return jsonify({"error": "No text could be extracted from form or file"}), 400
-    
-    evaluator = NarrativeEvaluator(llm)
+
+    source = request_source_hash(form_text, file)
+    etag = analysis_etag(source, selected_structure, fields)
+    if etag_matches(etag):
+        logger.info("Analysis not modified, returning 304")
+        return not_modified(etag)
+
+    text, error = get_request_text()
+    if error:
+        return error
+    current_span().set(input_chars=len(text), structure=selected_structure or "Auto-detect", fields=fields or "all")
 
     try:
-        if not selected_structure or selected_structure == "Auto-detect":
-            structure = evaluator.classify(text)
-            if structure == "unknown" or structure not in STRUCTURE_MAPPING:
-                structure = "Three-Act Structure"
-        else:
-            structure = selected_structure
-
-        result = evaluator.analyze_specific_structure(text, structure)
-        
-        # Теперь result уже содержит всю необходимую информацию
-        result['detected_structure'] = structure
-        result['structure_name'] = structure
+        result = get_evaluator().analyze(text, selected_structure)
+        structure = result['structure']
         
         logger.info(f"Analysis completed for structure: {structure}")
-        return jsonify(result)
+        return json_response(select_fields(result, fields), etag=etag)
     except Exception as e:
         logger.error(f"Error during text analysis: {str(e)}")
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+@main_bp.route('/analyze/estimate', methods=['POST'])
+def estimate_analysis():
+    """Оценка токенов и времени анализа без обращения к модели"""
+    selected_structure = request.form.get('structure')
+    text, error = get_request_text()
+    if error:
+        return error
+
+    try:
+        return jsonify(get_evaluator().estimate(text, selected_structure))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@main_bp.route('/analyze/stream', methods=['POST'])
+def analyze_text_stream():
+    """Потоковый вариант /analyze: этапы и токены анализа отправляются как Server-Sent Events"""
+    selected_structure = request.form.get('structure')
+    text, error = get_request_text()
+    if error:
+        return error
+
+    def generate():
+        yield _sse("stage", {"stage": "extracted", "length": len(text)})
+        try:
+            for event, data in get_evaluator().stream_analysis(text, selected_structure):
+                yield _sse(event, data)
+        except Exception as e:
+            logger.error(f"Error during streaming text analysis: {str(e)}")
+            yield _sse("error", {"error": str(e)})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+# Классификация по первым страницам PDF, пока рабочий поток задачи извлекает остальные
+early_classifier = ThreadPoolExecutor(max_workers=Config.JOB_WORKERS, thread_name_prefix='early-classify')
+
+def extract_pdf_for_job(job, file, structure):
+    """Текст PDF задачи по страницам. При автоопределении структуры классификация
+    запускается, как только набралось достаточно текста для её промпта.
+
+    Возвращает пару (text, future с названием структуры или None).
+    """
+    auto = not structure or structure == "Auto-detect"
+    evaluator = get_evaluator()
+    enough = evaluator.classification_chars()
+    pages = []
+    chars = 0
+    classification = None
+    for page in iter_pdf_pages(file):
+        pages.append(page)
+        chars += len(page)
+        job.update_stage("extract", pages=len(pages))
+        if auto and classification is None and chars >= enough:
+            job.start_stage("classify", early=True)
+            # Копия контекста сохраняет вложенность участков трассы в потоке классификатора
+            context = contextvars.copy_context()
+            classification = early_classifier.submit(context.run, evaluator.classify_structure, ''.join(pages))
+    return ''.join(pages), classification
+
+def run_analysis_job(job):
+    """Конвейер анализа для фоновой задачи: извлечение, классификация, анализ.
+
+    Трасса задачи отдельная от трассы запроса /jobs, но с тем же request id.
+    """
+    with trace("job", job.payload.get('request_id'), job_id=job.id):
+        return _run_analysis_job(job)
+
+def _run_analysis_job(job):
+    structure = job.payload.get('structure')
+    classification = None
+    text = job.payload.get('text')
+    if text is None:
+        filename, file = job.payload['file']
+        job.start_stage("extract", filename=filename)
+        with file:
+            if Config.PDF_EARLY_CLASSIFY and filename.lower().endswith('.pdf'):
+                with track("extract", format="pdf"), EXTRACTION_SECONDS.time(format="pdf"):
+                    text, classification = extract_pdf_for_job(job, file, structure)
+                if not text:
+                    raise ExtractionError("Не удалось извлечь текст из PDF файла")
+            else:
+                text = extract_uploaded_text(filename, file)
+    job.finish_stage("extract", length=len(text))
+
+    if classification is not None:
+        structure = classification.result()
+        job.finish_stage("classify", structure=structure)
+
+    stage = None
+    tokens = 0
+    for event, data in get_evaluator().stream_analysis(text, structure):
+        if event == "stage" and data["stage"] == "classifying":
+            stage = "classify"
+            job.start_stage(stage)
+        elif event == "stage" and data["stage"] == "classified":
+            job.finish_stage("classify", structure=data["structure"])
+        elif event == "stage" and data["stage"] == "summarizing":
+            stage = "summarize"
+            job.start_stage(stage)
+        elif event == "stage" and data["stage"] == "analyzing":
+            if stage == "summarize":
+                job.finish_stage("summarize")
+            stage = "analyze"
+            job.start_stage(stage, structure=data["structure"], tokens=0)
+        elif event == "token":
+            tokens += 1
+            job.update_stage(stage, tokens=tokens)
+        elif event == "result":
+            job.finish_stage("analyze", tokens=tokens)
+            return data
+
+jobs = JobManager(
+    run_analysis_job,
+    workers=Config.JOB_WORKERS,
+    queue_size=Config.JOB_QUEUE_SIZE,
+    retention=Config.JOB_RETENTION,
+)
+
+@main_bp.route('/jobs', methods=['POST'])
+def create_job():
+    """Ставит анализ в очередь и сразу возвращает идентификатор задачи"""
+    payload = {'structure': request.form.get('structure'), 'request_id': g.request_id}
+
+    form_text = request.form.get('text')
+    file = get_request_file()
+    if form_text:
+        payload['text'] = form_text
+    elif file:
+        # Извлечение текста из файла выполняется уже в рабочем потоке; поток запроса
+        # закроется вместе с ним, поэтому файл копируется во временный
+        payload['file'] = (file.filename, spool_upload(file.stream))
+    else:
+        return jsonify({"error": "No text could be extracted from form or file"}), 400
+
+    try:
+        job = jobs.submit(payload)
+    except JobQueueFull as e:
+        if 'file' in payload:
+            payload['file'][1].close()
+        logger.warning(str(e))
+        return jsonify({"error": "Too many queued analyses, try again later"}), 503, {'Retry-After': '30'}
+
+    return jsonify({
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": url_for('main.get_job', job_id=job.id),
+    }), 202
+
+@main_bp.route('/jobs', methods=['GET'])
+def jobs_stats():
+    return jsonify(jobs.stats())
+
+@main_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
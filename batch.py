@@ -0,0 +1,186 @@
+# batch.py
+"""Пакетный анализ каталога сценариев.
+
+Текст извлекается в пуле процессов, анализ идёт через NarrativeEvaluator
+с ограниченным числом одновременных запросов к LLM. Результаты дописываются
+в JSONL по мере готовности, а готовые файлы отмечаются в checkpoint-файле,
+поэтому прерванный запуск продолжается с того же места:
+
+    python batch.py scripts/ --output results.jsonl --structure "Auto-detect"
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config import Config
+from service.extraction import SUPPORTED_EXTENSIONS, extract_uploaded_text
+
+logger = logging.getLogger(__name__)
+
+
+def find_files(root, recursive=True):
+    """Пути поддерживаемых файлов в каталоге, в стабильном порядке"""
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1].lower() in SUPPORTED_EXTENSIONS:
+                paths.append(os.path.join(dirpath, filename))
+        if not recursive:
+            break
+    return paths
+
+
+def file_key(root, path):
+    """Ключ файла для checkpoint: изменённый файл будет проанализирован заново"""
+    stat = os.stat(path)
+    return f"{os.path.relpath(path, root)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def extract_file(path):
+    """Выполняется в процессе пула"""
+    with open(path, 'rb') as f:
+        return extract_uploaded_text(os.path.basename(path), f)
+
+
+class Checkpoint:
+    """Множество ключей обработанных файлов, по одному JSON-объекту на строку"""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        complete = True
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    complete = line.endswith("\n")
+                    try:
+                        self.done.add(json.loads(line)["key"])
+                    except (ValueError, KeyError):
+                        # Строка могла оборваться при аварийном завершении
+                        continue
+        self._file = open(path, 'a', encoding='utf-8')
+        if not complete:
+            self._file.write("\n")
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def mark(self, key):
+        self._file.write(json.dumps({"key": key}, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.done.add(key)
+
+    def close(self):
+        self._file.close()
+
+
+class ResultWriter:
+    def __init__(self, path):
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+async def run_batch(items, evaluator, writer, checkpoint, structure=None, extract_workers=2, llm_concurrency=2):
+    """Анализирует items — пары (key, path); возвращает число успешных и неудачных файлов"""
+    loop = asyncio.get_running_loop()
+    llm_slots = asyncio.Semaphore(llm_concurrency)
+    # Ограничиваем число файлов в работе, чтобы не держать в памяти тексты всего каталога
+    window = asyncio.Semaphore(extract_workers + llm_concurrency)
+    counts = {"done": 0, "failed": 0}
+
+    with ProcessPoolExecutor(max_workers=extract_workers) as pool:
+        async def process(key, path):
+            started = time.time()
+            record = {"file": path, "key": key}
+            try:
+                text = await loop.run_in_executor(pool, extract_file, path)
+                async with llm_slots:
+                    result = await evaluator.aanalyze(text, structure)
+                record.update(status="done", length=len(text), result=result)
+            except Exception as e:
+                logger.error(f"Batch analysis failed for {path}: {str(e)}")
+                record.update(status="failed", error=str(e))
+            finally:
+                window.release()
+
+            record["elapsed"] = round(time.time() - started, 2)
+            writer.write(record)
+            # Неудачные файлы не отмечаются и будут повторены при следующем запуске
+            if record["status"] == "done":
+                checkpoint.mark(key)
+            counts[record["status"]] += 1
+            logger.info(f"{record['status']}: {path} ({record['elapsed']}s)")
+
+        tasks = []
+        for key, path in items:
+            await window.acquire()
+            tasks.append(asyncio.create_task(process(key, path)))
+        await asyncio.gather(*tasks)
+
+    return counts["done"], counts["failed"]
+
+
+async def _run(args, items):
+    from service import get_async_llm, get_evaluator
+
+    async_llm = get_async_llm()
+    evaluator = get_evaluator()
+    writer = ResultWriter(args.output)
+    checkpoint = Checkpoint(args.checkpoint)
+    try:
+        return await run_batch(
+            items,
+            evaluator,
+            writer,
+            checkpoint,
+            structure=args.structure,
+            extract_workers=args.workers,
+            llm_concurrency=args.llm_concurrency,
+        )
+    finally:
+        writer.close()
+        checkpoint.close()
+        if async_llm is not None:
+            await async_llm.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze a directory of scripts (.txt, .pdf, .doc, .docx, .rtf)")
+    parser.add_argument('input', help="Directory with scripts")
+    parser.add_argument('--output', default='results.jsonl', help="JSONL file to append results to")
+    parser.add_argument('--checkpoint', help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument('--structure', help="Narrative structure name; auto-detected when omitted")
+    parser.add_argument('--workers', type=int, default=Config.BATCH_EXTRACT_WORKERS, help="Text extraction processes")
+    parser.add_argument('--llm-concurrency', type=int, default=Config.BATCH_LLM_CONCURRENCY, help="Concurrent LLM analyses")
+    parser.add_argument('--no-recursive', dest='recursive', action='store_false')
+    args = parser.parse_args()
+    args.checkpoint = args.checkpoint or args.output + '.checkpoint'
+
+    logging.basicConfig(level=logging.INFO)
+
+    checkpoint = Checkpoint(args.checkpoint)
+    checkpoint.close()
+    paths = find_files(args.input, args.recursive)
+    items = [(key, path) for key, path in ((file_key(args.input, path), path) for path in paths) if key not in checkpoint]
+    logger.info(f"Found {len(paths)} files, {len(paths) - len(items)} already done, {len(items)} to analyze")
+
+    done, failed = asyncio.run(_run(args, items))
+    logger.info(f"Batch finished: {done} analyzed, {failed} failed")
+
+
+if __name__ == '__main__':
+    main()
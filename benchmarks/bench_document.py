@@ -0,0 +1,74 @@
+# benchmarks/bench_document.py
+"""Память и число объектов: списки строк против Document со смещениями.
+
+Оба варианта начинают с одного и того же результата сегментации и проходят
+путь extractor -> converter -> анализатор narr_mod (поиск ключевых слов в битах).
+
+    python benchmarks/bench_document.py --words 200000
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from narr_mod import mentions  # noqa: E402
+from service.converter import convert_to_format, segment  # noqa: E402
+from service.extractor import extract_document  # noqa: E402
+
+KEYWORDS = ['setting', 'conflict', 'develop', 'stakes', 'resolution', 'end']
+
+
+def make_text(words):
+    with open(os.path.join(ROOT, 'tests', 'test_story.txt'), 'r', encoding='utf-8') as f:
+        sample = f.read()
+    repeat = words // max(len(sample.split()), 1) + 1
+    return '\n'.join([sample] * repeat)
+
+
+def legacy(document):
+    structure = document.to_structure()
+    beats = convert_to_format(structure, "three_act")
+    return structure, beats, [keyword in content.lower() for content in beats.values() for keyword in KEYWORDS]
+
+
+def offsets(document):
+    beats = segment(document, "three_act")
+    return beats, [mentions(content, keyword) for content in beats.values() for keyword in KEYWORDS]
+
+
+def measure(name, func, document):
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func(document)
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    retained_blocks = sys.getallocatedblocks() - blocks
+    print(f"{name:<10} {elapsed:>8.3f} {peak / 2 ** 20:>10.1f} {current / 2 ** 20:>12.1f} {retained_blocks:>10}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory of list-based structures and offset-based Document")
+    parser.add_argument('--words', type=int, default=200000)
+    parser.add_argument('--segmenter', default=None, help="Segmenter backend, Config.SEGMENTER by default")
+    args = parser.parse_args()
+
+    text = make_text(args.words)
+    document = extract_document(text, backend=args.segmenter)
+    print(f"{len(text.split())} words, {document.sentence_count} sentences, {document.entity_count} entities")
+    print(f"{'variant':<10} {'time, s':>8} {'peak, MB':>10} {'retained, MB':>12} {'blocks':>10}")
+    measure("lists", legacy, document)
+    measure("offsets", offsets, document)
+
+
+if __name__ == '__main__':
+    main()
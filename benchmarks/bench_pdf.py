@@ -0,0 +1,97 @@
+# benchmarks/bench_pdf.py
+"""Извлечение текста из PDF: последовательно с полной разметкой, быстрый режим,
+пул процессов и время до первой страницы.
+
+Без --pdf используется синтетический сценарий из --pages страниц.
+
+    python benchmarks/bench_pdf.py --pages 150 --workers 4
+    python benchmarks/bench_pdf.py --pdf script.pdf
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from service.extraction import iter_pdf_pages  # noqa: E402
+
+LINES_PER_PAGE = 50
+
+
+def synthetic_pdf(pages):
+    """PDF сценария: по LINES_PER_PAGE строк моноширинного текста на странице"""
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>",
+    }
+    kids = []
+    for page in range(pages):
+        page_id, content_id = 4 + 2 * page, 5 + 2 * page
+        kids.append(f"{page_id} 0 R")
+        lines = " ".join(
+            f"(INT. ROOM {page}-{line} - NIGHT. The hero waits while the stakes rise.) Tj T*"
+            for line in range(LINES_PER_PAGE)
+        )
+        stream = f"BT /F1 10 Tf 12 TL 72 740 Td {lines} ET"
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode()
+        objects[content_id] = f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode()
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    positions = {}
+    for number in sorted(objects):
+        positions[number] = len(out)
+        out += f"{number} 0 obj\n".encode() + objects[number] + b"\nendobj\n"
+    xref = len(out)
+    size = max(objects) + 1
+    out += f"xref\n0 {size}\n0000000000 65535 f \n".encode()
+    for number in range(1, size):
+        out += f"{positions[number]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def measure(data, **options):
+    started = time.perf_counter()
+    first = None
+    chars = 0
+    for text in iter_pdf_pages(data, **options):
+        if first is None:
+            first = time.perf_counter() - started
+        chars += len(text)
+    return time.perf_counter() - started, first, chars
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF text extraction")
+    parser.add_argument('--pdf', help="PDF file to extract instead of a synthetic one")
+    parser.add_argument('--pages', type=int, default=150)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if args.pdf:
+        with open(args.pdf, 'rb') as f:
+            data = f.read()
+    else:
+        data = synthetic_pdf(args.pages)
+
+    modes = [
+        ("serial, full layout", dict(workers=1, fast=False)),
+        ("serial, fast", dict(workers=1, fast=True)),
+        (f"pool x{args.workers}, full layout", dict(workers=args.workers, fast=False)),
+        (f"pool x{args.workers}, fast", dict(workers=args.workers, fast=True)),
+    ]
+    print(f"{'mode':<26} {'total s':>8} {'first page s':>13} {'chars':>9}")
+    for name, options in modes:
+        total, first, chars = measure(data, max_pages=0, max_chars=0, **options)
+        print(f"{name:<26} {total:>8.2f} {first:>13.3f} {chars:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/bench_segmenters.py
+"""Сравнение бэкендов сегментации: время загрузки, скорость и пиковая память.
+
+Каждый бэкенд запускается в отдельном процессе, чтобы загрузка модели и
+пиковый RSS не влияли на соседние замеры.
+
+    python benchmarks/bench_segmenters.py --repeat 20 --backends spacy rule nltk
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE = os.path.join(ROOT, 'tests', 'test_story.txt')
+
+
+def run_backend(backend, repeat, batch_size):
+    sys.path.insert(0, ROOT)
+    from service.segmenters import get_segmenter
+
+    with open(SAMPLE, 'r', encoding='utf-8') as f:
+        text = f.read()
+    texts = [text] * repeat
+
+    segmenter = get_segmenter(backend)
+    started = time.perf_counter()
+    segmenter.model
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    sentences = sum(document.sentence_count for document in segmenter.segment_many(texts, batch_size=batch_size))
+    elapsed = time.perf_counter() - started
+
+    # ru_maxrss в Linux возвращается в килобайтах
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({
+        "backend": backend,
+        "load_seconds": round(load_seconds, 3),
+        "sentences": sentences,
+        "sentences_per_sec": round(sentences / elapsed, 1) if elapsed else None,
+        "peak_rss_mb": round(peak_rss, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sentence segmenter backends")
+    parser.add_argument('--backends', nargs='+', default=['spacy', 'rule', 'nltk'])
+    parser.add_argument('--repeat', type=int, default=20, help="How many copies of the sample text to segment")
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_backend(args.worker, args.repeat, args.batch_size)
+        return
+
+    print(f"{'backend':<8} {'load, s':>8} {'sent/s':>10} {'peak RSS, MB':>13}")
+    for backend in args.backends:
+        proc = subprocess.run(
+            [sys.executable, __file__, '--worker', backend, '--repeat', str(args.repeat), '--batch-size', str(args.batch_size)],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"
+            print(f"{backend:<8} error: {error}")
+            continue
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"{backend:<8} {result['load_seconds']:>8} {result['sentences_per_sec']:>10} {result['peak_rss_mb']:>13}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/bench_startup.py
+"""Время холодного старта: -X importtime для точек входа и время до готовности
+веб-приложения (первый ответ на GET /) и бота (собранное Application).
+
+Каждый замер — в новом процессе; из --repeat запусков берётся минимум.
+С --json результаты дописываются строкой JSONL, чтобы следить за ними между версиями.
+
+    python benchmarks/bench_startup.py --repeat 5 --top 8
+    python benchmarks/bench_startup.py --json startup.jsonl
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ["app.routes", "telegram_bot", "service.extraction", "service", "batch"]
+
+# Код, выполняемый в отдельном процессе; печатает секунды от старта до готовности
+READY = {
+    "web": (
+        "import time; started = time.perf_counter()\n"
+        "from app import create_app\n"
+        "client = create_app().test_client()\n"
+        "assert client.get('/').status_code == 200\n"
+        "print(time.perf_counter() - started)\n"
+    ),
+    "bot": (
+        "import time; started = time.perf_counter()\n"
+        "import telegram_bot\n"
+        "telegram_bot.build_application('123456:benchmark')\n"
+        "print(time.perf_counter() - started)\n"
+    ),
+}
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def python(code, *options):
+    result = subprocess.run(
+        [sys.executable, *options, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result
+
+
+def import_times(module):
+    """Суммарное время импорта модуля и его зависимостей, микросекунды: {имя: (собственное, суммарное, глубина)}"""
+    stderr = python(f"import {module}", "-X", "importtime").stderr
+    times = {}
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            times[name] = (int(own), int(cumulative), len(indent) // 2)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold start time")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=5, help="Heaviest dependencies to show per module")
+    parser.add_argument('--json', help="Append results to this JSONL file")
+    args = parser.parse_args()
+
+    record = {"time": time.time(), "imports_ms": {}, "ready_ms": {}}
+
+    print(f"{'module':<22} {'import ms':>10}  heaviest dependencies (cumulative ms)")
+    for module in MODULES:
+        runs = [import_times(module) for _ in range(args.repeat)]
+        best = min(runs, key=lambda times: times[module][1])
+        total = best[module][1] / 1000
+        heaviest = sorted(
+            ((name, cumulative) for name, (_, cumulative, depth) in best.items() if name != module and depth <= 1),
+            key=lambda item: item[1],
+            reverse=True,
+        )[:args.top]
+        record["imports_ms"][module] = round(total, 1)
+        print(f"{module:<22} {total:>10.1f}  " + ", ".join(f"{name} {value / 1000:.0f}" for name, value in heaviest))
+
+    print()
+    print(f"{'entry point':<22} {'ready ms':>10}")
+    for name, code in READY.items():
+        ready = min(float(python(code).stdout.strip().splitlines()[-1]) for _ in range(args.repeat)) * 1000
+        record["ready_ms"][name] = round(ready, 1)
+        print(f"{name:<22} {ready:>10.1f}")
+
+    if args.json:
+        with open(args.json, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# benchmarks/bench_visualize.py
+"""Время рендера и размер HTML visualize() для всех структур narr_mod.
+
+    python benchmarks/bench_visualize.py --iterations 2000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.constants import STRUCTURE_MAPPING  # noqa: E402
+from narr_mod import get_structure  # noqa: E402
+from service.converter import segment  # noqa: E402
+from service.document import Document  # noqa: E402
+
+SENTENCES = [f"Sentence {i}: the setting shifts as the conflict starts to develop and the stakes rise." for i in range(200)]
+
+
+def sample_analysis(key, structure):
+    segmentation = segment(Document.from_sentences(SENTENCES), key)
+    if hasattr(structure, '_perform_initial_analysis'):
+        result = structure._perform_initial_analysis(segmentation)
+        result["double_check"] = "The classification is confirmed."
+        return result
+    return structure.analyze(segmentation)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark narr_mod visualize() rendering")
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'structure':<24} {'us/render':>10} {'bytes':>8}")
+    total_time = total_bytes = 0
+    for key in STRUCTURE_MAPPING.values():
+        structure = get_structure(key)
+        analysis = sample_analysis(key, structure)
+        html = structure.visualize(analysis)
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            structure.visualize(analysis)
+        per_render = (time.perf_counter() - started) / args.iterations * 1e6
+        size = len(html.encode('utf-8'))
+        total_time += per_render
+        total_bytes += size
+        print(f"{key:<24} {per_render:>10.1f} {size:>8}")
+    print(f"{'total':<24} {total_time:>10.1f} {total_bytes:>8}")
+
+
+if __name__ == '__main__':
+    main()
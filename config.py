@@ -2,4 +2,97 @@ import os
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'you-will-never-guess'
-    UPLOAD_FOLDER = 'uploads/'
\ No newline at end of file
+    UPLOAD_FOLDER = 'uploads/'
+
+    # Загрузки: предельный размер тела запроса и текстовых полей формы, порог,
+    # после которого загруженный файл переносится из памяти во временный файл на диске
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 50 * 1024 * 1024))
+    MAX_FORM_MEMORY_SIZE = int(os.environ.get('MAX_FORM_MEMORY_SIZE', 10 * 1024 * 1024))
+    UPLOAD_SPOOL_BYTES = int(os.environ.get('UPLOAD_SPOOL_BYTES', 1024 * 1024))
+
+    # LLM: бэкенд из service.provider.BACKENDS и модель
+    LLM_BACKEND = os.environ.get('LLM_BACKEND', 'ollama')
+    LLM_MODEL = os.environ.get('LLM_MODEL', 'llama3.2')
+    LLM_MAX_CONNECTIONS = int(os.environ.get('LLM_MAX_CONNECTIONS', 8))
+    LLM_TIMEOUT = float(os.environ.get('LLM_TIMEOUT', 600))
+
+    # Бюджет токенов: размер контекста модели, скорость обработки промпта и генерации
+    LLM_CONTEXT_TOKENS = int(os.environ.get('LLM_CONTEXT_TOKENS', 2048))
+    LLM_PROMPT_TOKENS_PER_SEC = float(os.environ.get('LLM_PROMPT_TOKENS_PER_SEC', 500))
+    LLM_TOKENS_PER_SEC = float(os.environ.get('LLM_TOKENS_PER_SEC', 20))
+    # Что делать с текстом, который не помещается в контекст: truncate, sample или chunk
+    LLM_FIT_STRATEGY = os.environ.get('LLM_FIT_STRATEGY', 'chunk')
+
+    # Спекулятивный анализ: разбор по наиболее вероятным структурам параллельно с классификацией
+    SPECULATIVE_ANALYSIS = os.environ.get('SPECULATIVE_ANALYSIS', '1') == '1'
+    SPECULATIVE_CANDIDATES = int(os.environ.get('SPECULATIVE_CANDIDATES', 1))
+
+    # Разбиение текста на предложения: spacy, rule или nltk
+    SEGMENTER = os.environ.get('SEGMENTER', 'spacy')
+    SEGMENTER_BATCH_SIZE = int(os.environ.get('SEGMENTER_BATCH_SIZE', 16))
+    # Наибольший кусок текста, который spaCy разбирает за раз; длинные сценарии режутся по абзацам
+    SEGMENTER_MAX_CHARS = int(os.environ.get('SEGMENTER_MAX_CHARS', 100000))
+
+    # Локальный классификатор структуры перед LLM
+    FAST_CLASSIFIER_ENABLED = os.environ.get('FAST_CLASSIFIER_ENABLED', '1') == '1'
+    FAST_CLASSIFIER_PATH = os.environ.get('FAST_CLASSIFIER_PATH', '.cache/fast_classifier.json')
+    FAST_CLASSIFIER_THRESHOLD = float(os.environ.get('FAST_CLASSIFIER_THRESHOLD', 0.85))
+    FAST_CLASSIFIER_MIN_SAMPLES = int(os.environ.get('FAST_CLASSIFIER_MIN_SAMPLES', 20))
+
+    # Map-reduce анализ длинных сценариев (стратегия chunk)
+    CHUNK_MAX_CHARS = int(os.environ.get('CHUNK_MAX_CHARS', 6000))
+    CHUNK_OVERLAP_CHARS = int(os.environ.get('CHUNK_OVERLAP_CHARS', 500))
+    CHUNK_CONCURRENCY = int(os.environ.get('CHUNK_CONCURRENCY', 4))
+
+    # Фоновые задачи анализа (/jobs)
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+    JOB_QUEUE_SIZE = int(os.environ.get('JOB_QUEUE_SIZE', 32))
+    JOB_RETENTION = int(os.environ.get('JOB_RETENTION', 1000))
+
+    # Пакетный анализ каталога (batch.py)
+    BATCH_EXTRACT_WORKERS = int(os.environ.get('BATCH_EXTRACT_WORKERS', os.cpu_count() or 2))
+    BATCH_LLM_CONCURRENCY = int(os.environ.get('BATCH_LLM_CONCURRENCY', 2))
+
+    # Сжатие JSON-ответов /analyze: минимальный размер тела и степень сжатия
+    RESPONSE_COMPRESS_MIN_BYTES = int(os.environ.get('RESPONSE_COMPRESS_MIN_BYTES', 1024))
+    RESPONSE_GZIP_LEVEL = int(os.environ.get('RESPONSE_GZIP_LEVEL', 6))
+    RESPONSE_BROTLI_QUALITY = int(os.environ.get('RESPONSE_BROTLI_QUALITY', 5))
+
+    # Извлечение текста из PDF: процессы, страниц на задачу, быстрый режим разметки
+    # и ограничения объёма (0 — без ограничения)
+    PDF_WORKERS = int(os.environ.get('PDF_WORKERS', min(os.cpu_count() or 1, 4)))
+    PDF_PAGES_PER_TASK = int(os.environ.get('PDF_PAGES_PER_TASK', 8))
+    PDF_FAST_MODE = os.environ.get('PDF_FAST_MODE', '0') == '1'
+    PDF_MAX_PAGES = int(os.environ.get('PDF_MAX_PAGES', 0))
+    PDF_MAX_CHARS = int(os.environ.get('PDF_MAX_CHARS', 0))
+    # Внешняя утилита для .doc (antiword, textutil): одновременные процессы и таймаут, секунды
+    DOC_HELPER_CONCURRENCY = int(os.environ.get('DOC_HELPER_CONCURRENCY', 2))
+    DOC_HELPER_TIMEOUT = float(os.environ.get('DOC_HELPER_TIMEOUT', 30))
+    # Классификация структуры по первым страницам, пока остальные ещё извлекаются (/jobs)
+    PDF_EARLY_CLASSIFY = os.environ.get('PDF_EARLY_CLASSIFY', '1') == '1'
+
+    # Telegram: минимальный интервал между правками потокового ответа, секунды
+    TELEGRAM_EDIT_INTERVAL = float(os.environ.get('TELEGRAM_EDIT_INTERVAL', 1.5))
+    # Предельный размер документа; Bot API отдаёт ботам файлы не больше 20 МБ
+    TELEGRAM_MAX_FILE_BYTES = int(os.environ.get('TELEGRAM_MAX_FILE_BYTES', 20 * 1024 * 1024))
+    # Telegram: параллельная обработка обновлений, потоки для блокирующей работы,
+    # одновременные анализы и ограничения очереди (всего и на одного пользователя)
+    TELEGRAM_CONCURRENT_UPDATES = int(os.environ.get('TELEGRAM_CONCURRENT_UPDATES', 64))
+    TELEGRAM_WORKERS = int(os.environ.get('TELEGRAM_WORKERS', 4))
+    TELEGRAM_MAX_RUNNING = int(os.environ.get('TELEGRAM_MAX_RUNNING', 4))
+    TELEGRAM_MAX_QUEUED = int(os.environ.get('TELEGRAM_MAX_QUEUED', 32))
+    TELEGRAM_MAX_PER_USER = int(os.environ.get('TELEGRAM_MAX_PER_USER', 3))
+    # Порт /metrics отдельно запущенного бота; 0 — не поднимать (в run.py метрики отдаёт Flask)
+    TELEGRAM_METRICS_PORT = int(os.environ.get('TELEGRAM_METRICS_PORT', 0))
+
+    # Трассы запросов в формате JSON Lines; пустой путь выключает трассировку
+    TRACE_FILE = os.environ.get('TRACE_FILE', '')
+    # Заголовок с идентификатором запроса: принимается от клиента и возвращается в ответе
+    REQUEST_ID_HEADER = os.environ.get('REQUEST_ID_HEADER', 'X-Request-ID')
+
+    # Кэш ответов LLM (память + диск)
+    LLM_CACHE_ENABLED = os.environ.get('LLM_CACHE_ENABLED', '1') == '1'
+    LLM_CACHE_DIR = os.environ.get('LLM_CACHE_DIR', '.cache/llm')
+    LLM_CACHE_MEMORY_ITEMS = int(os.environ.get('LLM_CACHE_MEMORY_ITEMS', 256))
+    LLM_CACHE_DISK_MAX_BYTES = int(os.environ.get('LLM_CACHE_DISK_MAX_BYTES', 512 * 1024 * 1024))
+    LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL', 7 * 24 * 3600))
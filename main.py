@@ -1,20 +1,16 @@
 # app.py
 
 from flask import Flask, render_template, request, jsonify
-from service import initialize_llm, NarrativeEvaluator
+from service import get_evaluator
 
 app = Flask(__name__)
 
-# Инициализация LLM и NarrativeEvaluator
-llm = initialize_llm()
-evaluator = NarrativeEvaluator(llm)
-
 @app.route('/', methods=['GET', 'POST'])
 def index():
     if request.method == 'POST':
         data = request.json
         text = data['text']
-        result = evaluator.analyze(text)
+        result = get_evaluator().analyze(text)
         return jsonify(result)
     return render_template('index.html')
 
@@ -1,11 +1,22 @@
 # narr_mod/__init__.py
 
+import hashlib
+import html
+import os
+import pkgutil
+import re
 from abc import ABC, abstractmethod
+from functools import lru_cache
 from importlib import import_module
 
+from jinja2 import Environment, FileSystemLoader
 
 
 class NarrativeStructure(ABC):
+    # True, если analyze() обращается к модели для перепроверки; учитывается в оценке /analyze/estimate.
+    # У ThreeAct и FourAct _call_llm пока не подключён к модели
+    calls_llm_double_check = False
+
     @abstractmethod
     def name(self) -> str:
         """Возвращает название нарративной структуры"""
@@ -53,10 +64,159 @@ class NarrativeStructure(ABC):
         Remember, the goal is accuracy, not sticking to your initial assessment. It's okay to change your classification if the evidence supports it.
         """
 
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+STYLESHEET_PATH = os.path.join(PACKAGE_DIR, 'static', 'narr_mod.css')
+
+# Шаблоны компилируются при первом обращении и дальше берутся из кэша окружения;
+# проверка изменений файлов отключена
+_templates = Environment(
+    loader=FileSystemLoader(os.path.join(PACKAGE_DIR, 'templates')),
+    autoescape=True,
+    auto_reload=False,
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
+
+
+# Маркер места подстановки значения в заранее отрендеренном шаблоне
+_SLOT = re.compile('\x00(\\d+)\x00')
+
+
+@lru_cache(maxsize=None)
+def _compile(template_name, fields):
+    """Шаблон, отрендеренный один раз с маркерами вместо значений fields.
+
+    Возвращает куски готового HTML и номера полей между ними, поэтому
+    рендер сводится к склейке строк без вызова Jinja.
+    """
+    markers = {field: f"\x00{i}\x00" for i, field in enumerate(fields)}
+    parts = _SLOT.split(_templates.get_template(template_name).render(**markers))
+    return tuple(parts[0::2]), tuple(int(index) for index in parts[1::2])
+
+
+def render_visualization(template_name, **context) -> str:
+    """HTML визуализации по шаблону из narr_mod/templates.
+
+    Значения context подставляются как текст (с экранированием), поэтому
+    шаблон не должен ветвиться по ним. Стили лежат в отдельном файле
+    (stylesheet()), а не в каждом ответе.
+    """
+    fields = tuple(context)
+    chunks, slots = _compile(template_name, fields)
+    if not slots:
+        return chunks[0]
+    values = [html.escape(str(context[field])) for field in fields]
+    out = [chunks[0]]
+    for slot, chunk in zip(slots, chunks[1:]):
+        out.append(values[slot])
+        out.append(chunk)
+    return ''.join(out)
+
+
+@lru_cache(maxsize=1)
+def stylesheet():
+    """Содержимое narr_mod.css и отпечаток для имени файла, меняющийся вместе с содержимым"""
+    with open(STYLESHEET_PATH, 'rb') as f:
+        css = f.read()
+    return css, hashlib.sha256(css).hexdigest()[:12]
+
+
+def mentions(content, word) -> bool:
+    """Есть ли слово в тексте бита без учёта регистра.
+
+    content — строка или участок Document; для участка поиск идёт без копирования текста.
+    """
+    if hasattr(content, 'contains'):
+        return content.contains(word)
+    return word.lower() in content.lower()
+
+
+def beat_texts(formatted_structure) -> dict:
+    """Тексты битов в виде обычных строк"""
+    return {beat: str(content) for beat, content in formatted_structure.items()}
+
+
+class StructureEntry:
+    """Зарегистрированная структура: общий экземпляр, его промпт и названия битов"""
+
+    __slots__ = ("key", "cls", "instance", "name", "prompt", "beats")
+
+    def __init__(self, key, cls):
+        self.key = key
+        self.cls = cls
+        self.instance = cls()
+        self.name = self.instance.name()
+        self.prompt = self.instance.get_prompt()
+        self.beats = ()
+
+
+class StructureRegistry:
+    """Реестр структур narr_mod: модули импортируются один раз, поиск по ключу — словарь"""
+
+    def __init__(self):
+        self._entries = {}
+
+    def discover(self):
+        """Регистрирует подклассы NarrativeStructure из всех модулей пакета.
+
+        Ключ — имя модуля. Модуль, который только переэкспортирует класс из
+        другого модуля (monomyth, hero_journey), становится синонимом того же экземпляра.
+        """
+        aliases = []
+        for module_info in pkgutil.iter_modules(__path__):
+            module = import_module(f"{__name__}.{module_info.name}")
+            for value in vars(module).values():
+                if not (isinstance(value, type) and issubclass(value, NarrativeStructure)) or value is NarrativeStructure:
+                    continue
+                if value.__module__ == module.__name__:
+                    self.register(module_info.name, value)
+                else:
+                    aliases.append((module_info.name, value))
+
+        for key, cls in aliases:
+            entry = next((entry for entry in self._entries.values() if entry.cls is cls), None)
+            if entry is not None and key not in self._entries:
+                self._entries[key] = entry
+        return self
+
+    def register(self, key, cls) -> StructureEntry:
+        entry = StructureEntry(key, cls)
+        self._entries[key] = entry
+        return entry
+
+    def get(self, key) -> StructureEntry:
+        try:
+            return self._entries[key]
+        except KeyError:
+            raise ValueError(f"Unknown structure name: {key}")
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def keys(self):
+        return self._entries.keys()
+
+    def validate(self, mapping, beat_specs):
+        """Проверяет, что у каждой структуры из mapping есть класс и разбиение на биты"""
+        for name, key in mapping.items():
+            if key not in self._entries:
+                raise ValueError(f"Structure {name!r} maps to {key!r}, which has no NarrativeStructure class")
+            if key not in beat_specs:
+                raise ValueError(f"Structure {name!r} maps to {key!r}, which has no beat spec")
+            self._entries[key].beats = tuple(beat for beat, _ in beat_specs[key])
+
+
+registry = StructureRegistry()
+
+
+def get_structure(structure_name) -> NarrativeStructure:
+    """Общий экземпляр структуры; экземпляры не хранят состояния между вызовами"""
+    return registry.get(structure_name).instance
+
+
 def get_narrative_structure(structure_name):
-    try:
-        module = import_module(f"narr_mod.{structure_name.lower()}")
-        class_name = ''.join(word.capitalize() for word in structure_name.split('_'))
-        return getattr(module, class_name)
-    except (ImportError, AttributeError):
-        raise ValueError(f"Unknown structure name: {structure_name}")
+    return registry.get(structure_name).cls
+
+
+# Подмодули импортируют NarrativeStructure из этого пакета, поэтому поиск идёт после его определения
+registry.discover()
@@ -1,6 +1,6 @@
 # narr_mod/campbell_monomyth.py
 
-from narr_mod import NarrativeStructure
+from narr_mod import NarrativeStructure, beat_texts, render_visualization
 
 class CampbellMonomyth(NarrativeStructure):
     def name(self) -> str:
@@ -9,7 +9,7 @@ class CampbellMonomyth(NarrativeStructure):
     def analyze(self, formatted_structure: dict) -> dict:
         # Здесь можно добавить более сложную логику анализа
         # Пока что просто вернем входные данные
-        return formatted_structure
+        return beat_texts(formatted_structure)
 
     def get_prompt(self) -> str:
         return """
@@ -53,63 +53,4 @@ class CampbellMonomyth(NarrativeStructure):
         """
 
     def visualize(self, analysis_result: dict) -> str:
-        html = """
-        <h1>Мономиф (Джозеф Кэмпбелл)</h1>
-        <div id='monomyth-container'>
-            <div id='monomyth-circle'></div>
-        """
-        
-        stages = [
-            "Обычный мир",
-            "Зов к приключениям",
-            "Отказ от зова",
-            "Встреча с наставником",
-            "Преодоление первого порога",
-            "Испытания, союзники, враги",
-            "Приближение к сокровенному убежищу",
-            "Решающее испытание",
-            "Награда",
-            "Путь назад",
-            "Воскрешение",
-            "Возвращение с эликсиром"
-        ]
-        
-        for i, stage_name in enumerate(stages):
-            html += f"<div class='stage' style='--i:{i};'>{stage_name}</div>"
-        
-        html += "</div>"
-        
-        html += """
-        <style>
-            #monomyth-container {
-                width: 400px;
-                height: 400px;
-                position: relative;
-                margin: 50px auto;
-            }
-            #monomyth-circle {
-                width: 100%;
-                height: 100%;
-                border-radius: 50%;
-                border: 2px solid #333;
-                position: absolute;
-            }
-            .stage {
-                position: absolute;
-                width: 100px;
-                text-align: center;
-                left: 50%;
-                top: 50%;
-                font-size: 12px;
-                line-height: 1.2;
-                transform-origin: 0 300px;
-                transform: rotate(calc(30deg * var(--i))) translateY(-300px) rotate(calc(-30deg * var(--i)));
-            }
-            .stage:hover {
-                font-weight: bold;
-                z-index: 10;
-            }
-        </style>
-        """
-        
-        return html
+        return render_visualization("campbell_monomyth.html")
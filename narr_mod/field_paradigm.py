@@ -1,6 +1,6 @@
 # narr_mod/field_paradigm.py
 
-from narr_mod import NarrativeStructure
+from narr_mod import NarrativeStructure, beat_texts, render_visualization
 
 class FieldParadigm(NarrativeStructure):
     def name(self) -> str:
@@ -9,7 +9,7 @@ class FieldParadigm(NarrativeStructure):
     def analyze(self, formatted_structure: dict) -> dict:
         # Здесь можно добавить более сложную логику анализа
         # Пока что просто вернем входные данные
-        return formatted_structure
+        return beat_texts(formatted_structure)
 
     def get_prompt(self) -> str:
         return """
@@ -46,81 +46,4 @@ class FieldParadigm(NarrativeStructure):
         """
 
     def visualize(self, analysis_result: dict) -> str:
-        html = "<h1>Парадигма (Сид Филд)</h1>"
-        html += "<div class='field-paradigm'>"
-        
-        elements = [
-            ("Провоцирующее событие", "inciting-incident"),
-            ("Сюжетный поворот 1", "plot-point-1"),
-            ("Точка фокусировки 1", "pinch-1"),
-            ("Мидпоинт", "midpoint"),
-            ("Точка фокусировки 2", "pinch-2"),
-            ("Сюжетный поворот 2", "plot-point-2"),
-            ("Кульминация", "climax"),
-            ("Развязка", "resolution")
-        ]
-        
-        html += "<div class='timeline'>"
-        for name, class_name in elements:
-            html += f"<div class='element {class_name}'>"
-            html += f"<div class='element-name'>{name}</div>"
-            html += "</div>"
-        html += "</div>"
-        
-        html += "<div class='acts'>"
-        html += "<div class='act act-1'>Акт 1<br>Завязка</div>"
-        html += "<div class='act act-2'>Акт 2 - Акт 3<br>Противостояние</div>"
-        html += "<div class='act act-4'>Акт 4<br>Развязка</div>"
-        html += "</div>"
-        
-        html += "</div>"
-        
-        html += "<style>"
-        html += """
-            .field-paradigm {
-                width: 100%;
-                max-width: 800px;
-                margin: 0 auto;
-                padding: 20px;
-                font-family: Arial, sans-serif;
-            }
-            .timeline {
-                display: flex;
-                justify-content: space-between;
-                align-items: flex-end;
-                height: 200px;
-                margin-bottom: 20px;
-            }
-            .element {
-                width: 10%;
-                text-align: center;
-            }
-            .element-name {
-                transform: rotate(-45deg);
-                white-space: nowrap;
-                font-size: 12px;
-            }
-            .inciting-incident, .resolution { height: 30%; }
-            .plot-point-1, .plot-point-2 { height: 80%; }
-            .pinch-1, .pinch-2 { height: 50%; }
-            .midpoint { height: 60%; }
-            .climax { height: 100%; }
-            .acts {
-                display: flex;
-                justify-content: space-between;
-            }
-            .act {
-                width: 30%;
-                text-align: center;
-                padding: 10px;
-                background-color: #f0f0f0;
-                border-radius: 5px;
-            }
-            .act-2 {
-                width: 40%;
-            }
-        """
-        html += "</style>"
-        
-        return html
-
+        return render_visualization("field_paradigm.html")
@@ -1,7 +1,7 @@
 # narr_mod/four_act.py
 
 from __future__ import annotations
-from narr_mod import NarrativeStructure
+from narr_mod import NarrativeStructure, mentions, render_visualization
 
 class FourAct(NarrativeStructure):
     def name(self) -> str:
@@ -81,7 +81,7 @@ class FourAct(NarrativeStructure):
         elements_to_check = ['setting', 'main characters', 'initial conflict']
 
         for element in elements_to_check:
-            if element.lower() in act1_content.lower():
+            if mentions(act1_content, element):
                 analysis += f"- {element.capitalize()} is present.\n"
             else:
                 analysis += f"- {element.capitalize()} might need more emphasis.\n"
@@ -92,12 +92,12 @@ class FourAct(NarrativeStructure):
         # Анализ второго акта (Complication)
         analysis = "Act 2 (Complication) Analysis:\n"
         
-        if 'challenge' in act2_content.lower() or 'obstacle' in act2_content.lower():
+        if mentions(act2_content, 'challenge') or mentions(act2_content, 'obstacle'):
             analysis += "- New challenges or obstacles are introduced.\n"
         else:
             analysis += "- The act might benefit from clearer challenges or obstacles.\n"
         
-        if 'stakes' in act2_content.lower():
+        if mentions(act2_content, 'stakes'):
             analysis += "- The stakes appear to be raised.\n"
         else:
             analysis += "- Consider emphasizing how the stakes are raised.\n"
@@ -108,12 +108,12 @@ class FourAct(NarrativeStructure):
         # Анализ третьего акта (Development)
         analysis = "Act 3 (Development) Analysis:\n"
         
-        if 'conflict' in act3_content.lower() and 'develop' in act3_content.lower():
+        if mentions(act3_content, 'conflict') and mentions(act3_content, 'develop'):
             analysis += "- The conflict seems to be developing.\n"
         else:
             analysis += "- The conflict development could be more pronounced.\n"
         
-        if 'climax' in act3_content.lower():
+        if mentions(act3_content, 'climax'):
             analysis += "- The act appears to be building towards a climax.\n"
         else:
             analysis += "- Consider making the build-up to the climax more evident.\n"
@@ -124,12 +124,12 @@ class FourAct(NarrativeStructure):
         # Анализ четвертого акта (Resolution)
         analysis = "Act 4 (Resolution) Analysis:\n"
         
-        if 'resolve' in act4_content.lower() or 'resolution' in act4_content.lower():
+        if mentions(act4_content, 'resolve') or mentions(act4_content, 'resolution'):
             analysis += "- The main conflict appears to be resolved.\n"
         else:
             analysis += "- The resolution of the main conflict could be clearer.\n"
         
-        if 'conclusion' in act4_content.lower() or 'end' in act4_content.lower():
+        if mentions(act4_content, 'conclusion') or mentions(act4_content, 'end'):
             analysis += "- The story seems to reach a conclusion.\n"
         else:
             analysis += "- Consider providing a more definitive conclusion.\n"
@@ -162,28 +162,11 @@ class FourAct(NarrativeStructure):
         """
 
     def visualize(self, analysis_result: dict) -> str:
-        return f"""
-        <div class="four-act-structure">
-            <h2>Four-Act Structure Analysis</h2>
-            <div class="act">
-                <h3>Act 1: Setup</h3>
-                <p>{analysis_result.get('Act1', 'No analysis available')}</p>
-            </div>
-            <div class="act">
-                <h3>Act 2: Complication</h3>
-                <p>{analysis_result.get('Act2', 'No analysis available')}</p>
-            </div>
-            <div class="act">
-                <h3>Act 3: Development</h3>
-                <p>{analysis_result.get('Act3', 'No analysis available')}</p>
-            </div>
-            <div class="act">
-                <h3>Act 4: Resolution</h3>
-                <p>{analysis_result.get('Act4', 'No analysis available')}</p>
-            </div>
-            <div class="double-check">
-                <h3>Double Check Analysis</h3>
-                <p>{analysis_result.get('double_check', 'No double check analysis available')}</p>
-            </div>
-        </div>
-        """
+        return render_visualization(
+            "four_act.html",
+            act1=analysis_result.get('Act1', 'No analysis available'),
+            act2=analysis_result.get('Act2', 'No analysis available'),
+            act3=analysis_result.get('Act3', 'No analysis available'),
+            act4=analysis_result.get('Act4', 'No analysis available'),
+            double_check=analysis_result.get('double_check', 'No double check analysis available'),
+        )
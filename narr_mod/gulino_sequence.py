@@ -1,6 +1,6 @@
 # narr_mod/gulino_sequence.py
 
-from narr_mod import NarrativeStructure
+from narr_mod import NarrativeStructure, beat_texts, render_visualization
 
 class GulinoSequence(NarrativeStructure):
     def name(self) -> str:
@@ -9,7 +9,7 @@ class GulinoSequence(NarrativeStructure):
     def analyze(self, formatted_structure: dict) -> dict:
         # Здесь можно добавить более сложную логику анализа
         # Пока что просто вернем входные данные
-        return formatted_structure
+        return beat_texts(formatted_structure)
 
     def get_prompt(self) -> str:
         return """
@@ -59,100 +59,4 @@ class GulinoSequence(NarrativeStructure):
         """
 
     def visualize(self, analysis_result: dict) -> str:
-        html = "<h1>Последовательный подход (Пол Гулино)</h1>"
-        html += "<div class='gulino-approach'>"
-        
-        elements = [
-            ("Введение", "introduction"),
-            ("Указание цели", "stating-goal"),
-            ("Загадка", "mystery"),
-            ("Усиление любопытства", "heighten-curiosity"),
-            ("Реакция на событие", "event-reaction"),
-            ("Возникновение проблемы", "problem-emergence"),
-            ("Первая попытка", "first-attempt"),
-            ("Вероятность решения", "solution-probability"),
-            ("Новые герои и подсюжеты", "new-characters-subplots"),
-            ("Переосмысление напряжения", "tension-rethinking"),
-            ("Повышенные ставки", "raised-stakes"),
-            ("Ускоренный темп", "accelerated-pace"),
-            ("Момент «все потеряно»", "all-is-lost"),
-            ("Финальное решение", "final-resolution")
-        ]
-        
-        html += "<div class='timeline'>"
-        for i, (name, class_name) in enumerate(elements):
-            html += f"<div class='element {class_name}'>"
-            html += f"<div class='element-number'>{i+1}</div>"
-            html += f"<div class='element-name'>{name}</div>"
-            html += "</div>"
-        html += "</div>"
-        
-        html += "<div class='acts'>"
-        html += "<div class='act act-1'>Акт 1<br>Начало</div>"
-        html += "<div class='act act-2-3'>Акт 2 - Акт 3<br>Середина</div>"
-        html += "<div class='act act-4'>Акт 4<br>Конец</div>"
-        html += "</div>"
-        
-        html += "</div>"
-        
-        html += "<style>"
-        html += """
-            .gulino-approach {
-                width: 100%;
-                max-width: 1000px;
-                margin: 0 auto;
-                padding: 20px;
-                font-family: Arial, sans-serif;
-            }
-            .timeline {
-                display: flex;
-                justify-content: space-between;
-                align-items: flex-end;
-                height: 300px;
-                margin-bottom: 20px;
-            }
-            .element {
-                width: 7%;
-                text-align: center;
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-            }
-            .element-number {
-                background-color: #e74c3c;
-                color: white;
-                width: 24px;
-                height: 24px;
-                border-radius: 50%;
-                display: flex;
-                justify-content: center;
-                align-items: center;
-                margin-bottom: 5px;
-            }
-            .element-name {
-                transform: rotate(-45deg);
-                white-space: nowrap;
-                font-size: 11px;
-                margin-top: 10px;
-            }
-            .introduction, .final-resolution { height: 40%; }
-            .stating-goal, .mystery, .heighten-curiosity, .event-reaction, .problem-emergence { height: 60%; }
-            .first-attempt, .solution-probability, .new-characters-subplots, .tension-rethinking { height: 80%; }
-            .raised-stakes, .accelerated-pace, .all-is-lost { height: 100%; }
-            .acts {
-                display: flex;
-                justify-content: space-between;
-            }
-            .act {
-                text-align: center;
-                padding: 10px;
-                background-color: #f0f0f0;
-                border-radius: 5px;
-            }
-            .act-1 { width: 40%; }
-            .act-2-3 { width: 35%; }
-            .act-4 { width: 25%; }
-        """
-        html += "</style>"
-        
-        return html
\ No newline at end of file
+        return render_visualization("gulino_sequence.html")
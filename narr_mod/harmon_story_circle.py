@@ -1,6 +1,6 @@
 # narr_mod/harmon_story_circle.py
 
-from narr_mod import NarrativeStructure
+from narr_mod import NarrativeStructure, beat_texts, render_visualization
 
 class HarmonStoryCircle(NarrativeStructure):
     def name(self) -> str:
@@ -9,7 +9,7 @@ class HarmonStoryCircle(NarrativeStructure):
     def analyze(self, formatted_structure: dict) -> dict:
         # Здесь можно добавить более сложную логику анализа
         # Пока что просто вернем входные данные
-        return formatted_structure
+        return beat_texts(formatted_structure)
 
     def get_prompt(self) -> str:
         return """
@@ -47,63 +47,4 @@ class HarmonStoryCircle(NarrativeStructure):
         """
 
     def visualize(self, analysis_result: dict) -> str:
-        html = "<h1>Сюжетный круг (Дэн Хармон)</h1>"
-        html += "<div class='harmon-circle'>"
-        
-        steps = [
-            "Зона комфорта",
-            "Потребность или желание",
-            "Незнакомая ситуация",
-            "Поиск и адаптация",
-            "Получение желаемого",
-            "Плата за него",
-            "Возвращение к привычному",
-            "Способность меняться"
-        ]
-        
-        for i, step in enumerate(steps):
-            angle = i * 45 - 90  # Start from top (-90 degrees)
-            html += f"<div class='step step-{i+1}' style='transform: rotate({angle}deg) translate(150px) rotate(-{angle}deg);'>"
-            html += f"<div class='step-number'>{i+1}</div>"
-            html += f"<div class='step-name'>{step}</div>"
-            html += "</div>"
-        
-        html += "</div>"
-        
-        html += "<style>"
-        html += """
-            .harmon-circle {
-                width: 400px;
-                height: 400px;
-                border-radius: 50%;
-                border: 2px solid #333;
-                position: relative;
-                margin: 50px auto;
-            }
-            .step {
-                position: absolute;
-                width: 100px;
-                text-align: center;
-                transform-origin: center;
-            }
-            .step-number {
-                font-weight: bold;
-                font-size: 18px;
-                margin-bottom: 5px;
-            }
-            .step-name {
-                font-size: 12px;
-            }
-            .step-1 { color: #e74c3c; }
-            .step-2 { color: #3498db; }
-            .step-3 { color: #2ecc71; }
-            .step-4 { color: #f39c12; }
-            .step-5 { color: #9b59b6; }
-            .step-6 { color: #e67e22; }
-            .step-7 { color: #1abc9c; }
-            .step-8 { color: #34495e; }
-        """
-        html += "</style>"
-        
-        return html
-
+        return render_visualization("harmon_story_circle.html")
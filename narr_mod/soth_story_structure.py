@@ -1,6 +1,6 @@
 # narr_mod/soth_story_structure.py
 
-from narr_mod import NarrativeStructure
+from narr_mod import NarrativeStructure, beat_texts, render_visualization
 
 class SothStoryStructure(NarrativeStructure):
     def name(self) -> str:
@@ -9,7 +9,7 @@ class SothStoryStructure(NarrativeStructure):
     def analyze(self, formatted_structure: dict) -> dict:
         # Здесь можно добавить более сложную логику анализа
         # Пока что просто вернем входные данные
-        return formatted_structure
+        return beat_texts(formatted_structure)
 
     def get_prompt(self) -> str:
         return """
@@ -49,96 +49,4 @@ class SothStoryStructure(NarrativeStructure):
         """
 
     def visualize(self, analysis_result: dict) -> str:
-        html = "<h1>Структура истории (Крис Сот)</h1>"
-        html += "<div class='soth-structure'>"
-        
-        elements = [
-            ("Мир героя: Зов приключений", "call-to-adventure"),
-            ("Встреча с антагонистом", "meet-antagonist"),
-            ("Герой «заперт» вместе с антагонистом", "locked-in"),
-            ("Первые попытки", "first-attempts"),
-            ("Большой дерзкий план проваливается", "bold-plan-fails"),
-            ("Испытание, открывающее герою глаза", "eye-opening-trial"),
-            ("Новый план проваливается", "new-plan-fails"),
-            ("Победа в финальной битве", "final-battle"),
-            ("Новое равновесие", "new-equilibrium")
-        ]
-        
-        html += "<div class='timeline'>"
-        for i, (name, class_name) in enumerate(elements):
-            html += f"<div class='element {class_name}'>"
-            html += f"<div class='element-number'>{i+1}</div>"
-            html += f"<div class='element-name'>{name}</div>"
-            html += "</div>"
-        html += "</div>"
-        
-        html += "<div class='acts'>"
-        html += "<div class='act act-1'>Акт 1<br>Начало</div>"
-        html += "<div class='act act-2-3'>Акт 2 - Акт 3<br>Середина</div>"
-        html += "<div class='act act-4'>Акт 4<br>Конец</div>"
-        html += "</div>"
-        
-        html += "</div>"
-        
-        html += "<style>"
-        html += """
-            .soth-structure {
-                width: 100%;
-                max-width: 900px;
-                margin: 0 auto;
-                padding: 20px;
-                font-family: Arial, sans-serif;
-            }
-            .timeline {
-                display: flex;
-                justify-content: space-between;
-                align-items: flex-end;
-                height: 250px;
-                margin-bottom: 20px;
-            }
-            .element {
-                width: 10%;
-                text-align: center;
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-            }
-            .element-number {
-                background-color: #3498db;
-                color: white;
-                width: 24px;
-                height: 24px;
-                border-radius: 50%;
-                display: flex;
-                justify-content: center;
-                align-items: center;
-                margin-bottom: 5px;
-            }
-            .element-name {
-                transform: rotate(-45deg);
-                white-space: nowrap;
-                font-size: 12px;
-                margin-top: 10px;
-            }
-            .call-to-adventure, .new-equilibrium { height: 30%; }
-            .meet-antagonist, .locked-in { height: 50%; }
-            .first-attempts, .bold-plan-fails, .eye-opening-trial, .new-plan-fails { height: 70%; }
-            .final-battle { height: 100%; }
-            .acts {
-                display: flex;
-                justify-content: space-between;
-            }
-            .act {
-                text-align: center;
-                padding: 10px;
-                background-color: #f0f0f0;
-                border-radius: 5px;
-            }
-            .act-1 { width: 25%; }
-            .act-2-3 { width: 50%; }
-            .act-4 { width: 25%; }
-        """
-        html += "</style>"
-        
-        return html
-
+        return render_visualization("soth_story_structure.html")
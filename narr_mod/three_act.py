@@ -1,6 +1,6 @@
 # narr_mod/three_act.py
 
-from narr_mod import NarrativeStructure
+from narr_mod import NarrativeStructure, mentions, render_visualization
 
 class ThreeAct(NarrativeStructure):
     def name(self) -> str:
@@ -81,7 +81,7 @@ class ThreeAct(NarrativeStructure):
         elements_to_check = ['setting', 'main characters', 'initial conflict']
         
         for element in elements_to_check:
-            if element.lower() in act1_content.lower():
+            if mentions(act1_content, element):
                 analysis += f"- {element.capitalize()} is present.\n"
             else:
                 analysis += f"- {element.capitalize()} might need more emphasis.\n"
@@ -91,12 +91,12 @@ class ThreeAct(NarrativeStructure):
     def _analyze_act2(self, act2_content: str) -> str:
         analysis = "Act 2 (Confrontation) Analysis:\n"
         
-        if 'conflict' in act2_content.lower() and 'develop' in act2_content.lower():
+        if mentions(act2_content, 'conflict') and mentions(act2_content, 'develop'):
             analysis += "- The conflict seems to be developing.\n"
         else:
             analysis += "- The conflict development could be more pronounced.\n"
         
-        if 'stakes' in act2_content.lower():
+        if mentions(act2_content, 'stakes'):
             analysis += "- The stakes appear to be raised.\n"
         else:
             analysis += "- Consider emphasizing how the stakes are raised.\n"
@@ -106,12 +106,12 @@ class ThreeAct(NarrativeStructure):
     def _analyze_act3(self, act3_content: str) -> str:
         analysis = "Act 3 (Resolution) Analysis:\n"
         
-        if 'resolve' in act3_content.lower() or 'resolution' in act3_content.lower():
+        if mentions(act3_content, 'resolve') or mentions(act3_content, 'resolution'):
             analysis += "- The main conflict appears to be resolved.\n"
         else:
             analysis += "- The resolution of the main conflict could be clearer.\n"
         
-        if 'conclusion' in act3_content.lower() or 'end' in act3_content.lower():
+        if mentions(act3_content, 'conclusion') or mentions(act3_content, 'end'):
             analysis += "- The story seems to reach a conclusion.\n"
         else:
             analysis += "- Consider providing a more definitive conclusion.\n"
@@ -141,50 +141,10 @@ class ThreeAct(NarrativeStructure):
         
         return base_prompt + "\n\n" + self.double_check_prompt()
 
-
     def visualize(self, analysis_result: dict) -> str:
-        html = "<h2>Трехактная структура</h2>"
-        html += "<div class='three-act-structure'>"
-        
-        acts = ["Setup", "Confrontation", "Resolution"]
-        
-        for i, act in enumerate(acts):
-            act_content = analysis_result.get(f"Act{i+1}", "")
-            html += f"<div class='act act-{i+1}'>"
-            html += f"<h3>Act {i+1}: {act}</h3>"
-            html += f"<p>{act_content}</p>"
-            html += "</div>"
-        
-        html += "</div>"
-        
-        html += "<style>"
-        html += """
-            .three-act-structure {
-                display: flex;
-                justify-content: space-between;
-                margin-top: 20px;
-            }
-            .act {
-                width: 30%;
-                padding: 15px;
-                border-radius: 8px;
-                box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-            }
-            .act-1 {
-                background-color: #e6f3ff;
-            }
-            .act-2 {
-                background-color: #fff2e6;
-            }
-            .act-3 {
-                background-color: #e6ffe6;
-            }
-            h3 {
-                margin-top: 0;
-                color: #333;
-            }
-        """
-        html += "</style>"
-        
-        return html
-
+        return render_visualization(
+            "three_act.html",
+            act1=analysis_result.get("Act1", ""),
+            act2=analysis_result.get("Act2", ""),
+            act3=analysis_result.get("Act3", ""),
+        )
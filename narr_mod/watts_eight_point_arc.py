@@ -1,6 +1,6 @@
 # narr_mod/watts_eight_point_arc.py
 
-from narr_mod import NarrativeStructure
+from narr_mod import NarrativeStructure, beat_texts, render_visualization
 
 class WattsEightPointArc(NarrativeStructure):
     def name(self) -> str:
@@ -9,7 +9,7 @@ class WattsEightPointArc(NarrativeStructure):
     def analyze(self, formatted_structure: dict) -> dict:
         # Здесь можно добавить более сложную логику анализа
         # Пока что просто вернем входные данные
-        return formatted_structure
+        return beat_texts(formatted_structure)
 
     def get_prompt(self) -> str:
         return """
@@ -46,70 +46,4 @@ class WattsEightPointArc(NarrativeStructure):
         """
 
     def visualize(self, analysis_result: dict) -> str:
-        html = "<h1>Восьмиточечная арка (Найджел Уоттс)</h1>"
-        html += "<div class='watts-arc'>"
-        
-        points = [
-            "Стазис",
-            "Импульс",
-            "Стремление к цели",
-            "Неожиданность",
-            "Решающий выбор",
-            "Кульминация",
-            "Обратный путь",
-            "Развязка"
-        ]
-        
-        for i, point in enumerate(points):
-            html += f"<div class='point point-{i+1}'>"
-            html += f"<div class='point-number'>{i+1}</div>"
-            html += f"<div class='point-name'>{point}</div>"
-            html += "</div>"
-        
-        html += "</div>"
-        
-        html += "<style>"
-        html += """
-            .watts-arc {
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-                padding: 20px;
-                background-color: #f0f0f0;
-                border-radius: 10px;
-            }
-            .point {
-                display: flex;
-                align-items: center;
-                margin: 10px 0;
-                padding: 10px;
-                background-color: #fff;
-                border-radius: 5px;
-                box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-            }
-            .point-number {
-                width: 30px;
-                height: 30px;
-                background-color: #007bff;
-                color: #fff;
-                border-radius: 50%;
-                display: flex;
-                justify-content: center;
-                align-items: center;
-                margin-right: 10px;
-            }
-            .point-name {
-                font-weight: bold;
-            }
-            .point-5 {
-                background-color: #ffc107;
-            }
-            .point-6 {
-                background-color: #dc3545;
-                color: #fff;
-            }
-        """
-        html += "</style>"
-        
-        return html
-
+        return render_visualization("watts_eight_point_arc.html")
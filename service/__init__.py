@@ -1,5 +1,25 @@
 # service/__init__.py
 
-from .llm import initialize_llm
-from .evaluator import NarrativeEvaluator
+from importlib import import_module
 
+# Имена пакета и модули, где они определены; модули импортируются при первом обращении,
+# чтобы import service не тянул langchain, ollama и сегментацию
+_EXPORTS = {
+    "initialize_llm": ".llm",
+    "initialize_async_llm": ".llm",
+    "NarrativeEvaluator": ".evaluator",
+    "get_async_llm": ".provider",
+    "get_evaluator": ".provider",
+    "get_llm": ".provider",
+    "register_backend": ".provider",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,122 @@
+# service/async_llm.py
+
+import asyncio
+import logging
+import time
+import weakref
+
+from .cache import make_cache_key
+from .metrics import record_generation
+from .tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncOllamaClient:
+    """Асинхронный клиент Ollama с пулом keep-alive соединений.
+
+    httpx-клиент привязан к event loop, поэтому пул создаётся отдельно
+    для каждого loop и переиспользуется всеми запросами внутри него.
+    """
+
+    def __init__(self, model="llama3.2", host=None, max_connections=8, timeout=600, options=None, cache=None):
+        self.model = model
+        self.host = host
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.options = {name: value for name, value in (options or {}).items() if value is not None}
+        self.cache = cache
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            # ollama и httpx импортируются при первом запросе, а не при старте процесса
+            import httpx
+            from ollama import AsyncClient
+
+            client = AsyncClient(
+                host=self.host,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+            self._clients[loop] = client
+        return client
+
+    def key_for(self, prompt, stop=None) -> str:
+        options = dict(self.options)
+        if stop is not None:
+            options["stop"] = stop
+        return make_cache_key(self.model, options, prompt)
+
+    async def agenerate(self, prompt, stop=None) -> str:
+        key = self.key_for(prompt, stop)
+        if self.cache is not None:
+            response = self.cache.get(key)
+            if response is not None:
+                logger.debug(f"LLM cache hit: {key[:12]}")
+                return response
+
+        options = dict(self.options)
+        if stop is not None:
+            options["stop"] = stop
+        started = time.perf_counter()
+        result = await self._client().generate(model=self.model, prompt=prompt, options=options or None)
+        response = result["response"]
+        self._record("async", prompt, response, result, time.perf_counter() - started)
+
+        if self.cache is not None:
+            self.cache.put(key, response, prompt=prompt, model=self.model)
+        return response
+
+    async def astream(self, prompt, stop=None):
+        """Потоковая генерация; ответ из кэша отдаётся одним фрагментом"""
+        key = self.key_for(prompt, stop)
+        if self.cache is not None:
+            response = self.cache.get(key)
+            if response is not None:
+                logger.debug(f"LLM cache hit: {key[:12]}")
+                yield response
+                return
+
+        options = dict(self.options)
+        if stop is not None:
+            options["stop"] = stop
+        started = time.perf_counter()
+        stream = await self._client().generate(model=self.model, prompt=prompt, options=options or None, stream=True)
+        chunks = []
+        part = None
+        async for part in stream:
+            chunk = part.get("response", "")
+            if chunk:
+                chunks.append(chunk)
+                yield chunk
+        # Счётчики токенов Ollama приходят в последней части потока
+        self._record("stream", prompt, ''.join(chunks), part, time.perf_counter() - started)
+
+        if self.cache is not None:
+            self.cache.put(key, ''.join(chunks), prompt=prompt, model=self.model)
+
+    @staticmethod
+    def _record(mode, prompt, response, result, elapsed):
+        """Токены и скорость по счётчикам Ollama; без них — оценка по тексту и общее время"""
+        result = result or {}
+        prompt_tokens = result.get("prompt_eval_count") or estimate_tokens(prompt)
+        completion_tokens = result.get("eval_count") or estimate_tokens(response)
+        eval_duration = result.get("eval_duration")
+        seconds = eval_duration / 1e9 if eval_duration else elapsed
+        record_generation(mode, prompt_tokens, completion_tokens, seconds)
+
+    async def __call__(self, prompt, stop=None) -> str:
+        return await self.agenerate(prompt, stop=stop)
+
+    async def aclose(self):
+        """Закрывает пул соединений текущего event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.pop(loop, None)
+        if client is not None:
+            await client._client.aclose()
@@ -0,0 +1,243 @@
+# service/cache.py
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(model: str, options: dict, prompt: str) -> str:
+    """Ключ кэша: модель + параметры генерации + хэш промпта"""
+    prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    payload = json.dumps(
+        {"model": model, "options": options, "prompt": prompt_hash},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """Двухуровневый кэш ответов LLM: LRU в памяти и файлы на диске с TTL и лимитом размера"""
+
+    def __init__(self, cache_dir=None, memory_items=256, disk_max_bytes=512 * 1024 * 1024, ttl=7 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.memory_items = memory_items
+        self.disk_max_bytes = disk_max_bytes
+        self.ttl = ttl
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry["created"]):
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    CACHE_LOOKUPS.inc(result="memory_hit")
+                    return entry["response"]
+                del self._memory[key]
+
+            entry = self._read_disk(key)
+            if entry is not None:
+                self._remember(key, entry)
+                self.disk_hits += 1
+                CACHE_LOOKUPS.inc(result="disk_hit")
+                return entry["response"]
+
+            self.misses += 1
+            CACHE_LOOKUPS.inc(result="miss")
+            return None
+
+    def put(self, key, response, prompt=None, model=None):
+        entry = {
+            "key": key,
+            "model": model,
+            "prompt": prompt,
+            "response": response,
+            "created": time.time(),
+        }
+        with self._lock:
+            self._remember(key, entry)
+            self._write_disk(key, entry)
+
+    def entries(self):
+        """Итерирует по актуальным записям дискового уровня"""
+        for path, _, _ in self._disk_entries():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not self._expired(entry.get("created", 0)):
+                yield entry
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            for path, _, _ in self._disk_entries():
+                self._remove(path)
+            self._disk_bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "memory_items": len(self._memory),
+            "disk_bytes": self._disk_bytes,
+        }
+
+    def _expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self._expired(entry.get("created", 0)):
+            self._remove(path)
+            return None
+        return entry
+
+    def _write_disk(self, key, entry):
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+        # Пишем во временный файл и переименовываем, чтобы не оставлять битых записей
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write LLM cache entry: {e}")
+            return
+        self._disk_bytes += len(data) - old_size
+        if self._disk_bytes > self.disk_max_bytes:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        # Сначала удаляем просроченные записи, затем самые старые, пока не уложимся в лимит
+        entries = sorted(self._disk_entries(), key=lambda e: e[2])
+        now = time.time()
+        for path, size, mtime in entries:
+            if self._disk_bytes <= self.disk_max_bytes and (self.ttl is None or now - mtime <= self.ttl):
+                break
+            self._remove(path)
+            self._disk_bytes -= size
+            self.evictions += 1
+
+    def _disk_entries(self):
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class CachedLLM:
+    """Обёртка над LLM, которая отвечает из кэша для уже виденных промптов"""
+
+    def __init__(self, llm, cache: LLMCache):
+        self.llm = llm
+        self.cache = cache
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self.llm, "model", type(self.llm).__name__)
+
+    def _options(self, stop=None) -> dict:
+        params = getattr(self.llm, "_default_params", {})
+        options = params.get("options", {}) if isinstance(params, dict) else {}
+        # Незаданные параметры не влияют на генерацию, поэтому не попадают в ключ
+        options = {name: value for name, value in options.items() if value is not None}
+        if stop is not None:
+            options["stop"] = stop
+        return options
+
+    def key_for(self, prompt, stop=None) -> str:
+        return make_cache_key(self.model_name, self._options(stop), prompt)
+
+    def __call__(self, prompt, stop=None, **kwargs):
+        key = self.key_for(prompt, stop)
+        response = self.cache.get(key)
+        if response is not None:
+            logger.debug(f"LLM cache hit: {key[:12]}")
+            return response
+
+        response = self.llm(prompt, stop=stop, **kwargs)
+        self.cache.put(key, response, prompt=prompt, model=self.model_name)
+        return response
+
+    def stream(self, prompt, stop=None, **kwargs):
+        """Потоковая генерация; ответ из кэша отдаётся одним фрагментом"""
+        key = self.key_for(prompt, stop)
+        response = self.cache.get(key)
+        if response is not None:
+            logger.debug(f"LLM cache hit: {key[:12]}")
+            yield response
+            return
+
+        chunks = []
+        for chunk in self.llm.stream(prompt, stop=stop, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        self.cache.put(key, ''.join(chunks), prompt=prompt, model=self.model_name)
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
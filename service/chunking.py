@@ -0,0 +1,60 @@
+# service/chunking.py
+
+import re
+
+# Заголовок сцены в сценарии: "INT. HOUSE - DAY", "EXT. STREET - NIGHT" и т.п.
+SCENE_HEADING = re.compile(r'^[ \t]*(?:INT\.|EXT\.|INT/EXT\.|I/E\.)', re.MULTILINE)
+SENTENCE_END = re.compile(r'(?<=[.!?…])["»\')\]]*\s+')
+
+
+def _boundaries(text):
+    points = {0, len(text)}
+    points.update(match.start() for match in SCENE_HEADING.finditer(text))
+    points.update(match.end() for match in SENTENCE_END.finditer(text))
+    return sorted(points)
+
+
+def split_units(text, max_chars):
+    """Режет текст на сцены и предложения; слишком длинные куски режутся по max_chars"""
+    points = _boundaries(text)
+    units = []
+    for start, end in zip(points, points[1:]):
+        while end - start > max_chars:
+            units.append(text[start:start + max_chars])
+            start += max_chars
+        if end > start:
+            units.append(text[start:end])
+    return units
+
+
+def split_into_chunks(text, max_chars=6000, overlap_chars=500):
+    """Делит текст на фрагменты не длиннее max_chars по границам сцен и предложений.
+
+    Соседние фрагменты перекрываются последними предложениями (до overlap_chars),
+    чтобы события на стыке не терялись.
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    chunks = []
+    current = []
+    size = 0
+    for unit in split_units(text, max_chars):
+        if current and size + len(unit) > max_chars:
+            chunks.append(''.join(current))
+            carry = []
+            carry_size = 0
+            for previous in reversed(current):
+                if carry_size + len(previous) > overlap_chars:
+                    break
+                carry.insert(0, previous)
+                carry_size += len(previous)
+            if carry_size + len(unit) > max_chars:
+                carry, carry_size = [], 0
+            current, size = carry, carry_size
+        current.append(unit)
+        size += len(unit)
+
+    if current:
+        chunks.append(''.join(current))
+    return chunks
@@ -1,186 +1,244 @@
 # service/converter.py
 
-def convert_to_format(structure: dict, structure_name: str) -> dict[str, str]:
-    if structure_name == "four_act":
-        return convert_to_four_act(structure)
-    elif structure_name == "three_act":
-        return convert_to_three_act(structure)
-    elif structure_name == "hero_journey":
-        return convert_to_hero_journey(structure)
-    elif structure_name == "field_paradigm":
-        return convert_to_field_paradigm(structure)
-    elif structure_name == "harmon_story_circle":
-        return convert_to_harmon_story_circle(structure)
-    elif structure_name == "gulino_sequence":
-        return convert_to_gulino_sequence(structure)
-    elif structure_name == "soth_story_structure":
-        return convert_to_soth_story_structure(structure)
-    elif structure_name == "vogler_hero_journey":
-        return convert_to_vogler_hero_journey(structure)
-    elif structure_name == "watts_eight_point_arc":
-        return convert_to_watts_eight_point_arc(structure)
-    else:
-        raise ValueError(f"Unknown structure name: {structure_name}")
+import re
+from bisect import bisect_left
+from collections.abc import Mapping
+from itertools import accumulate
 
+from .document import Document, Span
 
-def convert_to_hero_journey(structure: dict) -> dict[str, str]:
-    if not structure or "sentences" not in structure:
-        return {"error": "Invalid or empty structure"}
-    return {
-        "ordinary_world": ' '.join(structure["sentences"][:2]),
-        "call_to_adventure": ' '.join(structure["sentences"][2:4]),
-        "refusal_of_the_call": ' '.join(structure["sentences"][4:6]),
-        "meeting_the_mentor": ' '.join(structure["sentences"][6:8]),
-        "crossing_the_threshold": ' '.join(structure["sentences"][8:10]),
-        # ... другие этапы путешествия героя
-    }
-
-def convert_to_four_act(structure: dict) -> dict[str, str]:
-    if not structure or "sentences" not in structure:
-        return {"error": "Invalid or empty structure"}
+# Биты каждой структуры: (название, относительный вес). Доля текста, приходящаяся
+# на бит, пропорциональна его весу.
+BEAT_SPECS = {
+    "three_act": (
+        ("act1_setup", 1),
+        ("act2_confrontation", 2),
+        ("act3_resolution", 1),
+    ),
+    # Названия совпадают с ключами, которые читает narr_mod.four_act и его промпт
+    "four_act": (
+        ("Act 1", 1),
+        ("Act 2", 1),
+        ("Act 3", 1),
+        ("Act 4", 1),
+    ),
+    "hero_journey": (
+        ("ordinary_world", 1),
+        ("call_to_adventure", 1),
+        ("refusal_of_the_call", 1),
+        ("meeting_the_mentor", 1),
+        ("crossing_the_threshold", 1),
+    ),
+    "field_paradigm": (
+        ("setup", 1),
+        ("confrontation", 2),
+        ("resolution", 1),
+    ),
+    "harmon_story_circle": tuple(
+        (name, 1) for name in ("you", "need", "go", "search", "find", "take", "return", "change")
+    ),
+    # Первый акт (1/4) делится на шесть частей, середина (1/2) и финал (1/4) — на четыре
+    "gulino_sequence": (
+        ("introduction", 2),
+        ("stating_goal", 2),
+        ("presenting_mystery", 2),
+        ("heightening_curiosity", 2),
+        ("reaction_to_event", 2),
+        ("emergence_of_problem", 2),
+        ("first_attempt", 3),
+        ("solution_probability", 3),
+        ("new_characters_subplots", 3),
+        ("rethinking_tension", 3),
+        ("raised_stakes", 1.5),
+        ("accelerated_pace", 1.5),
+        ("all_is_lost", 1.5),
+        ("final_resolution", 1.5),
+    ),
+    # Разделение (1/4), инициация (1/2) и возвращение (1/4) по Кэмпбеллу
+    "campbell_monomyth": (
+        ("call_to_adventure", 1.5),
+        ("refusal_of_the_call", 1.5),
+        ("supernatural_aid", 1.5),
+        ("crossing_the_first_threshold", 1.5),
+        ("belly_of_the_whale", 1),
+        ("road_of_trials", 1),
+        ("meeting_with_the_goddess", 1),
+        ("woman_as_temptress", 1),
+        ("atonement_with_the_father", 1),
+        ("apotheosis", 1),
+        ("ultimate_boon", 1),
+        ("refusal_of_the_return", 1),
+        ("magic_flight", 1),
+        ("rescue_from_without", 1.5),
+        ("crossing_the_return_threshold", 1.5),
+        ("master_of_two_worlds", 1.5),
+        ("freedom_to_live", 1.5),
+    ),
+    "soth_story_structure": tuple(
+        (name, 1) for name in (
+            "hero_world_call",
+            "meeting_antagonist",
+            "hero_locked_in",
+            "first_attempts",
+            "moving_forward",
+            "eye_opening_trial",
+            "new_plan",
+            "final_battle",
+            "new_equilibrium",
+        )
+    ),
+    "vogler_hero_journey": tuple(
+        (name, 1) for name in (
+            "ordinary_world",
+            "call_to_adventure",
+            "refusal_of_call",
+            "meeting_with_mentor",
+            "crossing_threshold",
+            "tests_allies_enemies",
+            "approach_inmost_cave",
+            "ordeal",
+            "reward",
+            "road_back",
+            "resurrection",
+            "return_with_elixir",
+        )
+    ),
+    "watts_eight_point_arc": tuple(
+        (name, 1) for name in (
+            "stasis",
+            "trigger",
+            "the_quest",
+            "surprise",
+            "critical_choice",
+            "climax",
+            "reversal",
+            "resolution",
+        )
+    ),
+}
 
-    total_sentences = len(structure["sentences"])
-    act1 = total_sentences // 4
-    act2 = total_sentences // 4
-    act3 = total_sentences // 4
-    act4 = total_sentences - act1 - act2 - act3
-    
-    return {
-        "act1_setup": ' '.join(structure["sentences"][:act1]),
-        "act2_complication": ' '.join(structure["sentences"][act1:act1+act2]),
-        "act3_development": ' '.join(structure["sentences"][act1+act2:act1+act2+act3]),
-        "act4_resolution": ' '.join(structure["sentences"][act1+act2+act3:])
-    }
-
-def convert_to_three_act(structure: dict) -> dict[str, str]:
-    if not structure or "sentences" not in structure:
-        return {"error": "Invalid or empty structure"}
-    
-    total_sentences = len(structure["sentences"])
-    act1 = total_sentences // 4
-    act2 = total_sentences // 2
-    act3 = total_sentences - act1 - act2
-    
-    return {
-        "act1_setup": ' '.join(structure["sentences"][:act1]),
-        "act2_confrontation": ' '.join(structure["sentences"][act1:act1+act2]),
-        "act3_resolution": ' '.join(structure["sentences"][act1+act2:])
-    }
-
-def convert_to_field_paradigm(structure: dict) -> dict[str, str]:
-    if not structure or "sentences" not in structure:
-        return {"error": "Invalid or empty structure"}
-    
-    total_sentences = len(structure["sentences"])
-    setup = total_sentences // 4
-    confrontation = total_sentences // 2
-    resolution = total_sentences - setup - confrontation
-    
-    return {
-        "setup": ' '.join(structure["sentences"][:setup]),
-        "confrontation": ' '.join(structure["sentences"][setup:setup+confrontation]),
-        "resolution": ' '.join(structure["sentences"][setup+confrontation:])
-    }
-
-def convert_to_harmon_story_circle(structure: dict) -> dict[str, str]:
-    if not structure or "sentences" not in structure:
-        return {"error": "Invalid or empty structure"}
-    
-    total_sentences = len(structure["sentences"])
-    step_size = total_sentences // 8
-    
-    return {
-        "you": ' '.join(structure["sentences"][:step_size]),
-        "need": ' '.join(structure["sentences"][step_size:2*step_size]),
-        "go": ' '.join(structure["sentences"][2*step_size:3*step_size]),
-        "search": ' '.join(structure["sentences"][3*step_size:4*step_size]),
-        "find": ' '.join(structure["sentences"][4*step_size:5*step_size]),
-        "take": ' '.join(structure["sentences"][5*step_size:6*step_size]),
-        "return": ' '.join(structure["sentences"][6*step_size:7*step_size]),
-        "change": ' '.join(structure["sentences"][7*step_size:])
-    }
-
-def convert_to_gulino_sequence(structure: dict) -> dict[str, str]:
-    if not structure or "sentences" not in structure:
-        return {"error": "Invalid or empty structure"}
-    
-    total_sentences = len(structure["sentences"])
-    act1 = total_sentences // 4
-    act2_3 = total_sentences // 2
-    act4 = total_sentences - act1 - act2_3
-    
-    return {
-        "introduction": ' '.join(structure["sentences"][:act1//6]),
-        "stating_goal": ' '.join(structure["sentences"][act1//6:act1//3]),
-        "presenting_mystery": ' '.join(structure["sentences"][act1//3:act1//2]),
-        "heightening_curiosity": ' '.join(structure["sentences"][act1//2:2*act1//3]),
-        "reaction_to_event": ' '.join(structure["sentences"][2*act1//3:5*act1//6]),
-        "emergence_of_problem": ' '.join(structure["sentences"][5*act1//6:act1]),
-        "first_attempt": ' '.join(structure["sentences"][act1:act1+act2_3//4]),
-        "solution_probability": ' '.join(structure["sentences"][act1+act2_3//4:act1+act2_3//2]),
-        "new_characters_subplots": ' '.join(structure["sentences"][act1+act2_3//2:act1+3*act2_3//4]),
-        "rethinking_tension": ' '.join(structure["sentences"][act1+3*act2_3//4:act1+act2_3]),
-        "raised_stakes": ' '.join(structure["sentences"][act1+act2_3:act1+act2_3+act4//4]),
-        "accelerated_pace": ' '.join(structure["sentences"][act1+act2_3+act4//4:act1+act2_3+act4//2]),
-        "all_is_lost": ' '.join(structure["sentences"][act1+act2_3+act4//2:act1+act2_3+3*act4//4]),
-        "final_resolution": ' '.join(structure["sentences"][act1+act2_3+3*act4//4:])
-    }
-
-def convert_to_soth_story_structure(structure: dict) -> dict[str, str]:
-    if not structure or "sentences" not in structure:
-        return {"error": "Invalid or empty structure"}
-    
-    total_sentences = len(structure["sentences"])
-    step_size = total_sentences // 9
-    
-    return {
-        "hero_world_call": ' '.join(structure["sentences"][:step_size]),
-        "meeting_antagonist": ' '.join(structure["sentences"][step_size:2*step_size]),
-        "hero_locked_in": ' '.join(structure["sentences"][2*step_size:3*step_size]),
-        "first_attempts": ' '.join(structure["sentences"][3*step_size:4*step_size]),
-        "moving_forward": ' '.join(structure["sentences"][4*step_size:5*step_size]),
-        "eye_opening_trial": ' '.join(structure["sentences"][5*step_size:6*step_size]),
-        "new_plan": ' '.join(structure["sentences"][6*step_size:7*step_size]),
-        "final_battle": ' '.join(structure["sentences"][7*step_size:8*step_size]),
-        "new_equilibrium": ' '.join(structure["sentences"][8*step_size:])
-    }
-
-def convert_to_vogler_hero_journey(structure: dict) -> dict[str, str]:
-    if not structure or "sentences" not in structure:
-        return {"error": "Invalid or empty structure"}
-    
-    total_sentences = len(structure["sentences"])
-    step_size = total_sentences // 12
-    
-    return {
-        "ordinary_world": ' '.join(structure["sentences"][:step_size]),
-        "call_to_adventure": ' '.join(structure["sentences"][step_size:2*step_size]),
-        "refusal_of_call": ' '.join(structure["sentences"][2*step_size:3*step_size]),
-        "meeting_with_mentor": ' '.join(structure["sentences"][3*step_size:4*step_size]),
-        "crossing_threshold": ' '.join(structure["sentences"][4*step_size:5*step_size]),
-        "tests_allies_enemies": ' '.join(structure["sentences"][5*step_size:6*step_size]),
-        "approach_inmost_cave": ' '.join(structure["sentences"][6*step_size:7*step_size]),
-        "ordeal": ' '.join(structure["sentences"][7*step_size:8*step_size]),
-        "reward": ' '.join(structure["sentences"][8*step_size:9*step_size]),
-        "road_back": ' '.join(structure["sentences"][9*step_size:10*step_size]),
-        "resurrection": ' '.join(structure["sentences"][10*step_size:11*step_size]),
-        "return_with_elixir": ' '.join(structure["sentences"][11*step_size:])
-    }
-
-def convert_to_watts_eight_point_arc(structure: dict) -> dict[str, str]:
-    if not structure or "sentences" not in structure:
+
+class Segmentation(Mapping):
+    """Разбиение документа на биты: для каждого бита хранятся только смещения (start, end).
+
+    Значения — участки Span без копирования текста; строки создаются в to_dict().
+    """
+
+    def __init__(self, document, spans):
+        self.document = document
+        self.spans = spans
+
+    @property
+    def text(self):
+        return self.document.text
+
+    def __getitem__(self, beat) -> Span:
+        start, end = self.spans[beat]
+        return self.document.span(start, end)
+
+    def __iter__(self):
+        return iter(self.spans)
+
+    def __len__(self):
+        return len(self.spans)
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def to_dict(self) -> dict[str, str]:
+        return {beat: str(span) for beat, span in self.items()}
+
+
+# Слово для разбиения текстов, в которых предложений меньше, чем битов
+_WORD = re.compile(r'\S+')
+
+
+def _word_units(text):
+    starts, ends = [], []
+    for match in _WORD.finditer(text):
+        starts.append(match.start())
+        ends.append(match.end())
+    return starts, ends
+
+
+def _beat_spans(starts, ends, spec):
+    """Границы битов по префиксным суммам весов; каждый бит начинается с начала единицы текста"""
+    count = len(starts)
+    beats = len(spec)
+    if count == 0:
+        return {name: (0, 0) for name, _ in spec}
+
+    total_weight = sum(weight for _, weight in spec)
+    length = ends[-1]
+    # cuts[i] — индекс первой единицы i-го бита
+    cuts = [0]
+    for i, cumulative in enumerate(accumulate(weight for _, weight in spec[:-1]), 1):
+        target = length * cumulative / total_weight
+        cut = bisect_left(starts, target)
+        # Начало, ближайшее к целевому смещению
+        if 0 < cut < count and target - starts[cut - 1] < starts[cut] - target:
+            cut -= 1
+        # Каждому биту хотя бы одна единица, если их хватает на все биты
+        lowest = cuts[-1] + 1 if count - cuts[-1] > beats - i else cuts[-1]
+        highest = max(count - (beats - i), lowest)
+        cuts.append(min(max(cut, lowest), highest))
+    cuts.append(count)
+
+    spans = {}
+    for (name, _), first, last in zip(spec, cuts, cuts[1:]):
+        if last > first:
+            spans[name] = (starts[first], ends[last - 1])
+        else:
+            position = starts[first] if first < count else ends[-1]
+            spans[name] = (position, position)
+    return spans
+
+
+def _document(structure):
+    """Document из результата extract_document или из словаря со списком предложений"""
+    if isinstance(structure, Document):
+        return structure
+    if not structure or not isinstance(structure, dict) or "sentences" not in structure:
+        return None
+    return Document.from_sentences([str(sentence).strip() for sentence in structure["sentences"]])
+
+
+def segment(structure, structure_name: str) -> Segmentation:
+    """Разбиение предложений structure (Document или словарь) на биты структуры structure_name"""
+    return segment_all(structure, [structure_name])[structure_name]
+
+
+def segment_all(structure, structure_names=None) -> dict[str, Segmentation]:
+    """Разбиение одного текста сразу для нескольких (по умолчанию всех) структур.
+
+    Границы предложений берутся из документа один раз для всех структур.
+    """
+    structure_names = list(BEAT_SPECS) if structure_names is None else structure_names
+    for name in structure_names:
+        if name not in BEAT_SPECS:
+            raise ValueError(f"Unknown structure name: {name}")
+
+    document = _document(structure)
+    if document is None:
+        raise ValueError("Invalid or empty structure")
+
+    words = None
+    segmentations = {}
+    for name in structure_names:
+        spec = BEAT_SPECS[name]
+        starts, ends = document.sentence_starts, document.sentence_ends
+        # Если предложений меньше, чем битов, границы выбираются по словам
+        if len(starts) < len(spec):
+            if words is None:
+                words = _word_units(document.text)
+            starts, ends = words
+        segmentations[name] = Segmentation(document, _beat_spans(starts, ends, spec))
+    return segmentations
+
+
+def convert_to_format(structure, structure_name: str) -> dict[str, str]:
+    if structure_name not in BEAT_SPECS:
+        raise ValueError(f"Unknown structure name: {structure_name}")
+    if _document(structure) is None:
         return {"error": "Invalid or empty structure"}
-    
-    total_sentences = len(structure["sentences"])
-    step_size = total_sentences // 8
-    
-    return {
-        "stasis": ' '.join(structure["sentences"][:step_size]),
-        "trigger": ' '.join(structure["sentences"][step_size:2*step_size]),
-        "the_quest": ' '.join(structure["sentences"][2*step_size:3*step_size]),
-        "surprise": ' '.join(structure["sentences"][3*step_size:4*step_size]),
-        "critical_choice": ' '.join(structure["sentences"][4*step_size:5*step_size]),
-        "climax": ' '.join(structure["sentences"][5*step_size:6*step_size]),
-        "reversal": ' '.join(structure["sentences"][6*step_size:7*step_size]),
-        "resolution": ' '.join(structure["sentences"][7*step_size:])
-    }
\ No newline at end of file
+    return segment(structure, structure_name).to_dict()
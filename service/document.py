@@ -0,0 +1,182 @@
+# service/document.py
+
+import re
+from array import array
+
+# Смещения хранятся в массивах беззнаковых 32-битных чисел: 8 байт на участок
+# вместо отдельного объекта str на каждое предложение, сущность и токен
+OFFSET_TYPE = 'I'
+
+
+def offsets(values=()):
+    return array(OFFSET_TYPE, values)
+
+
+def _strip(text, start, end):
+    """Границы участка без пробелов по краям"""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+class Span:
+    """Участок документа [start, end): хранит только смещения, строка создаётся по требованию"""
+
+    __slots__ = ("document", "start", "end")
+
+    def __init__(self, document, start, end):
+        self.document = document
+        self.start = start
+        self.end = end
+
+    def __str__(self):
+        return self.document.text[self.start:self.end]
+
+    def __repr__(self):
+        return repr(str(self))
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __bool__(self):
+        return self.end > self.start
+
+    def __eq__(self, other):
+        if isinstance(other, str):
+            return len(other) == len(self) and self.document.text.startswith(other, self.start)
+        if isinstance(other, Span):
+            return str(self) == str(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __contains__(self, substring):
+        return self.document.text.find(substring, self.start, self.end) != -1
+
+    def contains(self, substring, ignore_case=True) -> bool:
+        """Поиск подстроки без копирования участка; регистр по умолчанию не учитывается"""
+        if not ignore_case:
+            return substring in self
+        # re кэширует скомпилированные шаблоны, а поиск с pos/endpos не копирует текст
+        pattern = re.compile(re.escape(substring), re.IGNORECASE)
+        return pattern.search(self.document.text, self.start, self.end) is not None
+
+
+class Document:
+    """Текст, хранящийся один раз, и границы предложений, сущностей и токенов в массивах смещений"""
+
+    __slots__ = (
+        "text",
+        "sentence_starts",
+        "sentence_ends",
+        "entity_starts",
+        "entity_ends",
+        "token_starts",
+        "token_ends",
+    )
+
+    def __init__(self, text, sentence_starts, sentence_ends, entity_starts=None, entity_ends=None,
+                 token_starts=None, token_ends=None):
+        self.text = text
+        self.sentence_starts = sentence_starts
+        self.sentence_ends = sentence_ends
+        self.entity_starts = entity_starts if entity_starts is not None else offsets()
+        self.entity_ends = entity_ends if entity_ends is not None else offsets()
+        self.token_starts = token_starts if token_starts is not None else offsets()
+        self.token_ends = token_ends if token_ends is not None else offsets()
+
+    @classmethod
+    def from_spacy(cls, doc, text=None, entities=None, offset=0):
+        """Документ по spaCy Doc.
+
+        text — исходная строка, если её нужно сохранить вместо doc.text;
+        entities — пары смещений, если сущности искались не моделью;
+        offset — позиция doc в text, если doc разобран по куску текста.
+        """
+        if entities is None:
+            entities = ((ent.start_char, ent.end_char) for ent in doc.ents)
+        entity_starts, entity_ends = offsets(), offsets()
+        for start, end in entities:
+            entity_starts.append(offset + start)
+            entity_ends.append(offset + end)
+
+        text = doc.text if text is None else text
+        sentence_starts, sentence_ends = offsets(), offsets()
+        for sent in doc.sents:
+            start, end = _strip(text, offset + sent.start_char, offset + sent.end_char)
+            if end > start:
+                sentence_starts.append(start)
+                sentence_ends.append(end)
+
+        # Пробельные токены spaCy не считаются словами
+        words = [token for token in doc if not token.is_space]
+        return cls(
+            text,
+            sentence_starts,
+            sentence_ends,
+            entity_starts,
+            entity_ends,
+            offsets(offset + token.idx for token in words),
+            offsets(offset + token.idx + len(token) for token in words),
+        )
+
+    @classmethod
+    def concat(cls, text, documents):
+        """Документ text из документов его последовательных кусков (смещения уже в координатах text)"""
+        if len(documents) == 1:
+            return documents[0]
+        merged = cls(text, offsets(), offsets())
+        for document in documents:
+            for name in cls.__slots__[1:]:
+                getattr(merged, name).extend(getattr(document, name))
+        return merged
+
+    @classmethod
+    def from_sentences(cls, sentences):
+        """Документ из списка предложений, соединённых пробелами; смещения — префиксные суммы длин"""
+        sentence_starts, sentence_ends = offsets(), offsets()
+        position = 0
+        for sentence in sentences:
+            sentence_starts.append(position)
+            position += len(sentence)
+            sentence_ends.append(position)
+            position += 1
+        return cls(' '.join(sentences), sentence_starts, sentence_ends)
+
+    @property
+    def sentence_count(self) -> int:
+        return len(self.sentence_starts)
+
+    @property
+    def entity_count(self) -> int:
+        return len(self.entity_starts)
+
+    @property
+    def word_count(self) -> int:
+        return len(self.token_starts)
+
+    def span(self, start, end) -> Span:
+        return Span(self, start, end)
+
+    def sentence(self, index) -> Span:
+        return Span(self, self.sentence_starts[index], self.sentence_ends[index])
+
+    def sentences(self):
+        for start, end in zip(self.sentence_starts, self.sentence_ends):
+            yield Span(self, start, end)
+
+    def entities(self):
+        for start, end in zip(self.entity_starts, self.entity_ends):
+            yield Span(self, start, end)
+
+    def to_structure(self) -> dict:
+        """Прежний формат extract_structure: списки строк и счётчики"""
+        return {
+            "sentences": [str(span) for span in self.sentences()],
+            "entities": [str(span) for span in self.entities()],
+            "word_count": self.word_count,
+            "sentence_count": self.sentence_count,
+        }
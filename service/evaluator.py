@@ -1,19 +1,87 @@
 # service/evaluator.py
 
+import asyncio
 import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from app.constants import STRUCTURE_MAPPING
-from narr_mod import get_narrative_structure
-from .extractor import extract_structure
-from .converter import convert_to_format
+from config import Config
+from narr_mod import get_structure, registry
+from .extractor import extract_document
+from .converter import BEAT_SPECS, segment
+from .chunking import split_into_chunks
+from .tokens import CHARS_PER_TOKEN, TokenBudget, estimate_tokens
+from .fast_classifier import FastClassifier
+from .metrics import track
+from .tracing import span
 
 logger = logging.getLogger(__name__)
 
+# Обратное отображение: ключ структуры -> название в интерфейсе
+STRUCTURE_NAMES = {key: name for name, key in STRUCTURE_MAPPING.items()}
+
+DEFAULT_STRUCTURE = "Three-Act Structure"
+
+# Ответы классификатора, которые нельзя разрешать через реестр: модуль narr_mod.hero_journey
+# переэкспортирует мономиф Кэмпбелла, а модель под "hero_journey" имеет в виду путь героя Воглера
+CLASSIFICATION_ALIASES = {
+    "hero_journey": "vogler_hero_journey",
+}
+
+# Ошибка в STRUCTURE_MAPPING или BEAT_SPECS обнаруживается при запуске, а не на запросе
+registry.validate(STRUCTURE_MAPPING, BEAT_SPECS)
+
+# Максимальное число повторных свёрток пересказов в map-reduce анализе
+MAX_REDUCE_ROUNDS = 3
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def background_loop():
+    """Общий для процесса event loop в фоновом потоке для синхронного analyze().
+
+    Пул соединений AsyncOllamaClient привязан к loop, поэтому живёт между
+    запросами, а не создаётся и закрывается на каждый вызов asyncio.run.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='evaluator-loop', daemon=True).start()
+            _loop = loop
+        return _loop
+
+
 class NarrativeEvaluator:
-    def __init__(self, llm):
+    def __init__(self, llm, async_llm=None, speculative=None, speculative_candidates=None, fast_classifier=None):
         self.llm = llm
+        self.async_llm = async_llm
+        # fast_classifier=False явно отключает локальный классификатор
+        if fast_classifier is None and Config.FAST_CLASSIFIER_ENABLED:
+            fast_classifier = FastClassifier.load(Config.FAST_CLASSIFIER_PATH)
+        self.fast_classifier = fast_classifier or None
+        self.fast_classifier_threshold = Config.FAST_CLASSIFIER_THRESHOLD
+        self.speculative = Config.SPECULATIVE_ANALYSIS if speculative is None else speculative
+        self.speculative_candidates = (
+            Config.SPECULATIVE_CANDIDATES if speculative_candidates is None else speculative_candidates
+        )
+        self.budget = TokenBudget(
+            context_tokens=Config.LLM_CONTEXT_TOKENS,
+            prompt_tokens_per_sec=Config.LLM_PROMPT_TOKENS_PER_SEC,
+            tokens_per_sec=Config.LLM_TOKENS_PER_SEC,
+        )
+        self.fit_strategy = Config.LLM_FIT_STRATEGY
+        self.chunk_max_chars = Config.CHUNK_MAX_CHARS
+        self.chunk_overlap_chars = Config.CHUNK_OVERLAP_CHARS
+        self.chunk_concurrency = Config.CHUNK_CONCURRENCY
+        # Статистика ответов классификатора для выбора кандидатов на спекулятивный анализ
+        self._classified = Counter()
+        self._classified_lock = threading.Lock()
 
-    def classify(self, text):
-        prompt = f"""Analyze the following text and determine its narrative structure. 
+    def _classification_prompt(self, text):
+        return f"""Analyze the following text and determine its narrative structure. 
         Choose from the following options:
         1. Eight Point Arch (Nigel Watts)
         2. Hero's journey (Chris Vogler)
@@ -25,22 +93,276 @@ class NarrativeEvaluator:
         8. Story Circle (Dan Harmon)
         9. Consistent Approach (Paul Gulino)
 
-        Provide your answer as a single word: "watts_eight_point_arc", "hero_journey", "three_act", "four_act", "monomyth", "soth_story_structure", "harmon_story_circle", "field_paradigm" or "gulino_sequence".
+        Provide your answer as a single word: "watts_eight_point_arc", "vogler_hero_journey", "three_act", "four_act", "campbell_monomyth", "soth_story_structure", "harmon_story_circle", "field_paradigm" or "gulino_sequence".
         If none of these structures fit, return "unknown" - only if there is no REALLY a way to determine the type of structure.
 
         Text: {text}
 
         Structure:"""
-        
-        response = self.llm(prompt)
-        structure = response.strip()
+
+    def _parse_classification(self, response):
+        structure = response.strip().strip('"\'.`').strip()
         
         logger.info(f"Classifier raw response: {structure}")
         
         if structure in STRUCTURE_MAPPING:
             return structure
+        # Промпт просит ответить ключом структуры, а наружу отдаём её название;
+        # синонимы вроде "monomyth" приводятся к ключу зарегистрированной структуры
+        key = structure.lower()
+        key = CLASSIFICATION_ALIASES.get(key, key)
+        if key in registry:
+            key = registry.get(key).key
+        if key in STRUCTURE_NAMES:
+            return STRUCTURE_NAMES[key]
+        return "unknown"
+
+    def _fitted_classification_text(self, text):
+        # Для классификации дробить текст бессмысленно, поэтому вместо chunk берутся выборки
+        strategy = "sample" if self.fit_strategy == "chunk" else self.fit_strategy
+        return self.budget.fit_text(text, "classify", strategy, overhead=self._classification_prompt(""))
+
+    def _fitted_classification_prompt(self, text):
+        return self._classification_prompt(self._fitted_classification_text(text))
+
+    def _fast_classify(self, text):
+        """Ответ локального классификатора, если он достаточно уверен, иначе None.
+
+        Классификатор обучен на тексте из промптов классификации, поэтому получает
+        тот же ужатый под бюджет текст, а не весь сценарий.
+        """
+        if self.fast_classifier is None:
+            return None
+        structure, confidence = self.fast_classifier.predict(self._fitted_classification_text(text))
+        if confidence < self.fast_classifier_threshold:
+            logger.debug(f"Fast classifier unsure ({structure}, {confidence:.2f}), falling back to LLM")
+            return None
+        logger.info(f"Fast classifier: {structure} ({confidence:.2f})")
+        return structure
+
+    def classify(self, text):
+        with track("classify", chars=len(text)) as current:
+            structure = self._fast_classify(text)
+            if structure is not None:
+                current.set(structure=structure, classifier="fast")
+                return structure
+            response = self.llm(self._fitted_classification_prompt(text))
+            structure = self._parse_classification(response)
+            current.set(structure=structure, classifier="llm")
+            return structure
+
+    async def aclassify(self, text):
+        with track("classify", chars=len(text)) as current:
+            if self.fast_classifier is not None:
+                structure = await asyncio.to_thread(self._fast_classify, text)
+                if structure is not None:
+                    current.set(structure=structure, classifier="fast")
+                    return structure
+            response = await self._agenerate(self._fitted_classification_prompt(text))
+            structure = self._parse_classification(response)
+            current.set(structure=structure, classifier="llm")
+            return structure
+
+    def classification_chars(self) -> int:
+        """Сколько символов текста помещается в промпт классификации целиком"""
+        return self.budget.max_chars("classify", self._classification_prompt(""))
+
+    def classify_structure(self, text):
+        """Структура для анализа: ответ классификатора или структура по умолчанию"""
+        return self._resolve_structure(self.classify(text))
+
+    def analyze(self, text, structure=None):
+        """Полный анализ: автоопределение структуры (если не задана) и разбор текста"""
+        return asyncio.run_coroutine_threadsafe(self.aanalyze(text, structure), background_loop()).result()
+
+    async def aanalyze(self, text, structure=None):
+        with span("evaluate", chars=len(text), structure=structure or "Auto-detect") as current:
+            # Текст размечается до обращений к модели: ошибка разбора не тратит время LLM
+            document = await asyncio.to_thread(extract_document, text)
+            if structure and structure != "Auto-detect":
+                result = await self.aanalyze_specific_structure(text, structure, document)
+            elif self.speculative:
+                result = await self._aanalyze_speculative(text, document)
+            else:
+                detected = self._resolve_structure(await self.aclassify(text))
+                result = await self.aanalyze_specific_structure(text, detected, document)
+            current.set(detected_structure=result['structure'])
+
+        result['detected_structure'] = result['structure']
+        result['structure_name'] = result['structure']
+        return result
+
+    def stream_analysis(self, text, structure=None):
+        """Потоковый анализ: генерирует события (event, data) по мере работы модели.
+
+        События: stage (classifying/classified/analyzing), token с очередным
+        фрагментом ответа и result с итоговым результатом, как у analyze().
+        """
+        document = extract_document(text)
+        if not structure or structure == "Auto-detect":
+            yield "stage", {"stage": "classifying"}
+            structure = self._resolve_structure(self.classify(text))
+            yield "stage", {"stage": "classified", "structure": structure}
+
+        if self._needs_chunking(text, structure):
+            yield "stage", {"stage": "summarizing", "structure": structure}
+        prompt = self._prepare_analysis_prompt(text, structure)
+
+        yield "stage", {"stage": "analyzing", "structure": structure}
+        chunks = []
+        with track("analyze", structure=structure, prompt_chars=len(prompt)):
+            for chunk in self._stream(prompt):
+                chunks.append(chunk)
+                yield "token", {"text": chunk}
+
+        result = self._build_result(structure, text, ''.join(chunks), document)
+        result['detected_structure'] = result['structure']
+        result['structure_name'] = result['structure']
+        yield "result", result
+
+    async def astream_analysis(self, text, structure=None):
+        """Асинхронный вариант stream_analysis() с теми же событиями.
+
+        При автоопределении и speculative анализ вероятных структур идёт
+        параллельно с классификацией, как в aanalyze(); токены угаданной
+        структуры отдаются после ответа классификатора.
+        """
+        document = await asyncio.to_thread(extract_document, text)
+        started = None
+        if not structure or structure == "Auto-detect":
+            yield "stage", {"stage": "classifying"}
+            if self.speculative:
+                structure, started = await self._aclassify_speculative_streams(text)
+            else:
+                structure = self._resolve_structure(await self.aclassify(text))
+            yield "stage", {"stage": "classified", "structure": structure}
+
+        if self._needs_chunking(text, structure):
+            yield "stage", {"stage": "summarizing", "structure": structure}
+
+        chunks = []
+        if started is None:
+            prompt = await self._aprepare_analysis_prompt(text, structure)
+            yield "stage", {"stage": "analyzing", "structure": structure}
+            with track("analyze", structure=structure, prompt_chars=len(prompt)):
+                async for chunk in self._astream(prompt):
+                    chunks.append(chunk)
+                    yield "token", {"text": chunk}
+        else:
+            task, queue = started
+            yield "stage", {"stage": "analyzing", "structure": structure}
+            try:
+                while (chunk := await queue.get()) is not None:
+                    chunks.append(chunk)
+                    yield "token", {"text": chunk}
+                await task
+            finally:
+                # Потребитель мог прекратить чтение потока раньше времени
+                task.cancel()
+
+        result = await asyncio.to_thread(self._build_result, structure, text, ''.join(chunks), document)
+        result['detected_structure'] = result['structure']
+        result['structure_name'] = result['structure']
+        yield "result", result
+
+    async def _astream(self, prompt):
+        if self.async_llm is not None and hasattr(self.async_llm, 'astream'):
+            async for chunk in self.async_llm.astream(prompt):
+                yield chunk
         else:
-            return "unknown"
+            yield await self._agenerate(prompt)
+
+    def _stream(self, prompt):
+        if hasattr(self.llm, 'stream'):
+            yield from self.llm.stream(prompt)
+        else:
+            yield self.llm(prompt)
+
+    async def _aanalyze_speculative(self, text, document):
+        # Анализ наиболее вероятных структур стартует одновременно с классификацией;
+        # после ответа классификатора лишние задачи отменяются
+        classify_task = asyncio.create_task(self.aclassify(text))
+        speculative_tasks = {
+            candidate: asyncio.create_task(self.aanalyze_specific_structure(text, candidate, document))
+            for candidate in self._speculation_candidates()
+        }
+
+        try:
+            detected = self._resolve_structure(await classify_task)
+        except BaseException:
+            for task in speculative_tasks.values():
+                task.cancel()
+            raise
+
+        for candidate, task in speculative_tasks.items():
+            if candidate != detected:
+                task.cancel()
+
+        if detected in speculative_tasks:
+            logger.info(f"Speculative analysis hit: {detected}")
+            return await speculative_tasks[detected]
+
+        logger.info(f"Speculative analysis miss: {detected}")
+        return await self.aanalyze_specific_structure(text, detected, document)
+
+    async def _speculative_stream(self, text, structure, queue):
+        """Промпт и поток ответа для structure в очередь queue; None — конец потока"""
+        try:
+            prompt = await self._aprepare_analysis_prompt(text, structure)
+            with track("analyze", structure=structure, prompt_chars=len(prompt)):
+                async for chunk in self._astream(prompt):
+                    queue.put_nowait(chunk)
+        finally:
+            queue.put_nowait(None)
+
+    async def _aclassify_speculative_streams(self, text):
+        """Классификация с потоковым анализом кандидатов; возвращает (структура, (task, queue) или None).
+
+        Ответ кандидата копится в очереди, пока классификатор не подтвердит догадку;
+        остальные кандидаты отменяются.
+        """
+        classify_task = asyncio.create_task(self.aclassify(text))
+        streams = {}
+        for candidate in self._speculation_candidates():
+            queue = asyncio.Queue()
+            streams[candidate] = (asyncio.create_task(self._speculative_stream(text, candidate, queue)), queue)
+
+        try:
+            detected = self._resolve_structure(await classify_task)
+        except BaseException:
+            for task, _ in streams.values():
+                task.cancel()
+            raise
+
+        for candidate, (task, _) in streams.items():
+            if candidate != detected:
+                task.cancel()
+
+        if detected in streams:
+            logger.info(f"Speculative analysis hit: {detected}")
+            return detected, streams[detected]
+        logger.info(f"Speculative analysis miss: {detected}")
+        return detected, None
+
+    def _speculation_candidates(self):
+        with self._classified_lock:
+            ranked = [structure for structure, _ in self._classified.most_common()]
+        if DEFAULT_STRUCTURE not in ranked:
+            ranked.append(DEFAULT_STRUCTURE)
+        return ranked[:max(self.speculative_candidates, 1)]
+
+    def _resolve_structure(self, structure):
+        if structure == "unknown" or structure not in STRUCTURE_MAPPING:
+            structure = DEFAULT_STRUCTURE
+        with self._classified_lock:
+            self._classified[structure] += 1
+        return structure
+
+    async def _agenerate(self, prompt):
+        if self.async_llm is not None:
+            return await self.async_llm(prompt)
+        # Без асинхронного клиента выносим блокирующий вызов из event loop
+        return await asyncio.to_thread(self.llm, prompt)
 
     # def evaluate(self, text, structure_name=None):
     #     if structure_name is None:
@@ -79,11 +401,138 @@ class NarrativeEvaluator:
     #         "raw_structure": structure
     #     }
 
-    def analyze_specific_structure(self, text, structure):
-        prompt = f"Analyze the following text according to the {structure} narrative structure. NEVER try to guess what this script is film from! Provide a detailed breakdown of how the text fits or doesn't fit this structure:\n\n{text}"
-        response = self.llm(prompt)
-        
-        # Преобразование названия структуры в ключ для convert_to_format
+    def _analysis_prompt(self, text, structure):
+        return f"Analyze the following text according to the {structure} narrative structure. NEVER try to guess what this script is film from! Provide a detailed breakdown of how the text fits or doesn't fit this structure:\n\n{text}"
+
+    def _summary_prompt(self, chunk, index, total):
+        return f"""This is part {index} of {total} of a longer script. NEVER try to guess what film this script is from!
+        Summarize the narrative events of this part in order: characters introduced, their goals, conflicts, turning points and how the part ends. Be concise.
+
+        Text: {chunk}
+
+        Summary:"""
+
+    def _merged_analysis_prompt(self, summaries, structure):
+        parts = "\n\n".join(f"Part {i}:\n{summary.strip()}" for i, summary in enumerate(summaries, 1))
+        return f"Analyze the following script according to the {structure} narrative structure. The script is too long to read at once, so it is given as summaries of its consecutive parts. NEVER try to guess what this script is film from! Provide a detailed breakdown of how the script fits or doesn't fit this structure:\n\n{parts}"
+
+    def _needs_chunking(self, text, structure):
+        return self.fit_strategy == "chunk" and not self.budget.fits("analyze", self._analysis_prompt(text, structure))
+
+    def _chunk_chars(self, text):
+        # Фрагмент вместе с промптом пересказа должен помещаться в контекст модели;
+        # плотность токенов берётся из самого текста
+        available = self.budget.available("summarize", self._summary_prompt("", 999, 999))
+        chars_per_token = len(text) / max(estimate_tokens(text), 1)
+        return max(min(self.chunk_max_chars, int(available * chars_per_token)), 1)
+
+    def _summary_prompts(self, text):
+        chunks = split_into_chunks(text, self._chunk_chars(text), self.chunk_overlap_chars)
+        return [self._summary_prompt(chunk, i, len(chunks)) for i, chunk in enumerate(chunks, 1)]
+
+    def _fitted_analysis_prompt(self, text, structure):
+        """Промпт анализа для стратегий truncate и sample, либо None, если нужен map-reduce"""
+        prompt = self._analysis_prompt(text, structure)
+        if self.budget.fits("analyze", prompt):
+            return prompt
+        if self.fit_strategy == "chunk":
+            return None
+        text = self.budget.fit_text(text, "analyze", self.fit_strategy, overhead=self._analysis_prompt("", structure))
+        return self._analysis_prompt(text, structure)
+
+    def _summaries_fit(self, summaries, structure):
+        return len(summaries) == 1 or self.budget.fits("analyze", self._merged_analysis_prompt(summaries, structure))
+
+    def _prepare_analysis_prompt(self, text, structure):
+        """Промпт анализа; длинный текст сначала сворачивается в краткие пересказы частей (map-reduce)"""
+        prompt = self._fitted_analysis_prompt(text, structure)
+        if prompt is not None:
+            return prompt
+
+        summaries = [text]
+        # Если пересказы вместе всё ещё не помещаются в контекст, сворачиваем их повторно
+        for _ in range(MAX_REDUCE_ROUNDS):
+            prompts = self._summary_prompts("\n\n".join(summaries))
+            logger.info(f"Summarizing {len(prompts)} chunks for chunked analysis")
+            with ThreadPoolExecutor(max_workers=min(self.chunk_concurrency, len(prompts))) as pool:
+                summaries = list(pool.map(self.llm, prompts))
+            if self._summaries_fit(summaries, structure):
+                break
+        return self._merged_analysis_prompt(summaries, structure)
+
+    async def _aprepare_analysis_prompt(self, text, structure):
+        prompt = self._fitted_analysis_prompt(text, structure)
+        if prompt is not None:
+            return prompt
+
+        semaphore = asyncio.Semaphore(self.chunk_concurrency)
+
+        async def summarize(prompt):
+            async with semaphore:
+                return await self._agenerate(prompt)
+
+        summaries = [text]
+        for _ in range(MAX_REDUCE_ROUNDS):
+            prompts = self._summary_prompts("\n\n".join(summaries))
+            logger.info(f"Summarizing {len(prompts)} chunks for chunked analysis")
+            summaries = await asyncio.gather(*(summarize(prompt) for prompt in prompts))
+            if self._summaries_fit(summaries, structure):
+                break
+        return self._merged_analysis_prompt(summaries, structure)
+
+    def estimate(self, text, structure=None):
+        """Оценка токенов и задержки по этапам без обращения к модели"""
+        stages = []
+        if not structure or structure == "Auto-detect":
+            fit = None if self.budget.fits("classify", self._classification_prompt(text)) else (
+                "sample" if self.fit_strategy == "chunk" else self.fit_strategy
+            )
+            prompt_tokens = estimate_tokens(self._fitted_classification_prompt(text))
+            stages.append(self.budget.stage_estimate("classify", prompt_tokens, fit=fit))
+            structure = DEFAULT_STRUCTURE
+
+        prompt = self._fitted_analysis_prompt(text, structure)
+        if prompt is not None:
+            fit = None if prompt == self._analysis_prompt(text, structure) else self.fit_strategy
+            stages.append(self.budget.stage_estimate("analyze", estimate_tokens(prompt), fit=fit))
+        else:
+            # Пересказы заменяются заглушками ожидаемой длины
+            summary = "x" * (self.budget.expected_output("summarize") * CHARS_PER_TOKEN)
+            source = text
+            for round_number in range(1, MAX_REDUCE_ROUNDS + 1):
+                prompts = self._summary_prompts(source)
+                average = sum(estimate_tokens(p) for p in prompts) // len(prompts)
+                stage = self.budget.stage_estimate(
+                    "summarize", average, calls=len(prompts), concurrency=self.chunk_concurrency, fit="chunk"
+                )
+                stage["round"] = round_number
+                stages.append(stage)
+                summaries = [summary] * len(prompts)
+                if self._summaries_fit(summaries, structure):
+                    break
+                source = "\n\n".join(summaries)
+            merged = self._merged_analysis_prompt(summaries, structure)
+            stages.append(self.budget.stage_estimate("analyze", estimate_tokens(merged), fit="chunk"))
+
+        narrative_structure = get_structure(STRUCTURE_MAPPING.get(structure, "three_act"))
+        if narrative_structure.calls_llm_double_check:
+            # Промпт перепроверки включает исходную структуру, то есть весь текст
+            prompt_tokens = estimate_tokens(narrative_structure.double_check_prompt()) + estimate_tokens(text)
+            stages.append(self.budget.stage_estimate("double_check", prompt_tokens))
+
+        return {
+            "structure": structure,
+            "strategy": self.fit_strategy,
+            "context_tokens": self.budget.context_tokens,
+            "input_tokens": estimate_tokens(text),
+            "stages": stages,
+            "prompt_tokens": sum(stage["prompt_tokens"] for stage in stages),
+            "output_tokens": sum(stage["output_tokens"] for stage in stages),
+            "estimated_seconds": round(sum(stage["estimated_seconds"] for stage in stages), 2),
+        }
+
+    def _build_result(self, structure, text, response, document=None):
+        # Преобразование названия структуры в ключ для сегментации
         structure_key = STRUCTURE_MAPPING.get(structure)
         
         if not structure_key:
@@ -91,17 +540,42 @@ class NarrativeEvaluator:
             structure_key = "three_act"
             structure = "Three-Act Structure"
 
-        NarrativeStructureClass = get_narrative_structure(structure_key)
-        narrative_structure = NarrativeStructureClass()
+        narrative_structure = get_structure(structure_key)
         
-        formatted_structure = convert_to_format(response, structure_key)
-        structure_analysis = narrative_structure.analyze(formatted_structure)
-        visualization = narrative_structure.visualize(structure_analysis)
+        # Биты структуры строятся по предложениям исходного текста, а не по ответу модели;
+        # анализаторы narr_mod получают участки документа без копирования текста
+        if document is None:
+            document = extract_document(text)
+        with track("convert", structure=structure_key):
+            segmentation = segment(document, structure_key)
+            with span("narr_mod.analyze", structure=structure_key):
+                structure_analysis = narrative_structure.analyze(segmentation)
+        with track("visualize", structure=structure_key):
+            visualization = narrative_structure.visualize(structure_analysis)
         
         return {
             "structure": structure,
             "analysis": response,
-            "formatted_structure": formatted_structure,
+            "formatted_structure": segmentation.to_dict(),
             "structure_analysis": structure_analysis,
             "visualization": visualization
         }
+
+    def analyze_specific_structure(self, text, structure, document=None):
+        if document is None:
+            document = extract_document(text)
+        with span("prepare_prompt", chars=len(text), structure=structure):
+            prompt = self._prepare_analysis_prompt(text, structure)
+        with track("analyze", structure=structure, prompt_chars=len(prompt)):
+            response = self.llm(prompt)
+        return self._build_result(structure, text, response, document)
+
+    async def aanalyze_specific_structure(self, text, structure, document=None):
+        if document is None:
+            document = await asyncio.to_thread(extract_document, text)
+        with span("prepare_prompt", chars=len(text), structure=structure):
+            prompt = await self._aprepare_analysis_prompt(text, structure)
+        with track("analyze", structure=structure, prompt_chars=len(prompt)):
+            response = await self._agenerate(prompt)
+        # Разбор текста spaCy и сегментация занимают процессор, поэтому выполняются вне event loop
+        return await asyncio.to_thread(self._build_result, structure, text, response, document)
@@ -0,0 +1,377 @@
+# service/extraction.py
+
+import logging
+import multiprocessing
+import os
+import platform
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import zipfile
+from codecs import getincrementaldecoder, lookup
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO, StringIO
+from xml.etree import ElementTree
+
+from config import Config
+from .metrics import EXTRACTION_SECONDS, track
+
+logger = logging.getLogger(__name__)
+
+
+
+class ExtractionError(ValueError):
+    """Ошибка извлечения текста, о которой нужно сообщить клиенту"""
+
+
+# Не больше DOC_HELPER_CONCURRENCY одновременных процессов antiword/textutil
+_doc_helper_slots = threading.BoundedSemaphore(Config.DOC_HELPER_CONCURRENCY)
+
+
+def extract_doc_text(file_path):
+    """Извлечение текста из .doc файла внешней утилитой с ограничением времени"""
+    if platform.system() == 'Darwin':  # MacOS
+        command = ['textutil', '-convert', 'txt', '-stdout', file_path]
+    else:  # Linux/Unix
+        command = ['antiword', file_path]
+
+    with _doc_helper_slots:
+        try:
+            result = subprocess.run(command, capture_output=True, timeout=Config.DOC_HELPER_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            raise ExtractionError(f"{command[0]} did not finish in {Config.DOC_HELPER_TIMEOUT} seconds")
+        except FileNotFoundError:
+            raise ExtractionError(f"{command[0]} is not installed, .doc files cannot be read")
+    return result.stdout.decode('utf-8', errors='replace') if result.returncode == 0 else None
+
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+def extract_docx_text(file):
+    """Текст .docx: word/document.xml разбирается потоково, абзацы очищаются сразу после чтения"""
+    parts = []
+    with zipfile.ZipFile(file) as archive, archive.open('word/document.xml') as xml:
+        for _, element in ElementTree.iterparse(xml, events=('end',)):
+            tag = element.tag
+            if tag == _W + 't':
+                parts.append(element.text or '')
+            elif tag == _W + 'tab':
+                parts.append('\t')
+            elif tag == _W + 'br' or tag == _W + 'cr':
+                parts.append('\n')
+            elif tag == _W + 'p':
+                parts.append('\n')
+                element.clear()
+    return ''.join(parts)
+
+
+_RTF_TOKEN = re.compile(r"\\([a-zA-Z]+)(-?\d+)? ?|\\'([0-9a-fA-F]{2})|\\(.)|([{}])|[\r\n]+|([^\\{}\r\n]+)", re.DOTALL)
+
+# Служебные группы RTF, текст которых не относится к документу
+_RTF_DESTINATIONS = frozenset((
+    'fonttbl', 'colortbl', 'stylesheet', 'info', 'pict', 'object', 'objdata', 'fldinst',
+    'header', 'headerl', 'headerr', 'headerf', 'footer', 'footerl', 'footerr', 'footerf',
+    'themedata', 'colorschememapping', 'datastore', 'latentstyles', 'listtable',
+    'listoverridetable', 'rsidtbl', 'generator', 'xmlnstbl', 'filetbl', 'revtbl', 'mmathPr',
+))
+
+_RTF_CHARACTERS = {
+    'par': '\n', 'line': '\n', 'sect': '\n', 'page': '\n', 'row': '\n', 'cell': '\t', 'tab': '\t',
+    'emdash': '\u2014', 'endash': '\u2013', 'bullet': '\u2022',
+    'lquote': '\u2018', 'rquote': '\u2019', 'ldblquote': '\u201c', 'rdblquote': '\u201d',
+}
+
+_RTF_SYMBOLS = {'~': '\xa0', '_': '-', '{': '{', '}': '}', '\\': '\\', '\n': '\n', '\r': '\n'}
+
+
+def _codepage(number, default):
+    try:
+        return lookup(f"cp{number}").name
+    except LookupError:
+        return default
+
+
+def extract_rtf_text(file):
+    """Текст .rtf без внешних утилит: служебные группы пропускаются,
+    \\'hh декодируются по \\ansicpg, \\uN — с пропуском \\ucN замещающих символов"""
+    data = file.read().decode('latin-1')
+    codepage = 'cp1252'
+    stack = []
+    skip = False
+    uc = 1
+    fallback = 0
+    pending = bytearray()
+    out = []
+
+    for match in _RTF_TOKEN.finditer(data):
+        word, argument, hexcode, symbol, brace, text = match.groups()
+        if pending and hexcode is None:
+            out.append(pending.decode(codepage, errors='replace'))
+            pending.clear()
+
+        if brace == '{':
+            stack.append((skip, uc))
+        elif brace == '}':
+            if stack:
+                skip, uc = stack.pop()
+            fallback = 0
+        elif word is not None:
+            if word in _RTF_DESTINATIONS:
+                skip = True
+            elif word == 'ansicpg' and argument:
+                codepage = _codepage(argument, codepage)
+            elif word == 'uc' and argument:
+                uc = int(argument)
+            elif skip:
+                continue
+            elif word == 'u' and argument:
+                out.append(chr(int(argument) % 0x10000))
+                fallback = uc
+            elif word in _RTF_CHARACTERS:
+                out.append(_RTF_CHARACTERS[word])
+        elif symbol is not None:
+            if symbol == '*':
+                skip = True
+            elif not skip and symbol in _RTF_SYMBOLS:
+                out.append(_RTF_SYMBOLS[symbol])
+        elif hexcode is not None:
+            if fallback:
+                fallback -= 1
+            elif not skip:
+                pending.append(int(hexcode, 16))
+        elif text is not None and not skip:
+            if fallback:
+                dropped = min(fallback, len(text))
+                text = text[dropped:]
+                fallback -= dropped
+            if not text.isascii():
+                text = text.encode('latin-1').decode(codepage, errors='replace')
+            out.append(text)
+
+    if pending:
+        out.append(pending.decode(codepage, errors='replace'))
+    return ''.join(out)
+
+
+# pdfminer импортируется внутри функций: модуль нужен и там, где PDF не разбираются
+# (Telegram-бот с текстом, batch.py до первого файла)
+def _laparams(fast):
+    from pdfminer.layout import LAParams
+
+    if fast:
+        # Быстрый режим для PDF с обычным текстом в одну колонку: без иерархической
+        # группировки блоков (boxes_flow), самой дорогой части анализа разметки
+        return LAParams(boxes_flow=None, detect_vertical=False, all_texts=False)
+    return LAParams()
+
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _pool_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _get_pdf_pool(workers):
+    """Общий пул процессов для PDF; создаётся при первом большом файле"""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            logger.info(f"Starting PDF extraction pool with {workers} workers")
+            # Пул создаётся в многопоточном процессе (Flask, event loop анализа), а fork копирует
+            # удерживаемые другими потоками блокировки; forkserver запускает процессы из чистого сервера
+            _pdf_pool = ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context())
+        return _pdf_pool
+
+
+def pdf_page_count(data) -> int:
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdftypes import resolve1
+
+    document = PDFDocument(PDFParser(BytesIO(data)))
+    count = resolve1(resolve1(document.catalog.get('Pages')) or {}).get('Count')
+    if isinstance(count, int):
+        return count
+    return sum(1 for _ in PDFPage.create_pages(document))
+
+
+def _pdf_page_texts(data, start, stop, fast=False):
+    """Тексты страниц [start, stop) по одной, в порядке следования"""
+    from pdfminer.converter import TextConverter
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    resource_manager = PDFResourceManager(caching=True)
+    output = StringIO()
+    converter = TextConverter(resource_manager, output, laparams=_laparams(fast))
+    interpreter = PDFPageInterpreter(resource_manager, converter)
+    try:
+        pages = PDFPage.get_pages(BytesIO(data), pagenos=range(start, stop), maxpages=stop,
+                                  caching=True, check_extractable=True)
+        for page in pages:
+            interpreter.process_page(page)
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+    finally:
+        converter.close()
+        output.close()
+
+
+def extract_pdf_pages(data, start, stop, fast=False):
+    """Выполняется в процессе пула: тексты страниц диапазона одним списком"""
+    return list(_pdf_page_texts(data, start, stop, fast))
+
+
+def _pdf_batches(data, page_count, fast, workers, pages_per_task):
+    """Списки текстов страниц по порядку. Диапазоны страниц обрабатываются в пуле процессов,
+    в работе одновременно не больше двух диапазонов на процесс."""
+    # Внутри процесса пула (например, batch.py) второй пул не создаём
+    if workers <= 1 or page_count <= pages_per_task or multiprocessing.parent_process() is not None:
+        for text in _pdf_page_texts(data, 0, page_count, fast):
+            yield [text]
+        return
+
+    pool = _get_pdf_pool(workers)
+    ranges = deque((start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task))
+    pending = deque()
+    try:
+        while ranges or pending:
+            while ranges and len(pending) < workers * 2:
+                pending.append(pool.submit(extract_pdf_pages, data, *ranges.popleft(), fast))
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def iter_pdf_pages(file, fast=None, max_pages=None, max_chars=None, workers=None):
+    """Тексты страниц PDF по мере извлечения.
+
+    file — файловый объект или bytes. fast — облегчённый анализ разметки
+    (по умолчанию Config.PDF_FAST_MODE). max_pages и max_chars ограничивают
+    объём текста (0 — без ограничения); лишние страницы не обрабатываются.
+    """
+    data = file if isinstance(file, bytes) else file.read()
+    fast = Config.PDF_FAST_MODE if fast is None else fast
+    max_pages = Config.PDF_MAX_PAGES if max_pages is None else max_pages
+    max_chars = Config.PDF_MAX_CHARS if max_chars is None else max_chars
+    workers = Config.PDF_WORKERS if workers is None else workers
+
+    page_count = pdf_page_count(data)
+    if max_pages and page_count > max_pages:
+        logger.warning(f"PDF has {page_count} pages, extracting the first {max_pages}")
+        page_count = max_pages
+
+    chars = 0
+    batches = _pdf_batches(data, page_count, fast, workers, Config.PDF_PAGES_PER_TASK)
+    try:
+        for texts in batches:
+            for text in texts:
+                if max_chars and chars + len(text) >= max_chars:
+                    logger.warning(f"PDF text exceeds {max_chars} characters, truncating")
+                    yield text[:max_chars - chars]
+                    return
+                chars += len(text)
+                yield text
+    finally:
+        batches.close()
+
+
+def extract_text_from_pdf_miner(file):
+    return ''.join(iter_pdf_pages(file))
+
+
+# Размер блока при чтении загруженных файлов
+READ_BLOCK_SIZE = 64 * 1024
+
+
+def extract_text_from_txt(file):
+    """Извлечение текста из TXT файла.
+
+    Файл декодируется блоками, поэтому в памяти не лежат одновременно
+    все байты файла и весь текст.
+    """
+    decoder = getincrementaldecoder('utf-8')()
+    parts = [decoder.decode(block) for block in iter(lambda: file.read(READ_BLOCK_SIZE), b"")]
+    parts.append(decoder.decode(b"", final=True))
+    return ''.join(parts)
+
+
+def spool_upload(file):
+    """Копия загруженного файла во временном файле: в памяти до Config.UPLOAD_SPOOL_BYTES, дальше на диске"""
+    spool = tempfile.SpooledTemporaryFile(max_size=Config.UPLOAD_SPOOL_BYTES)
+    shutil.copyfileobj(file, spool, READ_BLOCK_SIZE)
+    spool.seek(0)
+    return spool
+
+
+def extract_legacy_doc(file):
+    """Текст .doc. Файлы RTF и DOCX с расширением .doc разбираются в процессе,
+    для настоящего Word 97-2003 вызывается antiword (textutil на macOS)."""
+    head = file.read(8)
+    file.seek(0)
+    if head.startswith(b'{\\rtf'):
+        return extract_rtf_text(file)
+    if head.startswith(b'PK\x03\x04'):
+        return extract_docx_text(file)
+
+    # Уникальное имя: одновременные загрузки одноимённых файлов не мешают друг другу
+    os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
+    fd, file_path = tempfile.mkstemp(suffix='.doc', dir=Config.UPLOAD_FOLDER)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            shutil.copyfileobj(file, f, READ_BLOCK_SIZE)
+        return extract_doc_text(file_path)
+    finally:
+        os.remove(file_path)
+
+
+# Извлечение текста по расширению файла; общий диспетчер для веб-приложения,
+# Telegram-бота и batch.py
+EXTRACTORS = {
+    '.txt': extract_text_from_txt,
+    '.pdf': extract_text_from_pdf_miner,
+    '.doc': extract_legacy_doc,
+    '.docx': extract_docx_text,
+    '.rtf': extract_rtf_text,
+}
+
+# Расширения файлов, из которых умеем извлекать текст
+SUPPORTED_EXTENSIONS = tuple(EXTRACTORS)
+
+
+def extract_uploaded_text(filename, file):
+    """Извлечение текста из загруженного файла по его расширению"""
+    # Расширение берётся из исходного имени: secure_filename отбрасывает кириллицу
+    # и превращает «сценарий.pdf» в «pdf», а на диск имя файла не попадает
+    file_extension = os.path.splitext(filename)[1].lower()
+    extractor = EXTRACTORS.get(file_extension)
+    if extractor is None:
+        logger.error(f"Unsupported file type: {file_extension}")
+        raise ExtractionError("Unsupported file type")
+
+    file_format = file_extension[1:]
+    try:
+        with track("extract", format=file_format) as current, EXTRACTION_SECONDS.time(format=file_format):
+            text = extractor(file)
+            current.set(chars=len(text or ''))
+    except ExtractionError:
+        raise
+    except Exception as e:
+        logger.error(f"Error extracting text from {file_extension} file: {str(e)}")
+        raise ExtractionError(f"Ошибка при обработке {file_extension[1:].upper()} файла: {str(e)}")
+
+    if not text or not text.strip():
+        logger.warning(f"No text extracted from {file_extension} file")
+        raise ExtractionError("No text could be extracted from form or file")
+    logger.debug(f"Text extracted from {file_extension} file, length {len(text)}")
+    return text
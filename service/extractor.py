@@ -1,21 +1,29 @@
 # service/extractor.py
 
-import spacy
-
-nlp = spacy.load("en_core_web_sm")
-
-def extract_structure(text):
-    doc = nlp(text)
-    
-    # Простой пример извлечения структуры
-    sentences = [sent.text for sent in doc.sents]
-    entities = [ent.text for ent in doc.ents]
-    
-    structure = {
-        "sentences": sentences,
-        "entities": entities,
-        "word_count": len(doc),
-        "sentence_count": len(sentences)
-    }
-    
-    return structure
+from .metrics import track
+from .segmenters import get_segmenter
+
+
+def extract_document(text, backend=None):
+    """Document с границами предложений, сущностей и токенов; backend — имя бэкенда из service.segmenters"""
+    segmenter = get_segmenter(backend)
+    with track("segment", chars=len(text), segmenter=segmenter.name) as current:
+        document = segmenter.segment(text)
+        current.set(sentences=document.sentence_count, words=document.word_count)
+        return document
+
+
+def extract_documents(texts, backend=None, batch_size=None):
+    """Пакетный вариант extract_document: тексты проходят через модель одним потоком"""
+    segmenter = get_segmenter(backend)
+    with track("segment", segmenter=segmenter.name):
+        return list(segmenter.segment_many(texts, batch_size=batch_size))
+
+
+def extract_structure(text, backend=None):
+    """Предложения, сущности и счётчики текста в виде словаря со списками строк"""
+    return extract_document(text, backend).to_structure()
+
+
+def extract_structures(texts, backend=None, batch_size=None):
+    return [document.to_structure() for document in extract_documents(texts, backend, batch_size)]
@@ -0,0 +1,214 @@
+# service/fast_classifier.py
+
+import argparse
+import json
+import logging
+import math
+import os
+import re
+
+from config import Config
+from .extractor import extract_document
+
+logger = logging.getLogger(__name__)
+
+# Лексические маркеры, характерные для описаний каждой структуры
+STRUCTURE_CUES = {
+    "watts_eight_point_arc": ["stasis", "trigger", "quest", "surprise", "critical choice", "climax", "reversal"],
+    "vogler_hero_journey": ["ordinary world", "mentor", "threshold", "allies", "enemies", "ordeal", "reward", "road back", "resurrection", "elixir"],
+    "four_act": ["act 4", "act four", "fourth act", "complication", "development"],
+    "field_paradigm": ["plot point", "pinch", "midpoint", "setup", "confrontation"],
+    "three_act": ["act 1", "act 2", "act 3", "act one", "act two", "act three", "resolution"],
+    "monomyth": ["call to adventure", "supernatural aid", "belly of the whale", "goddess", "temptress", "atonement", "apotheosis", "boon", "magic flight"],
+    "soth_story_structure": ["antagonist", "locked in", "new plan", "final battle", "equilibrium"],
+    "harmon_story_circle": ["comfort zone", "need", "search", "find", "take", "return", "change"],
+    "gulino_sequence": ["sequence", "goal", "mystery", "curiosity", "all is lost", "twist", "stakes"],
+}
+
+_CUE_PATTERNS = {
+    key: re.compile(r'\b(?:' + '|'.join(re.escape(cue) for cue in cues) + r')\b')
+    for key, cues in STRUCTURE_CUES.items()
+}
+_SCENE_HEADING = re.compile(r'^[ \t]*(?:INT\.|EXT\.)', re.MULTILINE)
+
+# Текст классифицируемого сценария внутри промпта NarrativeEvaluator.classify
+_CLASSIFICATION_PROMPT = re.compile(
+    r'^Analyze the following text and determine its narrative structure\..*?\n\s*Text: (.*)\n\n\s*Structure:$',
+    re.DOTALL,
+)
+
+
+def extract_features(text, document=None) -> dict:
+    """Признаки текста: размеры, плотность сущностей и лексические маркеры структур"""
+    if document is None:
+        document = extract_document(text)
+    words = max(document.word_count, 1)
+    sentences = max(document.sentence_count, 1)
+    lowered = text.lower()
+
+    features = {
+        "log_words": math.log1p(words),
+        "log_sentences": math.log1p(sentences),
+        "words_per_sentence": words / sentences,
+        "entity_density": document.entity_count / words,
+        "scene_density": len(_SCENE_HEADING.findall(text)) * 1000 / words,
+        "dialogue_density": text.count('"') * 1000 / words,
+    }
+    for key, pattern in _CUE_PATTERNS.items():
+        features[f"cue_{key}"] = len(pattern.findall(lowered)) * 1000 / words
+    return features
+
+
+class FastClassifier:
+    """Мультиклассовая логистическая регрессия поверх extract_features"""
+
+    def __init__(self, labels, feature_names, means, scales, weights, biases):
+        self.labels = labels
+        self.feature_names = feature_names
+        self.means = means
+        self.scales = scales
+        self.weights = weights
+        self.biases = biases
+
+    def _vector(self, features):
+        return [
+            (features.get(name, 0.0) - mean) / scale
+            for name, mean, scale in zip(self.feature_names, self.means, self.scales)
+        ]
+
+    def _probabilities(self, vector):
+        scores = [
+            bias + sum(w * x for w, x in zip(weights, vector))
+            for weights, bias in zip(self.weights, self.biases)
+        ]
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        total = sum(exps)
+        return [value / total for value in exps]
+
+    def predict(self, text, document=None):
+        """Возвращает (структура, уверенность)"""
+        return self.predict_features(extract_features(text, document))
+
+    def predict_features(self, features):
+        probabilities = self._probabilities(self._vector(features))
+        best = max(range(len(self.labels)), key=probabilities.__getitem__)
+        return self.labels[best], probabilities[best]
+
+    @classmethod
+    def train(cls, examples, epochs=300, learning_rate=0.5, l2=0.001):
+        """Обучение на парах (features, label) полным градиентным спуском"""
+        labels = sorted({label for _, label in examples})
+        if len(labels) < 2:
+            raise ValueError("Need at least two distinct structures to train the classifier")
+
+        feature_names = sorted({name for features, _ in examples for name in features})
+        columns = [[features.get(name, 0.0) for features, _ in examples] for name in feature_names]
+        means = [sum(column) / len(column) for column in columns]
+        scales = [
+            math.sqrt(sum((x - mean) ** 2 for x in column) / len(column)) or 1.0
+            for column, mean in zip(columns, means)
+        ]
+
+        model = cls(
+            labels,
+            feature_names,
+            means,
+            scales,
+            [[0.0] * len(feature_names) for _ in labels],
+            [0.0] * len(labels),
+        )
+        vectors = [model._vector(features) for features, _ in examples]
+        targets = [labels.index(label) for _, label in examples]
+
+        for _ in range(epochs):
+            weight_grads = [[0.0] * len(feature_names) for _ in labels]
+            bias_grads = [0.0] * len(labels)
+            for i in range(len(vectors)):
+                probabilities = model._probabilities(vectors[i])
+                for k, p in enumerate(probabilities):
+                    error = p - (1.0 if k == targets[i] else 0.0)
+                    bias_grads[k] += error
+                    row = weight_grads[k]
+                    for j, x in enumerate(vectors[i]):
+                        row[j] += error * x
+            n = len(vectors)
+            for k in range(len(labels)):
+                model.biases[k] -= learning_rate * bias_grads[k] / n
+                for j in range(len(feature_names)):
+                    grad = weight_grads[k][j] / n + l2 * model.weights[k][j]
+                    model.weights[k][j] -= learning_rate * grad
+        return model
+
+    def to_dict(self) -> dict:
+        return {
+            "labels": self.labels,
+            "feature_names": self.feature_names,
+            "means": self.means,
+            "scales": self.scales,
+            "weights": self.weights,
+            "biases": self.biases,
+        }
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        """Загружает модель; если файла нет, возвращает None"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Failed to load fast classifier from {path}: {e}")
+            return None
+
+
+def classification_examples(cache, parse):
+    """Пары (текст, структура) из закэшированных ответов LLM-классификатора.
+
+    parse — функция разбора ответа модели (NarrativeEvaluator._parse_classification);
+    ответы "unknown" пропускаются.
+    """
+    for entry in cache.entries():
+        match = _CLASSIFICATION_PROMPT.match(entry.get("prompt") or "")
+        if not match:
+            continue
+        label = parse(entry["response"])
+        if label != "unknown":
+            yield match.group(1), label
+
+
+def train_from_cache(cache, parse, path, min_samples=20):
+    examples = [(extract_features(text), label) for text, label in classification_examples(cache, parse)]
+    if len(examples) < min_samples:
+        raise ValueError(f"Only {len(examples)} cached classifications found, need at least {min_samples}")
+
+    model = FastClassifier.train(examples)
+    correct = sum(model.predict_features(features)[0] == label for features, label in examples)
+    model.save(path)
+    return model, len(examples), correct / len(examples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local structure classifier from cached LLM classifications")
+    parser.add_argument('command', choices=['train'])
+    parser.add_argument('--output', default=Config.FAST_CLASSIFIER_PATH)
+    parser.add_argument('--min-samples', type=int, default=Config.FAST_CLASSIFIER_MIN_SAMPLES)
+    args = parser.parse_args()
+
+    from .evaluator import NarrativeEvaluator
+    from .llm import get_llm_cache
+
+    parse = NarrativeEvaluator(llm=None)._parse_classification
+    model, samples, accuracy = train_from_cache(get_llm_cache(), parse, args.output, args.min_samples)
+    print(f"Trained on {samples} examples, {len(model.labels)} structures, training accuracy {accuracy:.2%}")
+    print(f"Saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
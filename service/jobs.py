@@ -0,0 +1,133 @@
+# service/jobs.py
+
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    """Очередь фоновых задач заполнена"""
+
+
+class Job:
+    def __init__(self, payload):
+        self.id = uuid.uuid4().hex
+        self.payload = payload
+        self.status = "queued"
+        self.stage = None
+        self.stages = OrderedDict()
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def start_stage(self, name, **info):
+        with self._lock:
+            self.stage = name
+            self.stages[name] = {"status": "running", "started": time.time(), **info}
+
+    def update_stage(self, name, **info):
+        with self._lock:
+            self.stages.setdefault(name, {"status": "running", "started": time.time()}).update(info)
+
+    def finish_stage(self, name, **info):
+        with self._lock:
+            stage = self.stages.setdefault(name, {"started": time.time()})
+            stage.update(info, status="done", finished=time.time())
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            data = {
+                "job_id": self.id,
+                "status": self.status,
+                "stage": self.stage,
+                "stages": {name: dict(info) for name, info in self.stages.items()},
+                "created": self.created,
+                "started": self.started,
+                "finished": self.finished,
+            }
+        if self.status == "done":
+            data["result"] = self.result
+        elif self.status == "failed":
+            data["error"] = self.error
+        return data
+
+
+class JobManager:
+    """Ограниченная очередь задач и пул рабочих потоков, выполняющих handler(job)"""
+
+    def __init__(self, handler, workers=2, queue_size=32, retention=1000):
+        self.handler = handler
+        self.workers = workers
+        self.retention = retention
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def submit(self, payload) -> Job:
+        job = Job(payload)
+        self._ensure_workers()
+        with self._lock:
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise JobQueueFull(f"Job queue is full ({self._queue.maxsize} jobs waiting)")
+            self._jobs[job.id] = job
+            self._prune()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self._queue.maxsize,
+            "running": statuses.count("running"),
+        }
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            job.status = "running"
+            job.started = time.time()
+            try:
+                job.result = self.handler(job)
+                job.status = "done"
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {str(e)}")
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                job.finished = time.time()
+                job.payload = None
+                self._queue.task_done()
+
+    def _prune(self):
+        # Храним не больше retention задач, удаляя самые старые завершённые
+        excess = len(self._jobs) - self.retention
+        if excess <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished][:excess]:
+            del self._jobs[job_id]
@@ -1,16 +1,60 @@
 # service/llm.py
 
-from langchain.llms import Ollama
-from langchain.callbacks.manager import CallbackManager
-from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
+from config import Config
+from .cache import LLMCache, CachedLLM
+from .async_llm import AsyncOllamaClient
+from .metrics import MeteredLLM
+
+_cache = None
+
+
+def get_llm_cache():
+    """Общий для процесса кэш ответов LLM"""
+    global _cache
+    if _cache is None:
+        _cache = LLMCache(
+            cache_dir=Config.LLM_CACHE_DIR,
+            memory_items=Config.LLM_CACHE_MEMORY_ITEMS,
+            disk_max_bytes=Config.LLM_CACHE_DISK_MAX_BYTES,
+            ttl=Config.LLM_CACHE_TTL,
+        )
+    return _cache
+
+
+def initialize_llm(use_cache=None):
+    # langchain импортируется дольше всего остального приложения, поэтому только здесь
+    from langchain.llms import Ollama
+    from langchain.callbacks.manager import CallbackManager
+    from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 
-def initialize_llm():
     callback_manager = CallbackManager([StreamingStdOutCallbackHandler()])
     
     llm = Ollama(
-        model="llama3.2",  # Используем модель llama3.2
+        model=Config.LLM_MODEL,  # По умолчанию llama3.2
+        num_ctx=Config.LLM_CONTEXT_TOKENS,
         callback_manager=callback_manager,
         verbose=True
     )
+    # Счётчики токенов учитывают только запросы, дошедшие до модели, а не ответы из кэша
+    llm = MeteredLLM(llm)
+
+    if use_cache is None:
+        use_cache = Config.LLM_CACHE_ENABLED
+    if use_cache:
+        llm = CachedLLM(llm, get_llm_cache())
     
     return llm
+
+
+def initialize_async_llm(use_cache=None):
+    """Асинхронный клиент Ollama для корутин NarrativeEvaluator"""
+    if use_cache is None:
+        use_cache = Config.LLM_CACHE_ENABLED
+
+    return AsyncOllamaClient(
+        model=Config.LLM_MODEL,
+        max_connections=Config.LLM_MAX_CONNECTIONS,
+        timeout=Config.LLM_TIMEOUT,
+        options={"num_ctx": Config.LLM_CONTEXT_TOKENS},
+        cache=get_llm_cache() if use_cache else None,
+    )
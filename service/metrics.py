@@ -0,0 +1,287 @@
+# service/metrics.py
+"""Метрики процесса в текстовом формате Prometheus.
+
+Счётчики, gauge и гистограммы с метками хранятся в памяти процесса;
+render() отдаёт их для /metrics веб-приложения, start_metrics_server() —
+для процессов без Flask (Telegram-бот).
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .tokens import estimate_tokens
+from .tracing import current_span, span
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Границы гистограмм длительности, секунды: от разбора короткого текста до анализа длинного сценария
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def samples(self):
+        """Пары (суффикс имени, значения меток, доп. метки, значение)"""
+        with self._lock:
+            return [('', key, (), value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labels, key, extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels=(), function=None):
+        super().__init__(name, documentation, labels)
+        # Значение без меток, вычисляемое при каждом чтении
+        self.function = function
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        if self.function is not None:
+            return [('', (), (), self.function())]
+        return super().samples()
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Счётчики по корзинам (последняя — +Inf), сумма и количество
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            states = [(key, list(state[0]), state[1], state[2]) for key, state in self._values.items()]
+        samples = []
+        for key, counts, total, count in states:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket
+                samples.append(('_bucket', key, (('le', _format_value(float(bound))),), cumulative))
+            samples.append(('_sum', key, (), total))
+            samples.append(('_count', key, (), count))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+# Этапы анализа: extract (текст из файла), segment (spaCy), classify, analyze (LLM),
+# convert (разбиение на биты), visualize
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "narrative_stage_duration_seconds", "Duration of analysis pipeline stages", ["stage"]))
+STAGE_IN_FLIGHT = REGISTRY.register(Gauge(
+    "narrative_stage_in_flight", "Pipeline stages currently running", ["stage"]))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    "narrative_stage_errors_total", "Pipeline stages that raised an error", ["stage"]))
+EXTRACTION_SECONDS = REGISTRY.register(Histogram(
+    "narrative_extraction_duration_seconds", "Text extraction duration by file format", ["format"]))
+
+LLM_REQUESTS = REGISTRY.register(Counter(
+    "narrative_llm_requests_total", "LLM generation requests sent to the backend", ["mode"]))
+LLM_PROMPT_TOKENS = REGISTRY.register(Counter(
+    "narrative_llm_prompt_tokens_total", "Prompt tokens sent to the LLM"))
+LLM_COMPLETION_TOKENS = REGISTRY.register(Counter(
+    "narrative_llm_completion_tokens_total", "Completion tokens generated by the LLM"))
+LLM_TOKENS_PER_SECOND = REGISTRY.register(Histogram(
+    "narrative_llm_tokens_per_second", "Completion tokens per second of LLM generations",
+    buckets=(1, 2, 5, 10, 20, 35, 50, 75, 100, 150, 250)))
+
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "narrative_llm_cache_lookups_total", "LLM response cache lookups", ["result"]))
+
+
+def _cache_hit_ratio():
+    hits = CACHE_LOOKUPS.value(result="memory_hit") + CACHE_LOOKUPS.value(result="disk_hit")
+    lookups = hits + CACHE_LOOKUPS.value(result="miss")
+    return hits / lookups if lookups else 0.0
+
+
+CACHE_HIT_RATIO = REGISTRY.register(Gauge(
+    "narrative_llm_cache_hit_ratio", "Share of LLM cache lookups served from memory or disk", function=_cache_hit_ratio))
+
+
+@contextmanager
+def track(stage, **attributes):
+    """Длительность, число выполняющихся и ошибки этапа stage; этап — участок текущей трассы"""
+    STAGE_IN_FLIGHT.inc(stage=stage)
+    started = time.perf_counter()
+    try:
+        with span(stage, **attributes) as current:
+            yield current
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage)
+        STAGE_IN_FLIGHT.dec(stage=stage)
+
+
+def record_generation(mode, prompt_tokens, completion_tokens, seconds):
+    """Учёт одного запроса к модели; токены — счётчики бэкенда или оценка estimate_tokens"""
+    LLM_REQUESTS.inc(mode=mode)
+    LLM_PROMPT_TOKENS.inc(prompt_tokens)
+    LLM_COMPLETION_TOKENS.inc(completion_tokens)
+    current_span().add(llm_requests=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    if seconds > 0 and completion_tokens:
+        LLM_TOKENS_PER_SECOND.observe(completion_tokens / seconds)
+
+
+class MeteredLLM:
+    """Обёртка над синхронной LLM (langchain): учёт запросов и оценка токенов по тексту"""
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def __call__(self, prompt, stop=None, **kwargs):
+        started = time.perf_counter()
+        response = self.llm(prompt, stop=stop, **kwargs)
+        record_generation("sync", estimate_tokens(prompt), estimate_tokens(response), time.perf_counter() - started)
+        return response
+
+    def stream(self, prompt, stop=None, **kwargs):
+        started = time.perf_counter()
+        chunks = []
+        for chunk in self.llm.stream(prompt, stop=stop, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        record_generation("stream", estimate_tokens(prompt), estimate_tokens(''.join(chunks)), time.perf_counter() - started)
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"metrics: {format % args}")
+
+
+def start_metrics_server(port, host='0.0.0.0'):
+    """HTTP-сервер /metrics в фоновом потоке для процессов без Flask"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+    logger.info(f"Metrics server listening on {host}:{server.server_address[1]}")
+    return server
@@ -1,11 +1,10 @@
 # service/prompts.py
 
-from narr_mod import get_narrative_structure
+from narr_mod import registry
 
 def get_evaluation_prompt(structure_name, formatted_structure):
     try:
-        narrative_structure = get_narrative_structure(structure_name)
-        return narrative_structure.get_prompt()
+        return registry.get(structure_name).prompt
     except ValueError:
         # Обработка для старых структур, которые еще не переведены в новый формат
         if structure_name == "hero_journey":
@@ -0,0 +1,98 @@
+# service/provider.py
+"""Общие для процесса клиенты LLM и NarrativeEvaluator.
+
+Веб-приложение, Telegram-бот и batch.py берут их отсюда: клиенты создаются
+при первом обращении, один раз на процесс. Бэкенд выбирается по
+Config.LLM_BACKEND среди зарегистрированных register_backend().
+"""
+
+import logging
+import threading
+
+from config import Config
+from .llm import initialize_async_llm, initialize_llm
+
+logger = logging.getLogger(__name__)
+
+# Бэкенды LLM: название -> (фабрика синхронного клиента, фабрика асинхронного или None)
+BACKENDS = {
+    "ollama": (initialize_llm, initialize_async_llm),
+}
+
+
+def register_backend(name, llm_factory, async_llm_factory=None):
+    """Регистрирует бэкенд; без асинхронной фабрики NarrativeEvaluator вызывает синхронный клиент в потоке"""
+    BACKENDS[name] = (llm_factory, async_llm_factory)
+
+
+class LLMProvider:
+    """Лениво создаваемые и общие для всех потоков клиенты LLM и NarrativeEvaluator"""
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._lock = threading.RLock()
+        self._llm = None
+        self._async_llm = None
+        self._evaluator = None
+
+    @property
+    def backend(self):
+        return self._backend or Config.LLM_BACKEND
+
+    def _factories(self):
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown LLM backend: {self.backend}. Available: {', '.join(BACKENDS)}")
+        return BACKENDS[self.backend]
+
+    def llm(self):
+        if self._llm is None:
+            with self._lock:
+                if self._llm is None:
+                    logger.info(f"Initializing {self.backend} LLM client")
+                    self._llm = self._factories()[0]()
+        return self._llm
+
+    def async_llm(self):
+        if self._async_llm is None:
+            with self._lock:
+                factory = self._factories()[1]
+                if self._async_llm is None and factory is not None:
+                    self._async_llm = factory()
+        return self._async_llm
+
+    def evaluator(self):
+        if self._evaluator is None:
+            with self._lock:
+                if self._evaluator is None:
+                    # Импорт здесь: evaluator тянет narr_mod и сегментацию, которые не нужны до первого анализа
+                    from .evaluator import NarrativeEvaluator
+
+                    self._evaluator = NarrativeEvaluator(self.llm(), self.async_llm())
+        return self._evaluator
+
+    def use_backend(self, name):
+        """Переключает бэкенд; клиенты и evaluator будут созданы заново при следующем обращении"""
+        with self._lock:
+            self._backend = name
+            self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._llm = None
+            self._async_llm = None
+            self._evaluator = None
+
+
+provider = LLMProvider()
+
+
+def get_llm():
+    return provider.llm()
+
+
+def get_async_llm():
+    return provider.async_llm()
+
+
+def get_evaluator():
+    return provider.evaluator()
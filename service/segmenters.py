@@ -0,0 +1,194 @@
+# service/segmenters.py
+
+import logging
+import re
+import threading
+from abc import ABC, abstractmethod
+
+from config import Config
+from .document import Document, offsets
+
+logger = logging.getLogger(__name__)
+
+# Последовательность слов с заглавной буквы — грубая замена NER для бэкендов без модели
+_CAPITALIZED = re.compile(r"\b[A-ZА-ЯЁ][\w'-]+(?:\s+[A-ZА-ЯЁ][\w'-]+)*")
+
+
+def guess_entities(text, sentence_starts, sentence_ends):
+    """Смещения имён собственных по заглавным буквам; первое слово предложения не учитывается"""
+    for start, end in zip(sentence_starts, sentence_ends):
+        for match in _CAPITALIZED.finditer(text, start, end):
+            if text[start:match.start()].strip():
+                yield match.start(), match.end()
+
+
+def split_points(text, size):
+    """Границы (start, end) кусков text не длиннее size.
+
+    Разрез ищется во второй половине куска: сначала по пустой строке, затем по
+    переводу строки и по пробелу, чтобы не разрывать предложения.
+    """
+    start = 0
+    while len(text) - start > size:
+        end = start + size
+        for separator in ("\n\n", "\n", " "):
+            cut = text.rfind(separator, start + size // 2, end)
+            if cut != -1:
+                end = cut + len(separator)
+                break
+        yield start, end
+        start = end
+    yield start, len(text)
+
+
+class Segmenter(ABC):
+    """Разбиение текста на предложения и сущности. Модель загружается при первом использовании."""
+
+    name = None
+
+    def __init__(self):
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    logger.info(f"Loading {self.name} segmenter")
+                    self._model = self._load()
+        return self._model
+
+    @abstractmethod
+    def _load(self):
+        """Загружает модель бэкенда"""
+
+    def segment(self, text) -> Document:
+        return next(iter(self.segment_many([text])))
+
+    @abstractmethod
+    def segment_many(self, texts, batch_size=None):
+        """Document для каждого текста из texts"""
+
+
+class SpacySegmenter(Segmenter):
+    """spaCy только с нужными компонентами: tok2vec, senter и ner"""
+
+    name = "spacy"
+
+    # Теггер, лемматизатор и синтаксический парсер для предложений и сущностей не нужны
+    EXCLUDE = ["tagger", "parser", "attribute_ruler", "lemmatizer"]
+
+    def __init__(self, model_name="en_core_web_sm"):
+        super().__init__()
+        self.model_name = model_name
+
+    def _load(self):
+        import spacy
+
+        nlp = spacy.load(self.model_name, exclude=self.EXCLUDE)
+        if "senter" in nlp.disabled:
+            nlp.enable_pipe("senter")
+        if not nlp.has_pipe("senter") and not nlp.has_pipe("sentencizer"):
+            nlp.add_pipe("sentencizer", first=True)
+        # Длинные тексты разбираются кусками по SEGMENTER_MAX_CHARS, поэтому предел spaCy
+        # (по умолчанию 1 000 000 символов, ошибка E088) к целому тексту не применяется
+        nlp.max_length = max(nlp.max_length, Config.SEGMENTER_MAX_CHARS)
+        return nlp
+
+    def segment_many(self, texts, batch_size=None):
+        # Память NER растёт с длиной документа, поэтому длинный текст идёт в модель кусками;
+        # исходная строка и смещение куска передаются контекстом, чтобы документ ссылался на неё
+        def pieces():
+            for index, text in enumerate(texts):
+                for start, end in split_points(text, Config.SEGMENTER_MAX_CHARS):
+                    yield text[start:end], (index, text, start)
+
+        pipe = self.model.pipe(pieces(), as_tuples=True, batch_size=batch_size or Config.SEGMENTER_BATCH_SIZE)
+        current, text, parts = None, None, []
+        for doc, (index, source, start) in pipe:
+            if index != current and parts:
+                yield Document.concat(text, parts)
+                parts = []
+            current, text = index, source
+            parts.append(Document.from_spacy(doc, source, offset=start))
+        if parts:
+            yield Document.concat(text, parts)
+
+
+class RuleSegmenter(Segmenter):
+    """Правиловый sentencizer spaCy на пустой английской модели, без статистических компонентов"""
+
+    name = "rule"
+
+    def _load(self):
+        import spacy
+
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        # Ограничение длины в spaCy защищает память парсера и NER, которых здесь нет
+        nlp.max_length = 10 ** 8
+        return nlp
+
+    def segment_many(self, texts, batch_size=None):
+        pipe = self.model.pipe(((text, text) for text in texts), as_tuples=True,
+                               batch_size=batch_size or Config.SEGMENTER_BATCH_SIZE)
+        for doc, text in pipe:
+            sentence_starts = [sent.start_char for sent in doc.sents]
+            sentence_ends = [sent.end_char for sent in doc.sents]
+            yield Document.from_spacy(doc, text, entities=guess_entities(text, sentence_starts, sentence_ends))
+
+
+class NltkSegmenter(Segmenter):
+    """NLTK punkt для предложений и регулярный токенизатор для слов"""
+
+    name = "nltk"
+
+    def _load(self):
+        import nltk
+        from nltk.tokenize import WordPunctTokenizer
+        from nltk.tokenize.punkt import PunktTokenizer
+
+        try:
+            nltk.data.find('tokenizers/punkt_tab')
+        except LookupError:
+            nltk.download('punkt_tab', quiet=True)
+        return PunktTokenizer(), WordPunctTokenizer()
+
+    def segment_many(self, texts, batch_size=None):
+        sentence_tokenizer, word_tokenizer = self.model
+        for text in texts:
+            sentence_starts, sentence_ends = offsets(), offsets()
+            for start, end in sentence_tokenizer.span_tokenize(text):
+                sentence_starts.append(start)
+                sentence_ends.append(end)
+            token_starts, token_ends = offsets(), offsets()
+            for start, end in word_tokenizer.span_tokenize(text):
+                token_starts.append(start)
+                token_ends.append(end)
+            entity_starts, entity_ends = offsets(), offsets()
+            for start, end in guess_entities(text, sentence_starts, sentence_ends):
+                entity_starts.append(start)
+                entity_ends.append(end)
+            yield Document(text, sentence_starts, sentence_ends, entity_starts, entity_ends, token_starts, token_ends)
+
+
+SEGMENTERS = {
+    "spacy": SpacySegmenter,
+    "rule": RuleSegmenter,
+    "nltk": NltkSegmenter,
+}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_segmenter(name=None) -> Segmenter:
+    """Общий для процесса экземпляр бэкенда; по умолчанию Config.SEGMENTER"""
+    name = name or Config.SEGMENTER
+    if name not in SEGMENTERS:
+        raise ValueError(f"Unknown segmenter: {name}. Available: {', '.join(SEGMENTERS)}")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = SEGMENTERS[name]()
+        return _instances[name]
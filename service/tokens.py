@@ -0,0 +1,117 @@
+# service/tokens.py
+
+import math
+import re
+
+# Грубая оценка для токенизатора llama: ~4 символа английского текста на токен
+CHARS_PER_TOKEN = 4
+
+WORD = re.compile(r'\w+|[^\w\s]')
+
+# Ожидаемая длина ответа модели для каждого этапа, в токенах
+EXPECTED_OUTPUT_TOKENS = {
+    "classify": 10,
+    "summarize": 250,
+    "analyze": 1000,
+    "double_check": 500,
+}
+
+FIT_STRATEGIES = ("truncate", "sample", "chunk")
+
+SAMPLE_SEPARATOR = "\n[...]\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Оценка числа токенов без токенизатора модели.
+
+    Для латиницы хорошо работает деление длины на 4, а для кириллицы и
+    текстов с большим количеством пунктуации число слов и знаков даёт
+    более точную (и большую) оценку, поэтому берётся максимум из двух.
+    """
+    if not text:
+        return 0
+    by_chars = math.ceil(len(text) / CHARS_PER_TOKEN)
+    by_words = math.ceil(len(WORD.findall(text)) * 4 / 3)
+    return max(by_chars, by_words)
+
+
+class TokenBudget:
+    """Учёт контекстного окна модели и оценка задержки по этапам"""
+
+    def __init__(self, context_tokens=2048, prompt_tokens_per_sec=500.0, tokens_per_sec=20.0, output_tokens=None):
+        self.context_tokens = context_tokens
+        self.prompt_tokens_per_sec = prompt_tokens_per_sec
+        self.tokens_per_sec = tokens_per_sec
+        self.output_tokens = {**EXPECTED_OUTPUT_TOKENS, **(output_tokens or {})}
+
+    def expected_output(self, stage) -> int:
+        return self.output_tokens.get(stage, 0)
+
+    def available(self, stage, overhead="") -> int:
+        """Сколько токенов текста помещается в промпт этапа помимо overhead"""
+        return max(self.context_tokens - self.expected_output(stage) - estimate_tokens(overhead), 0)
+
+    def fits(self, stage, prompt) -> bool:
+        return estimate_tokens(prompt) + self.expected_output(stage) <= self.context_tokens
+
+    def max_chars(self, stage, overhead="") -> int:
+        return self.available(stage, overhead) * CHARS_PER_TOKEN
+
+    def latency(self, prompt_tokens, output_tokens) -> float:
+        return prompt_tokens / self.prompt_tokens_per_sec + output_tokens / self.tokens_per_sec
+
+    def fit_text(self, text, stage, strategy, overhead=""):
+        """Ужимает text под бюджет этапа стратегией truncate или sample"""
+        if strategy == "truncate":
+            shrink = truncate_text
+        elif strategy == "sample":
+            shrink = sample_text
+        else:
+            raise ValueError(f"Unknown fit strategy: {strategy}")
+
+        available = self.available(stage, overhead)
+        limit = self.max_chars(stage, overhead)
+        fitted = text
+        tokens = estimate_tokens(fitted)
+        # Оценка по символам может оказаться занижена (например, для кириллицы),
+        # поэтому лимит уменьшается, пока результат не уложится в бюджет
+        while tokens > available and limit > 0:
+            fitted = shrink(text, limit)
+            tokens = estimate_tokens(fitted)
+            limit = min(limit - 1, limit * available // max(tokens, 1))
+        return fitted if limit > 0 else ""
+
+    def stage_estimate(self, stage, prompt_tokens, calls=1, concurrency=1, fit=None) -> dict:
+        output_tokens = self.expected_output(stage)
+        # Параллельные вызовы выполняются волнами по concurrency штук
+        waves = math.ceil(calls / max(concurrency, 1)) if calls else 0
+        return {
+            "stage": stage,
+            "calls": calls,
+            "prompt_tokens": prompt_tokens * calls,
+            "output_tokens": output_tokens * calls,
+            "fits": prompt_tokens + output_tokens <= self.context_tokens,
+            "fit": fit,
+            "estimated_seconds": round(waves * self.latency(prompt_tokens, output_tokens), 2),
+        }
+
+
+def truncate_text(text, max_chars):
+    """Начало текста длиной не больше max_chars, обрезанное по границе слова"""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    space = cut.rfind(' ')
+    return cut[:space] if space > max_chars // 2 else cut
+
+
+def sample_text(text, max_chars, samples=5):
+    """Равномерно распределённые по тексту отрывки общей длиной не больше max_chars"""
+    if len(text) <= max_chars:
+        return text
+    size = (max_chars - len(SAMPLE_SEPARATOR) * (samples - 1)) // samples
+    if size <= 0:
+        return truncate_text(text, max_chars)
+    step = (len(text) - size) / (samples - 1)
+    excerpts = [truncate_text(text[round(i * step):], size) for i in range(samples)]
+    return SAMPLE_SEPARATOR.join(excerpts)
@@ -0,0 +1,203 @@
+# service/tracing.py
+"""Трассировка запросов: вложенные участки (span) с временем и атрибутами.
+
+Текущий участок хранится в contextvars, поэтому вложенность сохраняется в
+корутинах и в asyncio.to_thread. Завершённая трасса целиком записывается
+одной строкой JSON в приёмник (set_sink), например JsonlSink. Без приёмника
+трасса не собирается и span() ничего не стоит.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Идентификатор запроса от клиента принимается, только если он короткий и без спецсимволов
+_REQUEST_ID = re.compile(r'^[\w.:-]{1,128}$')
+
+_current = contextvars.ContextVar("narrative_span", default=None)
+_sink = None
+
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start", "duration", "attributes", "error", "_started")
+
+    def __init__(self, trace, name, parent_id=None, attributes=None):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.duration = None
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self._started = time.perf_counter()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, **counts):
+        """Накопление числовых атрибутов (например, токенов нескольких запросов к модели)"""
+        for name, value in counts.items():
+            self.attributes[name] = self.attributes.get(name, 0) + value
+
+    def finish(self, error=None):
+        self.duration = time.perf_counter() - self._started
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self.trace.finished(self)
+
+    def to_dict(self) -> dict:
+        data = {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "attributes": self.attributes,
+        }
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+
+class _NoopSpan:
+    """Участок вне трассы: атрибуты никуда не записываются"""
+
+    def set(self, **attributes):
+        pass
+
+    def add(self, **counts):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    def __init__(self, request_id, sink):
+        self.trace_id = uuid.uuid4().hex
+        self.request_id = request_id
+        self.sink = sink
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def finished(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start)
+        return {
+            "trace_id": self.trace_id,
+            "request_id": self.request_id,
+            "spans": [span.to_dict() for span in spans],
+        }
+
+
+class JsonlSink:
+    """Приёмник трасс: по одной JSON-строке на трассу в файле path"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    def __call__(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+
+def set_sink(sink):
+    """Приёмник завершённых трасс (callable от словаря) или None, чтобы выключить трассировку"""
+    global _sink
+    _sink = sink
+
+
+def configure(path):
+    """JsonlSink по пути из конфигурации; пустой путь выключает трассировку"""
+    set_sink(JsonlSink(path) if path else None)
+
+
+def new_request_id(value=None):
+    """Идентификатор запроса из заголовка клиента или новый"""
+    if value and _REQUEST_ID.match(value):
+        return value
+    return uuid.uuid4().hex
+
+
+def current_span():
+    return _current.get() or NOOP_SPAN
+
+
+def _reset(token, previous):
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Генератор завершился в другом контексте, чем начался
+        _current.set(previous)
+
+
+def start_trace(name, request_id=None, **attributes):
+    """Корневой участок новой трассы; возвращает (span, token) или (None, None) без приёмника"""
+    if _sink is None:
+        return None, None
+    root = Span(Trace(request_id or new_request_id(), _sink), name, attributes=attributes)
+    return root, _current.set(root)
+
+
+def end_trace(root, token, error=None):
+    if root is None:
+        return
+    root.finish(error)
+    _reset(token, None)
+    try:
+        root.trace.sink(root.trace.to_dict())
+    except Exception as e:
+        logger.warning(f"Failed to export trace {root.trace.trace_id}: {e}")
+
+
+@contextmanager
+def trace(name, request_id=None, **attributes):
+    root, token = start_trace(name, request_id, **attributes)
+    if root is None:
+        yield NOOP_SPAN
+        return
+    error = None
+    try:
+        yield root
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        end_trace(root, token, error)
+
+
+@contextmanager
+def span(name, **attributes):
+    """Вложенный участок текущей трассы; вне трассы — NOOP_SPAN"""
+    parent = _current.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    token = _current.set(child)
+    error = None
+    try:
+        yield child
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        _reset(token, parent)
+        child.finish(error)
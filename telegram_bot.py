@@ -1,14 +1,21 @@
 import os
+import asyncio
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram import ReplyKeyboardMarkup, KeyboardButton
+from telegram.error import BadRequest, RetryAfter
 from telegram.ext import ApplicationBuilder, ContextTypes, CommandHandler, MessageHandler, filters, CallbackQueryHandler
 import os
 from app.constants import STRUCTURE_MAPPING
-from service.evaluator import NarrativeEvaluator
-from service import initialize_llm
-from app.routes import extract_doc_text, extract_text_from_pdf_miner, extract_text_from_txt
+from config import Config
+from service import get_evaluator
+from service.extraction import SUPPORTED_EXTENSIONS, ExtractionError, extract_uploaded_text
+from service.metrics import start_metrics_server
 
 # Загрузка переменных окружения
 load_dotenv()
@@ -17,13 +24,12 @@ load_dotenv()
 logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Инициализация LLM и NarrativeEvaluator
-llm = initialize_llm()
-evaluator = NarrativeEvaluator(llm)
+# Максимальная длина одного сообщения в Telegram
+MESSAGE_LIMIT = 4096
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(
-        'Привет! Я бот для анализа нарративных структур. Отправьте мне текст или файл (doc, docx, pdf, txt) для анализа.',
+        'Привет! Я бот для анализа нарративных структур. Отправьте мне текст или файл (doc, docx, rtf, pdf, txt) для анализа.',
         reply_markup=get_main_keyboard()
     )
 
@@ -48,7 +54,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     help_text = """
     Вот что я умею:
     - Анализировать текст: просто отправьте мне текстовое сообщение
-    - Анализировать файлы: отправьте мне файл (doc, docx, pdf, txt)
+    - Анализировать файлы: отправьте мне файл (doc, docx, rtf, pdf, txt)
     - Выбирать тип структуры: используйте команду /choose_structure
     - Автоматически определять структуру: это происходит по умолчанию
     """
@@ -67,61 +73,213 @@ async def button(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def analyze_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     text = update.message.text
-    structure = context.user_data.get('selected_structure', "Auto-detect")
-    await process_text(update, context, text, structure)
+
+    async def get_text():
+        return text
+
+    await run_queued(update, context, get_text)
+
+async def download_document(document):
+    """Документ из сообщения во временном файле: в памяти до UPLOAD_SPOOL_BYTES, дальше на диске.
+
+    Размер проверяется по метаданным сообщения до загрузки; None — файл слишком большой.
+    """
+    if document.file_size and document.file_size > Config.TELEGRAM_MAX_FILE_BYTES:
+        return None
+    file = await document.get_file()
+    buffer = tempfile.SpooledTemporaryFile(max_size=Config.UPLOAD_SPOOL_BYTES)
+    try:
+        await file.download_to_memory(buffer)
+    except BaseException:
+        buffer.close()
+        raise
+    # file_size в сообщении необязателен, поэтому размер проверяется и после загрузки
+    if buffer.tell() > Config.TELEGRAM_MAX_FILE_BYTES:
+        buffer.close()
+        return None
+    buffer.seek(0)
+    return buffer
 
 async def analyze_file(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    file = await update.message.document.get_file()
-    file_name = update.message.document.file_name
+    document = update.message.document
+    file_name = document.file_name or ""
     file_extension = os.path.splitext(file_name)[1].lower()
 
-    if file_extension in ['.doc', '.docx']:
-        await file.download_to_drive(file_name)
-        text = extract_doc_text(file_name)
-        os.remove(file_name)
-    elif file_extension == '.pdf':
-        await file.download_to_drive(file_name)
-        with open(file_name, 'rb') as f:
-            text = extract_text_from_pdf_miner(f)
-        os.remove(file_name)
-    elif file_extension == '.txt':
-        await file.download_to_drive(file_name)
-        with open(file_name, 'r', encoding='utf-8') as f:
-            text = f.read()
-        os.remove(file_name)
-    else:
-        await update.message.reply_text("Неподдерживаемый тип файла. Пожалуйста, отправьте doc, docx, pdf или txt файл.")
+    if file_extension not in SUPPORTED_EXTENSIONS:
+        await update.message.reply_text("Неподдерживаемый тип файла. Пожалуйста, отправьте doc, docx, rtf, pdf или txt файл.")
         return
 
-    structure = context.user_data.get('selected_structure', "Auto-detect")
-    await process_text(update, context, text, structure)
+    if document.file_size and document.file_size > Config.TELEGRAM_MAX_FILE_BYTES:
+        await reply_too_large(update)
+        return
 
-async def process_text(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str, structure: str):
-    await update.message.reply_text("Анализирую текст...")
+    async def get_text():
+        buffer = await download_document(document)
+        if buffer is None:
+            await reply_too_large(update)
+            return None
+        try:
+            with buffer:
+                return await asyncio.to_thread(extract_uploaded_text, file_name, buffer)
+        except ExtractionError as e:
+            await update.message.reply_text(f"Не удалось извлечь текст из файла: {e}")
+            return None
 
-    if structure == "Auto-detect":
-        structure = evaluator.classify(text)
+    await run_queued(update, context, get_text)
 
-    result = evaluator.analyze_specific_structure(text, structure)
+async def reply_too_large(update: Update):
+    limit = Config.TELEGRAM_MAX_FILE_BYTES // (1024 * 1024)
+    await update.message.reply_text(f"Файл слишком большой. Максимальный размер — {limit} МБ.")
 
-    response = f"Анализ структуры: {result['structure']}\n\n"
-    response += f"Анализ:\n{result['analysis']}\n\n"
-    # response += f"Визуализация:\n{result['visualization']}"
+class StreamingReply:
+    """Сообщение, которое растёт по мере генерации ответа.
 
-    if len(response) > 4096:
-        for x in range(0, len(response), 4096):
-            await update.message.reply_text(response[x:x+4096])
-    else:
-        await update.message.reply_text(response)
+    Правки сообщения ограничены по частоте (лимиты Bot API), а при
+    превышении лимита длины текст продолжается в новом сообщении.
+    """
 
-def main():
-    # Получение токена из переменных окружения
-    token = os.getenv("TELEGRAM_TOKEN")
-    if not token:
-        logger.error("Не найден токен для Telegram бота. Убедитесь, что вы установили TELEGRAM_TOKEN в файле .env")
+    def __init__(self, message, limit=MESSAGE_LIMIT, interval=None):
+        self.message = message
+        self.limit = limit
+        self.interval = Config.TELEGRAM_EDIT_INTERVAL if interval is None else interval
+        self.text = ""
+        self._shown = message.text or ""
+        self._next_edit = 0.0
+
+    async def append(self, chunk):
+        self.text += chunk
+        while len(self.text) > self.limit:
+            await self._edit(self.text[:self.limit], wait=True)
+            self.text = self.text[self.limit:]
+            self.message = await self.message.chat.send_message(self.text[:self.limit])
+            self._shown = self.text[:self.limit]
+            self._next_edit = time.monotonic() + self.interval
+        if time.monotonic() >= self._next_edit:
+            await self._edit(self.text)
+
+    async def finish(self):
+        await self._edit(self.text, wait=True)
+
+    async def _edit(self, text, wait=False):
+        if not text.strip() or text == self._shown:
+            return
+        try:
+            await self.message.edit_text(text)
+            self._shown = text
+        except RetryAfter as e:
+            # Телеграм просит подождать: промежуточную правку пропускаем, финальную повторяем
+            if wait:
+                await asyncio.sleep(float(e.retry_after))
+                await self._edit(text, wait=wait)
+                return
+            self._next_edit = time.monotonic() + float(e.retry_after)
+            return
+        except BadRequest as e:
+            if "not modified" not in str(e).lower():
+                raise
+        self._next_edit = time.monotonic() + self.interval
+
+class AnalysisQueue:
+    """Очередь анализов бота.
+
+    Анализы одного пользователя выполняются по очереди, разных — параллельно,
+    но не больше max_running одновременно. Если в работе и ожидании уже
+    max_queued анализов (или per_user у одного пользователя), новый не принимается.
+    """
+
+    def __init__(self, max_running, max_queued, per_user):
+        self.max_queued = max_queued
+        self.per_user = per_user
+        self._running = asyncio.Semaphore(max_running)
+        self._user_locks = {}
+        self._user_counts = {}
+        self._total = 0
+
+    def admit(self, user_id):
+        """Место в очереди пользователя (0 — анализ начнётся сразу) или None, если очередь заполнена"""
+        position = self._user_counts.get(user_id, 0)
+        if self._total >= self.max_queued or position >= self.per_user:
+            return None
+        self._user_counts[user_id] = position + 1
+        self._total += 1
+        return position
+
+    def release(self, user_id):
+        """Освобождает место, полученное admit()"""
+        self._total -= 1
+        self._user_counts[user_id] -= 1
+        if not self._user_counts[user_id]:
+            del self._user_counts[user_id]
+            self._user_locks.pop(user_id, None)
+
+    @asynccontextmanager
+    async def slot(self, user_id):
+        """Ожидание своей очереди после admit(); по выходу место освобождается"""
+        lock = self._user_locks.setdefault(user_id, asyncio.Lock())
+        try:
+            async with lock, self._running:
+                yield
+        finally:
+            self.release(user_id)
+
+analysis_queue = AnalysisQueue(
+    max_running=Config.TELEGRAM_MAX_RUNNING,
+    max_queued=Config.TELEGRAM_MAX_QUEUED,
+    per_user=Config.TELEGRAM_MAX_PER_USER,
+)
+
+async def run_queued(update: Update, context: ContextTypes.DEFAULT_TYPE, get_text):
+    """Анализ в очереди пользователя; get_text — корутина, возвращающая текст или None"""
+    user = update.effective_user
+    user_id = user.id if user else update.effective_chat.id
+    position = analysis_queue.admit(user_id)
+    if position is None:
+        await update.message.reply_text(
+            "Сейчас слишком много запросов на анализ. Пожалуйста, попробуйте через несколько минут."
+        )
         return
+    if position:
+        try:
+            await update.message.reply_text(f"Текст поставлен в очередь. Перед ним ваших анализов: {position}.")
+        except BaseException:
+            # До slot() место освобождается здесь, иначе ошибка Telegram или отмена его потеряет
+            analysis_queue.release(user_id)
+            raise
+
+    async with analysis_queue.slot(user_id):
+        text = await get_text()
+        if text:
+            structure = context.user_data.get('selected_structure', "Auto-detect")
+            await process_text(update, context, text, structure)
+
+async def process_text(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str, structure: str):
+    message = await update.message.reply_text("Анализирую текст...")
+    reply = StreamingReply(message)
+
+    async for event, data in get_evaluator().astream_analysis(text, structure):
+        if event == "stage" and data["stage"] == "analyzing":
+            await reply.append(f"Анализ структуры: {data['structure']}\n\nАнализ:\n")
+        elif event == "token":
+            await reply.append(data["text"])
+
+    await reply.finish()
 
-    app = ApplicationBuilder().token(token).build()
+async def configure_executor(application):
+    """Ограниченный пул потоков для asyncio.to_thread: извлечение текста, spaCy, синхронные вызовы LLM"""
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=Config.TELEGRAM_WORKERS, thread_name_prefix='bot-worker')
+    )
+
+def build_application(token):
+    app = (
+        ApplicationBuilder()
+        .token(token)
+        # Обновления разных пользователей обрабатываются параллельно;
+        # порядок анализов одного пользователя сохраняет analysis_queue
+        .concurrent_updates(Config.TELEGRAM_CONCURRENT_UPDATES)
+        .post_init(configure_executor)
+        .build()
+    )
 
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("help", help_command))
@@ -129,8 +287,18 @@ def main():
     app.add_handler(MessageHandler(filters.Regex("^(Выбрать структуру|Помощь|Автоопределение структуры)$"), handle_button))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, analyze_text))
     app.add_handler(MessageHandler(filters.Document.ALL, analyze_file))
+    return app
+
+def main():
+    # Получение токена из переменных окружения
+    token = os.getenv("TELEGRAM_TOKEN")
+    if not token:
+        logger.error("Не найден токен для Telegram бота. Убедитесь, что вы установили TELEGRAM_TOKEN в файле .env")
+        return
 
-    app.run_polling()
+    if Config.TELEGRAM_METRICS_PORT:
+        start_metrics_server(Config.TELEGRAM_METRICS_PORT)
+    build_application(token).run_polling()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,185 @@
+# tests/test_async_evaluator.py
+
+import asyncio
+import time
+
+import pytest
+
+import service.evaluator as evaluator_module
+from service.async_llm import AsyncOllamaClient
+from service.cache import LLMCache
+from service.evaluator import NarrativeEvaluator
+from service.extractor import extract_structure
+
+
+class FakeAsyncLLM:
+    def __init__(self, response, delay=0.0):
+        self.response = response
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, prompt, stop=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.response
+
+
+def test_aclassify_uses_async_llm():
+    async_llm = FakeAsyncLLM("Three-Act Structure")
+    evaluator = NarrativeEvaluator(llm=None, async_llm=async_llm)
+
+    assert asyncio.run(evaluator.aclassify("Some text")) == "Three-Act Structure"
+    assert async_llm.calls == 1
+
+
+def test_aanalyze_runs_concurrently():
+    evaluator = NarrativeEvaluator(llm=None, async_llm=FakeAsyncLLM("analysis", delay=0.2))
+    # Загрузка модели сегментации не должна попадать в замер
+    extract_structure("Warm up.")
+
+    async def run():
+        return await asyncio.gather(*(
+            evaluator.aanalyze_specific_structure("Some text", "Three-Act Structure")
+            for _ in range(5)
+        ))
+
+    started = time.monotonic()
+    results = asyncio.run(run())
+    elapsed = time.monotonic() - started
+
+    assert [r["analysis"] for r in results] == ["analysis"] * 5
+    assert elapsed < 0.8
+
+
+def test_sync_llm_is_offloaded_without_async_client():
+    evaluator = NarrativeEvaluator(llm=lambda prompt: "unknown")
+    assert asyncio.run(evaluator.aclassify("Some text")) == "unknown"
+
+
+def test_async_client_answers_from_cache():
+    cache = LLMCache()
+    client = AsyncOllamaClient(model="llama3.2", host="http://127.0.0.1:9", cache=cache)
+    cache.put(client.key_for("prompt"), "cached answer")
+
+    assert asyncio.run(client("prompt")) == "cached answer"
+
+
+class RoutingAsyncLLM:
+    """Отвечает на классификацию заданной структурой, на анализ — с задержкой"""
+
+    def __init__(self, classification, classify_delay=0.2, analysis_delay=0.3):
+        self.classification = classification
+        self.classify_delay = classify_delay
+        self.analysis_delay = analysis_delay
+        self.cancelled = []
+
+    async def __call__(self, prompt, stop=None):
+        if prompt.startswith("Analyze the following text and determine"):
+            await asyncio.sleep(self.classify_delay)
+            return self.classification
+        try:
+            await asyncio.sleep(self.analysis_delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(prompt)
+            raise
+        return prompt.split(" narrative structure")[0]
+
+
+def test_classification_accepts_structure_keys():
+    evaluator = NarrativeEvaluator(llm=lambda prompt: ' "four_act"\n')
+    assert evaluator.classify("Some text") == "Four-Act Structure"
+
+
+def test_speculative_hit_overlaps_classification_and_analysis():
+    async_llm = RoutingAsyncLLM("three_act")
+    evaluator = NarrativeEvaluator(llm=None, async_llm=async_llm, speculative=True)
+
+    started = time.monotonic()
+    result = asyncio.run(evaluator.aanalyze("Some text"))
+    elapsed = time.monotonic() - started
+
+    assert result["structure"] == "Three-Act Structure"
+    assert result["detected_structure"] == "Three-Act Structure"
+    assert elapsed < 0.45
+
+
+def test_speculative_miss_cancels_wrong_candidates():
+    async_llm = RoutingAsyncLLM("four_act")
+    evaluator = NarrativeEvaluator(llm=None, async_llm=async_llm, speculative=True)
+
+    result = asyncio.run(evaluator.aanalyze("Some text"))
+
+    assert result["structure"] == "Four-Act Structure"
+    assert len(async_llm.cancelled) == 1
+    assert "Three-Act Structure" in async_llm.cancelled[0]
+    # Следующий запрос спекулирует уже на самой частой структуре
+    assert evaluator._speculation_candidates() == ["Four-Act Structure"]
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+def test_speculative_stream_overlaps_classification_and_analysis():
+    async_llm = RoutingAsyncLLM("three_act")
+    evaluator = NarrativeEvaluator(llm=None, async_llm=async_llm, speculative=True)
+
+    started = time.monotonic()
+    events = asyncio.run(collect(evaluator.astream_analysis("Some text")))
+    elapsed = time.monotonic() - started
+
+    stages = [data["stage"] for event, data in events if event == "stage"]
+    assert stages == ["classifying", "classified", "analyzing"]
+    assert [event for event, _ in events][-1] == "result"
+    assert events[-1][1]["structure"] == "Three-Act Structure"
+    assert any(event == "token" for event, _ in events)
+    assert elapsed < 0.45
+
+
+def test_speculative_stream_miss_analyzes_detected_structure():
+    async_llm = RoutingAsyncLLM("four_act")
+    evaluator = NarrativeEvaluator(llm=None, async_llm=async_llm, speculative=True)
+
+    events = asyncio.run(collect(evaluator.astream_analysis("Some text")))
+
+    assert events[-1][1]["structure"] == "Four-Act Structure"
+    assert len(async_llm.cancelled) == 1
+    assert "Three-Act Structure" in async_llm.cancelled[0]
+
+
+class LoopRecordingLLM:
+    def __init__(self):
+        self.loops = []
+
+    async def __call__(self, prompt, stop=None):
+        self.loops.append(asyncio.get_running_loop())
+        return "three_act"
+
+
+def test_sync_analyze_reuses_one_event_loop():
+    async_llm = LoopRecordingLLM()
+    evaluator = NarrativeEvaluator(llm=None, async_llm=async_llm, speculative=False)
+
+    evaluator.analyze("Some text.", "Three-Act Structure")
+    evaluator.analyze("Other text.", "Three-Act Structure")
+
+    # Пул соединений клиента привязан к loop: он должен пережить запрос
+    assert len(async_llm.loops) == 2
+    assert async_llm.loops[0] is async_llm.loops[1]
+    assert not async_llm.loops[0].is_closed()
+
+
+def test_segmentation_error_stops_before_model_calls(monkeypatch):
+    async_llm = FakeAsyncLLM("three_act")
+    evaluator = NarrativeEvaluator(llm=None, async_llm=async_llm)
+
+    def fail(text):
+        raise ValueError("text is too long")
+
+    monkeypatch.setattr(evaluator_module, "extract_document", fail)
+
+    with pytest.raises(ValueError):
+        evaluator.analyze("Some text")
+    with pytest.raises(ValueError):
+        list(evaluator.stream_analysis("Some text"))
+    assert async_llm.calls == 0
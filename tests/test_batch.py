@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+from batch import Checkpoint, ResultWriter, file_key, find_files, run_batch
+
+
+class FakeEvaluator:
+    def __init__(self):
+        self.texts = []
+
+    async def aanalyze(self, text, structure=None):
+        if "fail" in text:
+            raise RuntimeError("model error")
+        self.texts.append(text)
+        return {"structure": structure or "Three-Act Structure", "analysis": text.upper()}
+
+
+def run(tmp_path, evaluator):
+    items = [(file_key(tmp_path / "scripts", path), path) for path in find_files(tmp_path / "scripts")]
+    checkpoint = Checkpoint(tmp_path / "results.jsonl.checkpoint")
+    items = [(key, path) for key, path in items if key not in checkpoint]
+    writer = ResultWriter(tmp_path / "results.jsonl")
+    try:
+        return asyncio.run(run_batch(items, evaluator, writer, checkpoint, extract_workers=1, llm_concurrency=2))
+    finally:
+        writer.close()
+        checkpoint.close()
+
+
+def read_results(tmp_path):
+    with open(tmp_path / "results.jsonl", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def make_scripts(tmp_path):
+    scripts = tmp_path / "scripts"
+    (scripts / "nested").mkdir(parents=True)
+    (scripts / "a.txt").write_text("first script")
+    (scripts / "nested" / "b.txt").write_text("second script")
+    (scripts / "c.txt").write_text("this one will fail")
+    (scripts / "notes.md").write_text("ignored")
+    return scripts
+
+
+def test_find_files_filters_extensions(tmp_path):
+    scripts = make_scripts(tmp_path)
+    assert [p.replace(str(scripts), "") for p in find_files(str(scripts))] == ["/a.txt", "/c.txt", "/nested/b.txt"]
+    assert len(find_files(str(scripts), recursive=False)) == 2
+
+
+def test_batch_writes_results_and_checkpoint(tmp_path):
+    make_scripts(tmp_path)
+
+    assert run(tmp_path, FakeEvaluator()) == (2, 1)
+
+    results = {r["file"].split("/")[-1]: r for r in read_results(tmp_path)}
+    assert results["a.txt"]["status"] == "done"
+    assert results["a.txt"]["result"]["analysis"] == "FIRST SCRIPT"
+    assert results["c.txt"]["status"] == "failed"
+    assert "model error" in results["c.txt"]["error"]
+
+
+def test_batch_resumes_from_checkpoint(tmp_path):
+    scripts = make_scripts(tmp_path)
+    run(tmp_path, FakeEvaluator())
+
+    (scripts / "c.txt").write_text("fixed now")
+    evaluator = FakeEvaluator()
+    assert run(tmp_path, evaluator) == (1, 0)
+    # Готовые файлы повторно не анализируются, исправленный файл — да
+    assert evaluator.texts == ["fixed now"]
+
+
+def test_checkpoint_ignores_truncated_line(tmp_path):
+    path = tmp_path / "checkpoint"
+    path.write_text('{"key": "a.txt:1:1"}\n{"key": "b.t')
+    checkpoint = Checkpoint(path)
+    checkpoint.close()
+
+    assert "a.txt:1:1" in checkpoint
+    assert "b.txt:1:1" not in checkpoint
+
+
+def test_checkpoint_appends_after_truncated_line(tmp_path):
+    path = tmp_path / "checkpoint"
+    path.write_text('{"key": "a.txt:1:1"}\n{"key": "b.t')
+    checkpoint = Checkpoint(path)
+    checkpoint.mark("c.txt:1:1")
+    checkpoint.close()
+
+    assert "c.txt:1:1" in Checkpoint(path)
@@ -0,0 +1,80 @@
+# tests/test_cache.py
+
+import os
+import time
+from service.cache import LLMCache, CachedLLM, make_cache_key
+
+
+class FakeLLM:
+    model = "fake-model"
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, prompt, stop=None):
+        self.calls += 1
+        return f"answer to: {prompt}"
+
+
+def test_cached_llm_hits_memory_and_disk(tmp_path):
+    llm = FakeLLM()
+    cached = CachedLLM(llm, LLMCache(cache_dir=str(tmp_path)))
+
+    assert cached("hello") == "answer to: hello"
+    assert cached("hello") == "answer to: hello"
+    assert llm.calls == 1
+
+    # Новый экземпляр кэша поднимает ответ с диска
+    cold = CachedLLM(llm, LLMCache(cache_dir=str(tmp_path)))
+    assert cold("hello") == "answer to: hello"
+    assert llm.calls == 1
+
+    stats = cached.cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 1
+    assert cold.cache.stats()["disk_hits"] == 1
+
+
+def test_cache_key_depends_on_model_and_options():
+    base = make_cache_key("llama3.2", {"temperature": 0.1}, "prompt")
+    assert base == make_cache_key("llama3.2", {"temperature": 0.1}, "prompt")
+    assert base != make_cache_key("llama3.1", {"temperature": 0.1}, "prompt")
+    assert base != make_cache_key("llama3.2", {"temperature": 0.7}, "prompt")
+    assert base != make_cache_key("llama3.2", {"temperature": 0.1}, "other prompt")
+
+
+def test_memory_tier_is_lru():
+    cache = LLMCache(memory_items=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+def test_ttl_expires_entries(tmp_path, monkeypatch):
+    cache = LLMCache(cache_dir=str(tmp_path), ttl=60)
+    cache.put("key", "value")
+    path = cache._path("key")
+
+    now = time.time()
+    monkeypatch.setattr("service.cache.time.time", lambda: now + 120)
+
+    assert cache.get("key") is None
+    assert not os.path.exists(path)
+
+
+def test_disk_tier_evicts_oldest_over_limit(tmp_path):
+    cache = LLMCache(cache_dir=str(tmp_path), disk_max_bytes=600)
+    for i in range(5):
+        cache.put(f"key{i}", "x" * 100)
+        path = cache._path(f"key{i}")
+        os.utime(path, (1000 + i, 1000 + i))
+
+    assert cache.stats()["disk_bytes"] <= 600
+    assert cache.stats()["evictions"] > 0
+    assert not os.path.exists(cache._path("key0"))
+    assert os.path.exists(cache._path("key4"))
@@ -0,0 +1,88 @@
+# tests/test_chunking.py
+
+import asyncio
+import threading
+import time
+from service.chunking import split_into_chunks
+from service.evaluator import NarrativeEvaluator
+
+
+def make_script(scenes=20, sentences=10):
+    lines = []
+    for scene in range(scenes):
+        lines.append(f"INT. ROOM {scene} - DAY\n")
+        lines.append(" ".join(f"Scene {scene} sentence {i} happens here." for i in range(sentences)) + "\n\n")
+    return "".join(lines)
+
+
+def test_short_text_is_a_single_chunk():
+    assert split_into_chunks("One. Two.", max_chars=100) == ["One. Two."]
+
+
+def test_chunks_respect_limit_and_cover_text():
+    text = make_script()
+    chunks = split_into_chunks(text, max_chars=1000, overlap_chars=0)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    assert "".join(chunks) == text
+
+
+def test_chunks_start_on_boundaries_and_overlap():
+    text = make_script()
+    chunks = split_into_chunks(text, max_chars=1000, overlap_chars=200)
+
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.startswith(("INT.", "Scene"))
+        # Начало следующего фрагмента повторяет конец предыдущего
+        assert chunk[:40] in previous
+
+
+def test_overlong_sentence_is_hard_split():
+    chunks = split_into_chunks("x" * 2500, max_chars=1000, overlap_chars=0)
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 500]
+
+
+class SummarizingLLM:
+    def __init__(self):
+        self.prompts = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt, stop=None):
+        with self._lock:
+            self.prompts.append(prompt)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        if prompt.startswith("This is part"):
+            return "short summary."
+        return "final analysis"
+
+
+def test_long_text_is_analyzed_with_map_reduce():
+    llm = SummarizingLLM()
+    evaluator = NarrativeEvaluator(llm)
+    evaluator.chunk_max_chars = 1000
+    evaluator.chunk_concurrency = 4
+
+    result = evaluator.analyze_specific_structure(make_script(), "Three-Act Structure")
+
+    summaries = [p for p in llm.prompts if p.startswith("This is part")]
+    assert len(summaries) > 1
+    assert llm.max_active > 1
+    assert result["analysis"] == "final analysis"
+    assert "Part 1:\nshort summary." in llm.prompts[-1]
+
+
+def test_async_map_reduce_matches_sync_prompt():
+    llm = SummarizingLLM()
+    evaluator = NarrativeEvaluator(llm)
+    evaluator.chunk_max_chars = 1000
+
+    sync_prompt = evaluator._prepare_analysis_prompt(make_script(), "Three-Act Structure")
+    async_prompt = asyncio.run(evaluator._aprepare_analysis_prompt(make_script(), "Three-Act Structure"))
+    assert sync_prompt == async_prompt
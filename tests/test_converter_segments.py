@@ -0,0 +1,41 @@
+from service.converter import BEAT_SPECS, convert_to_format, segment, segment_all
+
+SENTENCES = [f"Sentence number {i} moves the story." for i in range(40)]
+
+
+def test_beats_cover_text_in_order():
+    structure = {"sentences": SENTENCES}
+    for name, spec in BEAT_SPECS.items():
+        result = convert_to_format(structure, name)
+        assert list(result) == [beat for beat, _ in spec]
+        assert ' '.join(result.values()) == ' '.join(SENTENCES)
+
+
+def test_beats_follow_weights():
+    result = convert_to_format({"sentences": SENTENCES}, "three_act")
+    counts = [value.count("Sentence") for value in result.values()]
+    assert counts == [10, 20, 10]
+
+
+def test_no_empty_beats_with_few_sentences():
+    structure = {"sentences": ["The hero wakes up in a quiet village.", "A stranger arrives with a letter and a map."]}
+    for name in ("harmon_story_circle", "soth_story_structure"):
+        assert all(convert_to_format(structure, name).values())
+
+
+def test_segmentation_keeps_offsets():
+    segmentation = segment({"sentences": ["One.", "Two.", "Three.", "Four."]}, "four_act")
+    assert segmentation.spans["Act 2"] == (5, 9)
+    assert segmentation["Act 2"] == "Two."
+
+
+def test_segment_all_shares_text():
+    results = segment_all({"sentences": SENTENCES})
+    assert set(results) == set(BEAT_SPECS)
+    texts = {id(segmentation.text) for segmentation in results.values()}
+    assert len(texts) == 1
+
+
+def test_invalid_structure():
+    assert convert_to_format("not a structure", "three_act") == {"error": "Invalid or empty structure"}
+    assert all(value == "" for value in convert_to_format({"sentences": []}, "three_act").values())
@@ -0,0 +1,59 @@
+from service.converter import segment
+from service.document import Document
+from service.extractor import extract_document
+from narr_mod import mentions
+from narr_mod.three_act import ThreeAct
+
+TEXT = "Luke meets Han Solo in Mos Eisley.  They escape the Empire!\nWill they reach Alderaan?"
+
+
+def test_document_keeps_offsets_into_source_text():
+    document = extract_document(TEXT, backend="rule")
+
+    assert document.text is TEXT
+    assert document.sentence_count == 3
+    assert str(document.sentence(1)) == "They escape the Empire!"
+    assert [str(entity) for entity in document.entities()] == ["Han Solo", "Mos Eisley", "Empire", "Alderaan"]
+    assert document.word_count == len(document.token_starts) > 0
+    assert document.sentence_starts.itemsize == 4
+
+
+def test_to_structure_matches_legacy_format():
+    structure = extract_document(TEXT, backend="rule").to_structure()
+
+    assert structure["sentences"][0] == "Luke meets Han Solo in Mos Eisley."
+    assert structure["sentence_count"] == 3
+    assert "Han Solo" in structure["entities"]
+
+
+def test_span_search_ignores_case_without_copy():
+    document = Document.from_sentences(["The HERO wakes.", "Conflict grows."])
+    span = document.sentence(0)
+
+    assert span.contains("hero")
+    assert not span.contains("conflict")
+    assert "HERO" in span and "hero" not in span
+    assert span == "The HERO wakes."
+
+
+def test_span_search_stays_inside_span():
+    document = Document.from_sentences(["İstanbul at night.", "The end."])
+    assert document.sentence(1).contains("END")
+    assert not document.sentence(0).contains("end")
+
+
+def test_segmentation_uses_source_document():
+    document = extract_document(TEXT, backend="rule")
+    segmentation = segment(document, "three_act")
+
+    assert segmentation.document is document
+    assert ' '.join(segmentation.to_dict().values()).split() == TEXT.split()
+
+
+def test_narrative_analysis_accepts_segmentation():
+    document = Document.from_sentences(["The setting is a small town.", "The conflict starts to develop.", "The story ends."])
+    analysis = ThreeAct()._perform_initial_analysis(segment(document, "three_act"))
+
+    assert "Setting is present" in analysis["Act1"]
+    assert "conflict seems to be developing" in analysis["Act2"]
+    assert mentions("A Resolution", "resolution")
@@ -0,0 +1,56 @@
+# tests/test_document_formats.py
+
+import zipfile
+from io import BytesIO
+
+import pytest
+
+from service.extraction import ExtractionError, extract_uploaded_text
+
+W = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+# \u в обычной строке Python означал бы символ, поэтому управляющее слово RTF собирается по частям
+RTF_UNICODE = "\\" + "u"
+
+
+def make_docx(paragraphs):
+    body = ''.join(
+        f'<w:p><w:r><w:t>{first}</w:t><w:tab/><w:t xml:space="preserve">{second}</w:t></w:r></w:p>'
+        for first, second in paragraphs
+    )
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('word/document.xml', f'<?xml version="1.0"?><w:document xmlns:w="{W}"><w:body>{body}</w:body></w:document>')
+    buffer.seek(0)
+    return buffer
+
+
+RTF = (
+    r"{\rtf1\ansi\ansicpg1251{\fonttbl{\f0 Times;}}{\*\generator Writer;}{\info{\title Hidden}}"
+    "\n" r"\pard INT. ROOM - NIGHT\par"
+    "\n" r"\'cf\'f0\'e8\'e2\'e5\'f2, \uc1" + RTF_UNICODE + "1052?" + RTF_UNICODE + "1080?" + RTF_UNICODE + "1088?"
+    r"!\tab end\line {\b bold} \{x\}\par}"
+).encode('ascii')
+
+
+def test_docx_paragraphs_and_tabs():
+    text = extract_uploaded_text("script.docx", make_docx([("INT. ROOM", "NIGHT"), ("Hero", "waits")]))
+    assert text == "INT. ROOM\tNIGHT\nHero\twaits\n"
+
+
+def test_rtf_skips_destinations_and_decodes_code_page():
+    text = extract_uploaded_text("script.rtf", BytesIO(RTF))
+    assert text == "INT. ROOM - NIGHT\nПривет, Мир!\tend\nbold {x}\n"
+    assert "Hidden" not in text and "Times" not in text
+
+
+def test_doc_extension_with_rtf_or_docx_content_is_parsed_in_process():
+    assert extract_uploaded_text("script.doc", BytesIO(RTF)).startswith("INT. ROOM")
+    assert extract_uploaded_text("script.doc", make_docx([("A", "B")])) == "A\tB\n"
+
+
+def test_broken_docx_is_reported():
+    with pytest.raises(ExtractionError):
+        extract_uploaded_text("script.docx", BytesIO(b"not a zip"))
+    with pytest.raises(ExtractionError):
+        extract_uploaded_text("script.odt", BytesIO(b""))
@@ -0,0 +1,86 @@
+# tests/test_fast_classifier.py
+
+from service.cache import CachedLLM, LLMCache
+from service.evaluator import NarrativeEvaluator
+from service.tokens import TokenBudget
+from service.fast_classifier import FastClassifier, classification_examples, extract_features, train_from_cache
+
+HERO_TEXT = "The mentor guides her across the threshold. The ordeal brings a reward and the elixir. "
+ACT_TEXT = "Act 1 opens the story. Act 2 raises the conflict. Act 3 brings the resolution. "
+
+
+def training_examples():
+    examples = []
+    for i in range(1, 6):
+        examples.append((extract_features(HERO_TEXT * i), "Hero's journey (Chris Vogler)"))
+        examples.append((extract_features(ACT_TEXT * i), "Three-Act Structure"))
+    return examples
+
+
+def test_classifier_learns_lexical_cues():
+    model = FastClassifier.train(training_examples())
+
+    structure, confidence = model.predict(HERO_TEXT * 3)
+    assert structure == "Hero's journey (Chris Vogler)"
+    assert confidence > 0.9
+    assert model.predict(ACT_TEXT * 2)[0] == "Three-Act Structure"
+
+
+def test_classifier_round_trips_through_json(tmp_path):
+    model = FastClassifier.train(training_examples())
+    path = str(tmp_path / "model.json")
+    model.save(path)
+
+    loaded = FastClassifier.load(path)
+    assert loaded.predict(HERO_TEXT) == model.predict(HERO_TEXT)
+    assert FastClassifier.load(str(tmp_path / "missing.json")) is None
+
+
+def test_evaluator_skips_llm_when_confident():
+    def llm(prompt, stop=None):
+        raise AssertionError("confident prediction must not call the LLM")
+
+    evaluator = NarrativeEvaluator(llm, fast_classifier=FastClassifier.train(training_examples()))
+    assert evaluator.classify(HERO_TEXT * 2) == "Hero's journey (Chris Vogler)"
+
+
+def test_evaluator_falls_back_to_llm_below_threshold():
+    evaluator = NarrativeEvaluator(lambda prompt, stop=None: "four_act", fast_classifier=FastClassifier.train(training_examples()))
+    evaluator.fast_classifier_threshold = 1.01
+
+    assert evaluator.classify(HERO_TEXT) == "Four-Act Structure"
+
+
+def test_training_data_comes_from_cached_llm_classifications(tmp_path):
+    answers = iter(["vogler_hero_journey", "three_act"] * 5)
+    cache = LLMCache(cache_dir=str(tmp_path / "cache"))
+    evaluator = NarrativeEvaluator(CachedLLM(lambda prompt, stop=None: next(answers), cache), fast_classifier=False)
+    for i in range(1, 6):
+        evaluator.classify(HERO_TEXT * i)
+        evaluator.classify(ACT_TEXT * i)
+
+    examples = list(classification_examples(cache, evaluator._parse_classification))
+    assert len(examples) == 10
+    assert {label for _, label in examples} == {"Hero's journey (Chris Vogler)", "Three-Act Structure"}
+    assert all(text.startswith(("The mentor", "Act 1")) for text, _ in examples)
+
+    model, samples, accuracy = train_from_cache(cache, evaluator._parse_classification, str(tmp_path / "model.json"), min_samples=10)
+    assert samples == 10
+    assert accuracy == 1.0
+
+
+def test_long_text_is_classified_on_the_same_fitted_text_as_training(tmp_path):
+    answers = iter(["vogler_hero_journey", "three_act"] * 5)
+    cache = LLMCache(cache_dir=str(tmp_path / "cache"))
+    evaluator = NarrativeEvaluator(CachedLLM(lambda prompt, stop=None: next(answers), cache), fast_classifier=False)
+    evaluator.budget = TokenBudget(context_tokens=600)
+    for i in (1, 3, 6, 12, 24):
+        evaluator.classify(HERO_TEXT * i)
+        evaluator.classify(ACT_TEXT * i)
+    model, _, _ = train_from_cache(cache, evaluator._parse_classification, str(tmp_path / "model.json"), min_samples=10)
+
+    evaluator.fast_classifier = model
+    evaluator.llm = lambda prompt, stop=None: "unknown"
+    long_text = HERO_TEXT * 2000
+    assert len(evaluator._fitted_classification_text(long_text)) < len(long_text) // 50
+    assert evaluator.classify(long_text) == "Hero's journey (Chris Vogler)"
@@ -0,0 +1,56 @@
+# tests/test_jobs.py
+
+import threading
+import time
+import pytest
+from service.jobs import JobManager, JobQueueFull
+
+
+def wait_for(job, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while job.status in ("queued", "running") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_job_runs_and_reports_stages():
+    def handler(job):
+        job.start_stage("analyze")
+        job.update_stage("analyze", tokens=3)
+        job.finish_stage("analyze")
+        return {"analysis": job.payload["text"].upper()}
+
+    manager = JobManager(handler, workers=1)
+    job = wait_for(manager.submit({"text": "abc"}))
+
+    data = manager.get(job.id).to_dict()
+    assert data["status"] == "done"
+    assert data["result"] == {"analysis": "ABC"}
+    assert data["stages"]["analyze"]["status"] == "done"
+    assert data["stages"]["analyze"]["tokens"] == 3
+
+
+def test_failed_job_reports_error():
+    def handler(job):
+        raise RuntimeError("model is down")
+
+    manager = JobManager(handler, workers=1)
+    job = wait_for(manager.submit({}))
+
+    assert job.to_dict()["status"] == "failed"
+    assert job.to_dict()["error"] == "model is down"
+
+
+def test_full_queue_rejects_new_jobs():
+    release = threading.Event()
+    manager = JobManager(lambda job: release.wait(), workers=1, queue_size=1)
+
+    running = manager.submit({})
+    while running.status != "running":
+        time.sleep(0.01)
+    manager.submit({})
+    with pytest.raises(JobQueueFull):
+        manager.submit({})
+
+    release.set()
+    assert manager.stats()["queue_size"] == 1
@@ -0,0 +1,137 @@
+# tests/test_metrics.py
+
+import asyncio
+import urllib.request
+
+import pytest
+
+from app import create_app
+from service.async_llm import AsyncOllamaClient
+from service.cache import LLMCache
+from service.evaluator import NarrativeEvaluator
+from service.metrics import (
+    CACHE_HIT_RATIO,
+    CACHE_LOOKUPS,
+    LLM_COMPLETION_TOKENS,
+    LLM_PROMPT_TOKENS,
+    LLM_REQUESTS,
+    STAGE_ERRORS,
+    STAGE_IN_FLIGHT,
+    STAGE_SECONDS,
+    Counter,
+    Histogram,
+    MeteredLLM,
+    Registry,
+    render,
+    start_metrics_server,
+    track,
+)
+import app.routes as routes
+
+
+def sample(metric, labels, suffix=''):
+    values = {(key, name): value for name, key, _, value in metric.samples()}
+    return values.get((labels, suffix), 0)
+
+
+def test_render_uses_prometheus_text_format():
+    registry = Registry()
+    requests = registry.register(Counter("demo_requests_total", "Requests", ["format"]))
+    latency = registry.register(Histogram("demo_seconds", "Latency", buckets=(0.1, 1)))
+    requests.inc(format='pdf')
+    requests.inc(2, format='pdf')
+    latency.observe(0.5)
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE demo_requests_total counter" in lines
+    assert 'demo_requests_total{format="pdf"} 3' in lines
+    assert 'demo_seconds_bucket{le="0.1"} 0' in lines
+    assert 'demo_seconds_bucket{le="1"} 1' in lines
+    assert 'demo_seconds_bucket{le="+Inf"} 1' in lines
+    assert "demo_seconds_sum 0.5" in lines
+    assert "demo_seconds_count 1" in lines
+    with pytest.raises(ValueError):
+        requests.inc(kind='pdf')
+
+
+def test_track_counts_errors_and_in_flight():
+    errors = STAGE_ERRORS.value(stage="test_stage")
+    with track("test_stage"):
+        assert sample(STAGE_IN_FLIGHT, ("test_stage",)) == 1
+    with pytest.raises(RuntimeError):
+        with track("test_stage"):
+            raise RuntimeError("boom")
+
+    assert STAGE_ERRORS.value(stage="test_stage") == errors + 1
+    assert sample(STAGE_IN_FLIGHT, ("test_stage",)) == 0
+    assert sample(STAGE_SECONDS, ("test_stage",), "_count") == 2
+
+
+def test_metered_llm_counts_estimated_tokens():
+    requests = LLM_REQUESTS.value(mode="sync")
+    completion = LLM_COMPLETION_TOKENS.value()
+    llm = MeteredLLM(lambda prompt, stop=None: "one two three four")
+
+    assert llm("prompt") == "one two three four"
+    assert LLM_REQUESTS.value(mode="sync") == requests + 1
+    assert LLM_COMPLETION_TOKENS.value() == completion + 6
+
+
+class FakeOllama:
+    async def generate(self, model, prompt, options=None):
+        return {"response": "answer", "prompt_eval_count": 120, "eval_count": 40, "eval_duration": 2 * 10 ** 9}
+
+
+def test_async_client_records_ollama_token_counts(monkeypatch):
+    client = AsyncOllamaClient(model="llama3.2", cache=LLMCache())
+    monkeypatch.setattr(client, "_client", FakeOllama)
+    prompt_tokens = LLM_PROMPT_TOKENS.value()
+    completion = LLM_COMPLETION_TOKENS.value()
+
+    assert asyncio.run(client("prompt")) == "answer"
+    # Повторный запрос отвечает кэш и в счётчики токенов не попадает
+    assert asyncio.run(client("prompt")) == "answer"
+
+    assert LLM_PROMPT_TOKENS.value() == prompt_tokens + 120
+    assert LLM_COMPLETION_TOKENS.value() == completion + 40
+    assert 'narrative_llm_tokens_per_second_bucket{le="20"}' in render()
+
+
+def test_cache_lookups_feed_hit_ratio():
+    hits = CACHE_LOOKUPS.value(result="memory_hit")
+    misses = CACHE_LOOKUPS.value(result="miss")
+    cache = LLMCache()
+    cache.get("key")
+    cache.put("key", "value")
+    cache.get("key")
+
+    assert CACHE_LOOKUPS.value(result="memory_hit") == hits + 1
+    assert CACHE_LOOKUPS.value(result="miss") == misses + 1
+    assert 0 < sample(CACHE_HIT_RATIO, ()) < 1
+
+
+def test_metrics_endpoint_reports_pipeline_stages(monkeypatch):
+    monkeypatch.setattr(routes, "get_evaluator", lambda: NarrativeEvaluator(lambda prompt, stop=None: "three_act"))
+    client = create_app().test_client()
+    client.post('/analyze', data={"text": "Some script text. It has two sentences."})
+
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    body = response.get_data(as_text=True)
+    for stage in ("segment", "classify", "analyze", "convert", "visualize"):
+        assert f'narrative_stage_duration_seconds_count{{stage="{stage}"}}' in body
+
+
+def test_metrics_server_serves_registry():
+    server = start_metrics_server(0, host='127.0.0.1')
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert response.status == 200
+            assert "narrative_llm_cache_hit_ratio" in response.read().decode('utf-8')
+    finally:
+        server.shutdown()
+        server.server_close()
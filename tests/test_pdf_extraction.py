@@ -0,0 +1,80 @@
+# tests/test_pdf_extraction.py
+
+from io import BytesIO
+
+import service.extraction as extraction
+from config import Config
+from service.extraction import extract_text_from_pdf_miner, iter_pdf_pages, pdf_page_count
+
+
+def make_pdf(pages):
+    """Минимальный PDF: по одной строке Helvetica на каждый элемент pages"""
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    for i, line in enumerate(pages):
+        page_id, content_id = 4 + 2 * i, 5 + 2 * i
+        kids.append(f"{page_id} 0 R")
+        stream = f"BT /F1 12 Tf 72 720 Td ({line}) Tj ET"
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode()
+        objects[content_id] = f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode()
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    positions = {}
+    for number in sorted(objects):
+        positions[number] = len(out)
+        out += f"{number} 0 obj\n".encode() + objects[number] + b"\nendobj\n"
+    xref = len(out)
+    size = max(objects) + 1
+    out += f"xref\n0 {size}\n0000000000 65535 f \n".encode()
+    for number in range(1, size):
+        out += f"{positions[number]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+PAGES = [f"Page {i} of the script" for i in range(10)]
+
+
+def test_pages_are_yielded_in_order():
+    data = make_pdf(PAGES)
+
+    pages = list(iter_pdf_pages(BytesIO(data), workers=1))
+
+    assert pdf_page_count(data) == 10
+    assert [page.strip() for page in pages] == PAGES
+    assert extract_text_from_pdf_miner(BytesIO(data)) == ''.join(pages)
+
+
+def test_process_pool_matches_sequential_extraction(monkeypatch):
+    monkeypatch.setattr(Config, "PDF_PAGES_PER_TASK", 3)
+    data = make_pdf(PAGES)
+
+    assert list(iter_pdf_pages(data, workers=2)) == list(iter_pdf_pages(data, workers=1))
+
+
+def test_fast_mode_extracts_plain_text():
+    pages = list(iter_pdf_pages(make_pdf(PAGES), fast=True, workers=1))
+    assert [page.strip() for page in pages] == PAGES
+
+
+def test_page_and_size_caps():
+    data = make_pdf(PAGES)
+
+    assert len(list(iter_pdf_pages(data, max_pages=3, workers=1))) == 3
+    assert len(''.join(iter_pdf_pages(data, max_chars=30, workers=1))) == 30
+
+
+def test_process_pool_does_not_fork(monkeypatch):
+    monkeypatch.setattr(extraction, "_pdf_pool", None)
+    pool = extraction._get_pdf_pool(1)
+    try:
+        assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+    finally:
+        pool.shutdown()
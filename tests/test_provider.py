@@ -0,0 +1,53 @@
+# tests/test_provider.py
+
+import threading
+import time
+
+import pytest
+
+from service.provider import BACKENDS, LLMProvider, register_backend
+
+
+@pytest.fixture
+def counting_backend(monkeypatch):
+    monkeypatch.setattr("service.provider.BACKENDS", dict(BACKENDS))
+    created = []
+
+    def llm_factory():
+        time.sleep(0.01)
+        created.append("llm")
+        return lambda prompt, stop=None: "three_act"
+
+    register_backend("counting", llm_factory)
+    return created
+
+
+def test_clients_are_created_lazily_once(counting_backend):
+    provider = LLMProvider(backend="counting")
+    assert counting_backend == []
+
+    evaluators = []
+    threads = [threading.Thread(target=lambda: evaluators.append(provider.evaluator())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counting_backend == ["llm"]
+    assert all(evaluator is evaluators[0] for evaluator in evaluators)
+    assert provider.async_llm() is None
+
+
+def test_backend_can_be_swapped(counting_backend):
+    provider = LLMProvider(backend="counting")
+    first = provider.evaluator()
+
+    register_backend("other", lambda: (lambda prompt, stop=None: "four_act"))
+    provider.use_backend("other")
+
+    assert provider.evaluator() is not first
+    assert provider.llm()("prompt") == "four_act"
+
+    provider.use_backend("missing")
+    with pytest.raises(ValueError):
+        provider.llm()
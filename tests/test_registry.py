@@ -0,0 +1,47 @@
+import pytest
+
+from app.constants import STRUCTURE_MAPPING
+from narr_mod import StructureRegistry, get_narrative_structure, get_structure, registry
+from narr_mod.campbell_monomyth import CampbellMonomyth
+from service.converter import BEAT_SPECS
+from service.evaluator import NarrativeEvaluator
+
+
+def test_every_mapped_structure_is_registered():
+    for key in STRUCTURE_MAPPING.values():
+        entry = registry.get(key)
+        assert entry.prompt
+        assert entry.beats == tuple(beat for beat, _ in BEAT_SPECS[key])
+
+
+def test_instances_are_shared():
+    assert get_structure("three_act") is get_structure("three_act")
+    assert get_narrative_structure("three_act") is type(get_structure("three_act"))
+
+
+def test_reexport_modules_are_aliases():
+    assert get_structure("monomyth") is get_structure("campbell_monomyth")
+    assert isinstance(get_structure("monomyth"), CampbellMonomyth)
+
+
+def test_unknown_structure():
+    with pytest.raises(ValueError):
+        get_structure("missing")
+
+
+def test_validate_reports_missing_class():
+    with pytest.raises(ValueError, match="no NarrativeStructure class"):
+        StructureRegistry().validate({"Three-Act Structure": "three_act"}, BEAT_SPECS)
+    with pytest.raises(ValueError, match="no beat spec"):
+        registry.validate({"Three-Act Structure": "three_act"}, {})
+
+
+def test_classifier_alias_resolves_to_display_name():
+    parse = NarrativeEvaluator(llm=None, fast_classifier=False)._parse_classification
+    assert parse("monomyth") == "The Monomyth (Joseph Campbell)"
+    assert parse('"campbell_monomyth"') == "The Monomyth (Joseph Campbell)"
+
+
+def test_classifier_hero_journey_means_vogler():
+    evaluator = NarrativeEvaluator(llm=lambda prompt, stop=None: "hero_journey", fast_classifier=False)
+    assert evaluator.classify("Some text") == "Hero's journey (Chris Vogler)"
@@ -0,0 +1,169 @@
+# tests/test_routes.py
+
+import gzip
+import json
+import time
+from io import BytesIO
+from app import create_app
+from service.evaluator import NarrativeEvaluator
+import app.routes as routes
+from tests.test_pdf_extraction import make_pdf
+
+
+class FakeStreamingLLM:
+    def __call__(self, prompt, stop=None):
+        return "three_act"
+
+    def stream(self, prompt, stop=None):
+        yield "Act one "
+        yield "works."
+
+
+def use_evaluator(monkeypatch, evaluator):
+    monkeypatch.setattr(routes, "get_evaluator", lambda: evaluator)
+
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_analyze_stream_sends_stages_tokens_and_result(monkeypatch):
+    use_evaluator(monkeypatch, NarrativeEvaluator(FakeStreamingLLM()))
+    client = create_app().test_client()
+
+    response = client.post('/analyze/stream', data={"text": "Some script text."})
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    events = parse_events(response.get_data(as_text=True))
+    stages = [data["stage"] for event, data in events if event == "stage"]
+    assert stages == ["extracted", "classifying", "classified", "analyzing"]
+    assert [data["text"] for event, data in events if event == "token"] == ["Act one ", "works."]
+    event, result = events[-1]
+    assert event == "result"
+    assert result["structure"] == "Three-Act Structure"
+    assert result["analysis"] == "Act one works."
+
+
+def test_analyze_stream_rejects_empty_request():
+    client = create_app().test_client()
+    response = client.post('/analyze/stream', data={})
+    assert response.status_code == 400
+
+
+def test_jobs_endpoint_runs_pipeline_in_background(monkeypatch):
+    use_evaluator(monkeypatch, NarrativeEvaluator(FakeStreamingLLM()))
+    client = create_app().test_client()
+
+    response = client.post('/jobs', data={"text": "Some script text."})
+    assert response.status_code == 202
+    status_url = response.get_json()["status_url"]
+
+    for _ in range(200):
+        job = client.get(status_url).get_json()
+        if job["status"] not in ("queued", "running"):
+            break
+        time.sleep(0.01)
+
+    assert job["status"] == "done"
+    assert job["stages"]["classify"]["structure"] == "Three-Act Structure"
+    assert job["stages"]["analyze"]["tokens"] == 2
+    assert job["result"]["analysis"] == "Act one works."
+    assert client.get('/jobs/unknown').status_code == 404
+
+
+def test_pdf_job_classifies_first_pages_early(monkeypatch):
+    evaluator = NarrativeEvaluator(FakeStreamingLLM(), fast_classifier=False)
+    monkeypatch.setattr(evaluator, "classification_chars", lambda: 10)
+    use_evaluator(monkeypatch, evaluator)
+    client = create_app().test_client()
+
+    pdf = make_pdf([f"Page {i} of the script" for i in range(4)])
+    response = client.post('/jobs', data={"file": (BytesIO(pdf), "script.pdf")})
+    status_url = response.get_json()["status_url"]
+
+    for _ in range(200):
+        job = client.get(status_url).get_json()
+        if job["status"] not in ("queued", "running"):
+            break
+        time.sleep(0.01)
+
+    assert job["status"] == "done"
+    assert job["stages"]["extract"]["pages"] == 4
+    assert job["stages"]["classify"]["early"] is True
+    assert job["stages"]["classify"]["structure"] == "Three-Act Structure"
+    assert job["result"]["analysis"] == "Act one works."
+
+
+def test_estimate_endpoint_returns_plan_without_model_call(monkeypatch):
+    def llm(prompt, stop=None):
+        raise AssertionError("estimate must not call the model")
+
+    use_evaluator(monkeypatch, NarrativeEvaluator(llm))
+    client = create_app().test_client()
+
+    response = client.post('/analyze/estimate', data={"text": "Some script text.", "structure": "Four-Act Structure"})
+
+    assert response.status_code == 200
+    plan = response.get_json()
+    assert plan["structure"] == "Four-Act Structure"
+    assert plan["stages"][0]["stage"] == "analyze"
+    assert plan["estimated_seconds"] > 0
+
+
+def test_analyze_returns_selected_fields_and_not_modified(monkeypatch):
+    calls = []
+
+    def llm(prompt, stop=None):
+        calls.append(prompt)
+        return "Act one works."
+
+    use_evaluator(monkeypatch, NarrativeEvaluator(llm))
+    client = create_app().test_client()
+    data = {"text": "Some script text.", "structure": "Three-Act Structure", "fields": "analysis"}
+
+    response = client.post('/analyze', data=data)
+    assert response.status_code == 200
+    assert response.get_json() == {"analysis": "Act one works.", "structure": "Three-Act Structure"}
+    etag = response.headers['ETag']
+
+    repeat = client.post('/analyze', data=data, headers={'If-None-Match': etag})
+    assert repeat.status_code == 304
+    assert repeat.headers['ETag'] == etag
+    assert len(calls) == 1
+
+    other = client.post('/analyze', data={**data, "fields": "analysis,visualization"}, headers={'If-None-Match': etag})
+    assert other.status_code == 200
+
+    wildcard = client.post('/analyze', data=data, headers={'If-None-Match': '*'})
+    assert wildcard.status_code == 200
+    assert wildcard.get_json()["analysis"] == "Act one works."
+    assert client.post('/analyze', data={**data, "fields": "raw"}).status_code == 400
+
+
+def test_analyze_compresses_large_responses(monkeypatch):
+    use_evaluator(monkeypatch, NarrativeEvaluator(lambda prompt, stop=None: "Long analysis. " * 200))
+    client = create_app().test_client()
+
+    response = client.post(
+        '/analyze',
+        data={"text": "Some script text.", "structure": "Three-Act Structure"},
+        headers={'Accept-Encoding': 'gzip'},
+    )
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'].endswith('-gzip"')
+    result = json.loads(gzip.decompress(response.data))
+    assert result["analysis"].startswith("Long analysis.")
+    assert "visualization" in result
+
+    repeat = client.post(
+        '/analyze',
+        data={"text": "Some script text.", "structure": "Three-Act Structure"},
+        headers={'If-None-Match': response.headers['ETag']},
+    )
+    assert repeat.status_code == 304
@@ -0,0 +1,92 @@
+import pytest
+
+from service import segmenters
+from service.extractor import extract_structure, extract_structures
+from service.segmenters import RuleSegmenter, Segmenter, get_segmenter, guess_entities
+
+TEXT = "Luke meets Han Solo in Mos Eisley. They escape the Empire! Will they reach Alderaan?"
+
+
+def test_rule_segmenter_splits_sentences():
+    result = extract_structure(TEXT, backend="rule")
+
+    assert result["sentence_count"] == 3
+    assert result["sentences"][0] == "Luke meets Han Solo in Mos Eisley."
+    assert "Han Solo" in result["entities"]
+    assert result["word_count"] > 0
+
+
+def test_spacy_segmenter_matches_structure_format():
+    result = extract_structure(TEXT, backend="spacy")
+
+    assert set(result) == {"sentences", "entities", "word_count", "sentence_count"}
+    assert result["sentence_count"] == len(result["sentences"]) == 3
+
+
+def test_model_loaded_lazily():
+    segmenter = RuleSegmenter()
+    assert segmenter._model is None
+
+    segmenter.segment("One. Two.")
+    assert segmenter._model is not None
+
+
+def test_get_segmenter_returns_shared_instance():
+    assert get_segmenter("rule") is get_segmenter("rule")
+
+
+def test_get_segmenter_uses_config_default(monkeypatch):
+    monkeypatch.setattr(segmenters.Config, "SEGMENTER", "rule")
+    assert isinstance(get_segmenter(), RuleSegmenter)
+
+
+def test_unknown_segmenter():
+    with pytest.raises(ValueError):
+        get_segmenter("missing")
+
+
+def test_extract_structures_batches_texts():
+    texts = ["First one. Second one.", "Only one.", "Run. Hide. Wait."]
+    results = extract_structures(texts, backend="rule", batch_size=2)
+
+    assert [result["sentence_count"] for result in results] == [2, 1, 3]
+
+
+def test_guess_entities_skips_sentence_start():
+    text = "Luke meets Obi-Wan Kenobi on Tatooine."
+    spans = guess_entities(text, [0], [len(text)])
+    assert [text[start:end] for start, end in spans] == ["Obi-Wan Kenobi", "Tatooine"]
+
+
+def test_incomplete_backend_fails_on_instantiation():
+    class LoadOnly(Segmenter):
+        name = "load-only"
+
+        def _load(self):
+            return None
+
+    with pytest.raises(TypeError):
+        LoadOnly()
+
+
+def test_spacy_segmenter_splits_long_text_into_pieces(monkeypatch):
+    text = "\n\n".join(f"Scene {i}. Luke meets Han Solo in Mos Eisley. They escape the Empire!" for i in range(12))
+    whole = segmenters.SpacySegmenter().segment(text)
+    monkeypatch.setattr(segmenters.Config, "SEGMENTER_MAX_CHARS", 200)
+
+    document = segmenters.SpacySegmenter().segment(text)
+
+    assert document.text is text
+    assert document.sentence_count == whole.sentence_count == 36
+    assert [document.sentence(i) for i in range(document.sentence_count)] == \
+        [whole.sentence(i) for i in range(whole.sentence_count)]
+    assert list(document.token_starts) == list(whole.token_starts)
+
+
+def test_split_points_cover_text_without_breaking_words():
+    text = "word " * 100
+    points = list(segmenters.split_points(text, 64))
+
+    assert points[0][0] == 0 and points[-1][1] == len(text)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(points, points[1:]))
+    assert all(end - start <= 64 and text[end - 1] == " " for start, end in points[:-1])
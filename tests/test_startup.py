@@ -0,0 +1,15 @@
+# tests/test_startup.py
+
+import subprocess
+import sys
+
+HEAVY = ["langchain", "ollama", "pdfminer", "spacy", "nltk"]
+
+
+def test_entry_points_do_not_import_heavy_dependencies():
+    code = (
+        "import sys, app.routes, telegram_bot, batch\n"
+        f"print(','.join(name for name in {HEAVY!r} if name in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
@@ -0,0 +1,93 @@
+# tests/test_telegram_files.py
+
+import asyncio
+
+import telegram_bot
+from config import Config
+
+
+class FakeFile:
+    def __init__(self, data):
+        self.data = data
+
+    async def download_to_memory(self, out):
+        out.write(self.data)
+
+
+class FakeDocument:
+    def __init__(self, file_name, data, file_size=None):
+        self.file_name = file_name
+        self.file_size = file_size
+        self.data = data
+        self.downloads = 0
+
+    async def get_file(self):
+        self.downloads += 1
+        return FakeFile(self.data)
+
+
+class FakeMessage:
+    def __init__(self, document):
+        self.document = document
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+
+class FakeUser:
+    id = 1
+
+
+class FakeUpdate:
+    effective_user = FakeUser()
+
+    def __init__(self, document):
+        self.message = FakeMessage(document)
+
+
+class FakeContext:
+    user_data = {}
+
+
+def run_analyze_file(monkeypatch, document):
+    analyzed = []
+
+    async def process_text(update, context, text, structure):
+        analyzed.append(text)
+
+    monkeypatch.setattr(telegram_bot, "process_text", process_text)
+    update = FakeUpdate(document)
+    asyncio.run(telegram_bot.analyze_file(update, FakeContext()))
+    return analyzed, update.message.replies
+
+
+def test_document_is_extracted_from_memory(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    document = FakeDocument("script.txt", "Привет, сценарий.".encode('utf-8'), file_size=31)
+
+    analyzed, replies = run_analyze_file(monkeypatch, document)
+
+    assert analyzed == ["Привет, сценарий."]
+    assert replies == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_oversized_document_is_rejected_before_download(monkeypatch):
+    monkeypatch.setattr(Config, "TELEGRAM_MAX_FILE_BYTES", 10)
+    document = FakeDocument("script.txt", b"x" * 100, file_size=100)
+
+    analyzed, replies = run_analyze_file(monkeypatch, document)
+
+    assert analyzed == []
+    assert document.downloads == 0
+    assert "слишком большой" in replies[0]
+
+
+def test_document_without_size_is_checked_after_download(monkeypatch):
+    monkeypatch.setattr(Config, "TELEGRAM_MAX_FILE_BYTES", 10)
+
+    analyzed, replies = run_analyze_file(monkeypatch, FakeDocument("script.txt", b"x" * 100))
+
+    assert analyzed == []
+    assert "слишком большой" in replies[0]
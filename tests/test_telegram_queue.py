@@ -0,0 +1,80 @@
+# tests/test_telegram_queue.py
+
+import asyncio
+
+import pytest
+
+import telegram_bot
+from telegram_bot import AnalysisQueue
+
+
+def test_user_submissions_run_in_order_and_users_in_parallel():
+    queue = AnalysisQueue(max_running=2, max_queued=10, per_user=3)
+    events = []
+
+    async def analysis(user_id, name):
+        async with queue.slot(user_id):
+            events.append(f"start {name}")
+            await asyncio.sleep(0.01)
+            events.append(f"end {name}")
+
+    async def run():
+        positions = [queue.admit(1), queue.admit(1), queue.admit(2)]
+        await asyncio.gather(analysis(1, "a1"), analysis(1, "a2"), analysis(2, "b1"))
+        return positions
+
+    positions = asyncio.run(run())
+
+    assert positions == [0, 1, 0]
+    # Второй анализ пользователя 1 начинается только после первого, анализ пользователя 2 идёт параллельно
+    assert events.index("end a1") < events.index("start a2")
+    assert events.index("start b1") < events.index("end a1")
+
+
+def test_queue_sheds_load_over_limits():
+    queue = AnalysisQueue(max_running=1, max_queued=3, per_user=2)
+
+    assert queue.admit(1) == 0
+    assert queue.admit(1) == 1
+    assert queue.admit(1) is None
+    assert queue.admit(2) == 0
+    assert queue.admit(3) is None
+
+    async def release(user_id):
+        async with queue.slot(user_id):
+            pass
+
+    async def run():
+        await release(1)
+
+    asyncio.run(run())
+    assert queue.admit(3) == 0
+
+
+class FailingMessage:
+    async def reply_text(self, text, **kwargs):
+        raise ConnectionError("Telegram is unreachable")
+
+
+class FakeUser:
+    id = 1
+
+
+class FakeUpdate:
+    effective_user = FakeUser()
+    message = FailingMessage()
+
+
+def test_failed_queue_reply_releases_the_place(monkeypatch):
+    queue = AnalysisQueue(max_running=1, max_queued=2, per_user=2)
+    monkeypatch.setattr(telegram_bot, "analysis_queue", queue)
+    assert queue.admit(1) == 0
+
+    async def get_text():
+        raise AssertionError("analysis must not start after a failed reply")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(telegram_bot.run_queued(FakeUpdate(), None, get_text))
+
+    # Место второго анализа освобождено: пользователь снова может поставить анализ в очередь
+    assert queue.admit(1) == 1
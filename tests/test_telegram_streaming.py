@@ -0,0 +1,57 @@
+# tests/test_telegram_streaming.py
+
+import asyncio
+from telegram_bot import StreamingReply
+
+
+class FakeChat:
+    def __init__(self):
+        self.messages = []
+
+    async def send_message(self, text):
+        message = FakeMessage(self, text)
+        self.messages.append(message)
+        return message
+
+
+class FakeMessage:
+    def __init__(self, chat, text):
+        self.chat = chat
+        self.text = text
+        self.edits = []
+
+    async def edit_text(self, text):
+        self.edits.append(text)
+        self.text = text
+
+
+def test_streaming_reply_throttles_edits():
+    chat = FakeChat()
+    message = FakeMessage(chat, "Анализирую текст...")
+    reply = StreamingReply(message, interval=60)
+
+    async def run():
+        for word in ["one ", "two ", "three"]:
+            await reply.append(word)
+        await reply.finish()
+
+    asyncio.run(run())
+
+    # Первая правка сразу, остальные ждут окончания интервала, финальная — в finish()
+    assert message.edits == ["one ", "one two three"]
+
+
+def test_streaming_reply_rolls_over_at_limit():
+    chat = FakeChat()
+    message = FakeMessage(chat, "Анализирую текст...")
+    reply = StreamingReply(message, limit=10, interval=0)
+
+    async def run():
+        await reply.append("0123456789abc")
+        await reply.append("def")
+        await reply.finish()
+
+    asyncio.run(run())
+
+    assert message.text == "0123456789"
+    assert [m.text for m in chat.messages] == ["abcdef"]
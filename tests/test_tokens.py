@@ -0,0 +1,70 @@
+# tests/test_tokens.py
+
+from narr_mod.four_act import FourAct
+from service.evaluator import NarrativeEvaluator
+from service.tokens import TokenBudget, estimate_tokens, sample_text, truncate_text
+
+
+def test_estimate_tokens_counts_words_and_characters():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("a" * 400) == 100
+    # Кириллица и пунктуация дают больше токенов, чем длина / 4
+    assert estimate_tokens("Да, нет, да!") > len("Да, нет, да!") // 4
+
+
+def test_fit_text_truncates_and_samples_into_budget():
+    budget = TokenBudget(context_tokens=200, output_tokens={"analyze": 50})
+    text = " ".join(f"word{i}" for i in range(2000))
+
+    truncated = budget.fit_text(text, "analyze", "truncate")
+    sampled = budget.fit_text(text, "analyze", "sample")
+
+    assert estimate_tokens(truncated) <= 150
+    assert text.startswith(truncated)
+    assert estimate_tokens(sampled) <= 150
+    assert "word0 " in sampled and "word1999" in sampled
+
+
+def test_truncate_and_sample_keep_short_text():
+    assert truncate_text("short", 100) == "short"
+    assert sample_text("short", 100) == "short"
+
+
+def test_estimate_plans_chunked_analysis_without_calling_model():
+    def llm(prompt, stop=None):
+        raise AssertionError("estimate must not call the model")
+
+    evaluator = NarrativeEvaluator(llm)
+    evaluator.fit_strategy = "chunk"
+    text = "The hero walks into town. " * 2000
+
+    plan = evaluator.estimate(text)
+
+    stages = {stage["stage"]: stage for stage in plan["stages"]}
+    assert plan["structure"] == "Three-Act Structure"
+    assert stages["classify"]["fit"] == "sample"
+    assert stages["classify"]["fits"]
+    assert stages["summarize"]["calls"] > 1
+    assert stages["analyze"]["fits"]
+    # Перепроверка в narr_mod пока не вызывает модель и в оценку не входит
+    assert "double_check" not in stages
+    assert plan["estimated_seconds"] > 0
+
+
+def test_estimate_short_text_fits_as_is():
+    evaluator = NarrativeEvaluator(llm=None)
+    plan = evaluator.estimate("A short story.", "Four-Act Structure")
+
+    assert [stage["stage"] for stage in plan["stages"]] == ["analyze"]
+    assert plan["stages"][0]["fit"] is None
+
+
+def test_estimate_includes_double_check_only_when_structure_calls_model(monkeypatch):
+    monkeypatch.setattr(FourAct, "calls_llm_double_check", True)
+    evaluator = NarrativeEvaluator(llm=None)
+
+    four_act = evaluator.estimate("A short story.", "Four-Act Structure")
+    three_act = evaluator.estimate("A short story.", "Three-Act Structure")
+
+    assert [stage["stage"] for stage in four_act["stages"]] == ["analyze", "double_check"]
+    assert [stage["stage"] for stage in three_act["stages"]] == ["analyze"]
@@ -0,0 +1,130 @@
+# tests/test_tracing.py
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from app import create_app
+from service import tracing
+from service.evaluator import NarrativeEvaluator
+from service.metrics import MeteredLLM
+import app.routes as routes
+
+
+@pytest.fixture
+def traces():
+    records = []
+    tracing.set_sink(records.append)
+    yield records
+    tracing.set_sink(None)
+
+
+def by_name(record):
+    return {span["name"]: span for span in record["spans"]}
+
+
+def test_spans_are_nested_and_record_errors(traces):
+    with tracing.trace("root", "req-1", size=3):
+        with tracing.span("outer") as outer:
+            outer.set(structure="three_act")
+            outer.add(tokens=2)
+            outer.add(tokens=3)
+            with pytest.raises(ValueError):
+                with tracing.span("inner"):
+                    raise ValueError("bad input")
+
+    [record] = traces
+    spans = by_name(record)
+    assert record["request_id"] == "req-1"
+    assert spans["root"]["parent_id"] is None
+    assert spans["outer"]["parent_id"] == spans["root"]["span_id"]
+    assert spans["inner"]["parent_id"] == spans["outer"]["span_id"]
+    assert spans["outer"]["attributes"] == {"structure": "three_act", "tokens": 5}
+    assert spans["inner"]["error"] == "ValueError: bad input"
+    assert spans["root"]["duration_ms"] >= spans["outer"]["duration_ms"]
+
+
+def test_spans_outside_trace_are_not_recorded(traces):
+    with tracing.span("orphan") as span:
+        span.set(ignored=True)
+    assert span is tracing.NOOP_SPAN
+    assert traces == []
+
+
+def test_spans_follow_coroutines_and_threads(traces):
+    def blocking():
+        with tracing.span("thread"):
+            pass
+
+    async def work():
+        with tracing.span("async"):
+            await asyncio.to_thread(blocking)
+
+    with tracing.trace("root"):
+        asyncio.run(work())
+
+    spans = by_name(traces[0])
+    assert spans["thread"]["parent_id"] == spans["async"]["span_id"]
+
+
+def test_analyze_request_is_traced_with_request_id(monkeypatch, traces):
+    evaluator = NarrativeEvaluator(MeteredLLM(lambda prompt, stop=None: "three_act"))
+    monkeypatch.setattr(routes, "get_evaluator", lambda: evaluator)
+    client = create_app().test_client()
+
+    response = client.post('/analyze', data={"text": "Some script text. It has two sentences."},
+                           headers={"X-Request-ID": "client-42"})
+
+    assert response.status_code == 200
+    assert response.headers["X-Request-ID"] == "client-42"
+    [record] = traces
+    assert record["request_id"] == "client-42"
+    spans = by_name(record)
+    root = spans["POST /analyze"]
+    assert root["attributes"]["status"] == 200
+    assert root["attributes"]["input_chars"] == len("Some script text. It has two sentences.")
+    for name in ("evaluate", "classify", "prepare_prompt", "analyze", "segment", "convert", "narr_mod.analyze", "visualize"):
+        assert name in spans
+    assert spans["classify"]["attributes"]["structure"] == "Three-Act Structure"
+    assert spans["analyze"]["attributes"]["completion_tokens"] > 0
+    assert spans["narr_mod.analyze"]["parent_id"] == spans["convert"]["span_id"]
+
+
+def test_invalid_request_id_is_replaced():
+    client = create_app().test_client()
+    response = client.get('/jobs', headers={"X-Request-ID": "bad id; rm -rf"})
+    assert response.headers["X-Request-ID"] != "bad id; rm -rf"
+    assert len(response.headers["X-Request-ID"]) == 32
+
+
+def test_job_trace_keeps_request_id(monkeypatch, traces):
+    monkeypatch.setattr(routes, "get_evaluator", lambda: NarrativeEvaluator(lambda prompt, stop=None: "three_act"))
+    client = create_app().test_client()
+
+    response = client.post('/jobs', data={"text": "Some script text."}, headers={"X-Request-ID": "job-7"})
+    job_id = response.get_json()["job_id"]
+    for _ in range(100):
+        if client.get(f'/jobs/{job_id}').get_json()["status"] in ("done", "failed"):
+            break
+        time.sleep(0.05)
+
+    job_traces = [record for record in traces if "job" in by_name(record)]
+    assert job_traces and job_traces[0]["request_id"] == "job-7"
+    assert by_name(job_traces[0])["job"]["attributes"]["job_id"] == job_id
+
+
+def test_jsonl_sink_appends_one_line_per_trace(tmp_path):
+    path = tmp_path / "traces" / "traces.jsonl"
+    tracing.configure(str(path))
+    try:
+        with tracing.trace("first"):
+            pass
+        with tracing.trace("second"):
+            pass
+    finally:
+        tracing.configure('')
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line)["spans"][0]["name"] for line in lines] == ["first", "second"]
@@ -0,0 +1,55 @@
+# tests/test_uploads.py
+
+import os
+from io import BytesIO
+
+import service.extraction as extraction
+from app import create_app
+from service.extraction import extract_text_from_txt, extract_uploaded_text, spool_upload
+
+
+def test_txt_is_decoded_across_block_boundaries(monkeypatch):
+    monkeypatch.setattr(extraction, "READ_BLOCK_SIZE", 3)
+    text = "Привет, мир! Ёлка."
+
+    assert extract_text_from_txt(BytesIO(text.encode('utf-8'))) == text
+
+
+def test_doc_uploads_use_unique_temporary_files(monkeypatch):
+    paths = []
+
+    def fake_doc_text(path):
+        paths.append(path)
+        with open(path, 'rb') as f:
+            return f.read().decode('utf-8')
+
+    monkeypatch.setattr(extraction, "extract_doc_text", fake_doc_text)
+
+    assert extract_uploaded_text("script.doc", BytesIO(b"first")) == "first"
+    assert extract_uploaded_text("script.doc", BytesIO(b"second")) == "second"
+    assert paths[0] != paths[1]
+    assert not any(os.path.exists(path) for path in paths)
+
+
+def test_spooled_upload_rolls_over_to_disk(monkeypatch):
+    monkeypatch.setattr(extraction.Config, "UPLOAD_SPOOL_BYTES", 4)
+
+    spool = spool_upload(BytesIO(b"long upload body"))
+
+    assert spool._rolled
+    assert spool.read() == b"long upload body"
+
+
+def test_oversized_request_is_rejected():
+    app = create_app()
+    app.config['MAX_CONTENT_LENGTH'] = 1024
+    client = app.test_client()
+
+    response = client.post('/analyze', data={"file": (BytesIO(b"x" * 4096), "script.txt")})
+
+    assert response.status_code == 413
+    assert "too large" in response.get_json()["error"]
+
+
+def test_non_ascii_filename_keeps_extension():
+    assert extract_uploaded_text("сценарий.TXT", BytesIO("Текст сценария".encode('utf-8'))) == "Текст сценария"
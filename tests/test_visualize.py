@@ -0,0 +1,46 @@
+# tests/test_visualize.py
+
+from app import create_app
+from app.constants import STRUCTURE_MAPPING
+from narr_mod import get_structure, stylesheet
+
+
+def test_visualizations_have_no_inline_styles():
+    for key in STRUCTURE_MAPPING.values():
+        html = get_structure(key).visualize({})
+        assert "<style" not in html
+        assert html.strip()
+
+
+def test_visualize_escapes_analysis_text():
+    html = get_structure("three_act").visualize({"Act1": "<b>setup</b>", "Act2": "middle", "Act3": "end"})
+
+    assert "&lt;b&gt;setup&lt;/b&gt;" in html
+    assert "<b>" not in html
+    assert "middle" in html and "end" in html
+
+
+def test_four_act_visualize_uses_defaults():
+    html = get_structure("four_act").visualize({"Act1": "Setup text"})
+
+    assert "Setup text" in html
+    assert "No analysis available" in html
+    assert "No double check analysis available" in html
+
+
+def test_stylesheet_is_served_with_immutable_cache():
+    client = create_app().test_client()
+    css, fingerprint = stylesheet()
+
+    index = client.get('/')
+    assert f'/assets/narr_mod.{fingerprint}.css' in index.get_data(as_text=True)
+
+    response = client.get(f'/assets/narr_mod.{fingerprint}.css')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/css'
+    assert response.data == css
+    assert 'immutable' in response.headers['Cache-Control']
+
+    stale = client.get('/assets/narr_mod.000000000000.css')
+    assert stale.status_code == 302
+    assert stale.headers['Location'].endswith(f'/assets/narr_mod.{fingerprint}.css')